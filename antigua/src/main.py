@@ -1,10 +1,6 @@
 import argparse
-from rich import print as rprint
 
 from .types import SolveRequest, SolveResult
-from .pipeline.input_adapter import normalize
-from .pipeline.parser import parse_equation
-from .pipeline.solver import solve_equation
 
 def run_cli():
     parser = argparse.ArgumentParser(
@@ -24,6 +20,12 @@ def run_cli():
     )
     args = parser.parse_args()
 
+    # imports diferidos: --help (o un error de argumentos) no paga rich ni SymPy
+    from rich import print as rprint
+    from .pipeline.input_adapter import normalize
+    from .pipeline.parser import parse_equation
+    from .pipeline.solver import solve_equation
+
     req = SolveRequest(raw_input=args.raw, input_format=args.fmt)
     expr = normalize(req.raw_input, req.input_format)
 
@@ -1,52 +1,192 @@
 # app/api.py (solo referencia)
-from fastapi import APIRouter
-from .models import SolveRequest, SolveResponse, Step
-from .services.sympy_solver import solve_problem
-from .services.step_builder import build_steps
-from .services.narration_polisher import polish_steps
-from .services.manim_generator import generate_manim_code
-from .services.video_renderer import render_video
-from .storage.save_artifacts import save_artifacts
+import asyncio
+import json
+import re
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from .config import settings
+from .models import SolveRequest, SolveResponse, Step, BatchSolveResponse, JobListResponse, JobSummary
+from .services.job_queue import submit_job, get_job
+from .services.batch import solve_batch
+from .services.progress import TERMINAL_STATUSES, is_terminal, progress_bus
+from .storage.artifact_store import artifact_store, job_dir
+from .storage.job_index import MAX_PAGE, job_index
 
 router = APIRouter()
 
+# ids de job: nada que pueda salirse del almacén ("..", barras)
+JOB_ID_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+# comentario SSE cada tanto: que proxies y navegadores no corten el stream
+SSE_KEEPALIVE_S = 15.0
+
+
+def _to_response(job: Dict) -> SolveResponse:
+    result = job["result"] or {}
+    steps = result.get("steps")
+    return SolveResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        latex=result.get("latex"),
+        solution=result.get("solution"),
+        validated=result.get("validated"),
+        steps=[Step(**s) for s in steps] if steps is not None else None,
+        video_url=result.get("video_url"),
+        video_tier=result.get("video_tier"),
+        video_quality=result.get("video_quality"),
+        manim_code=result.get("manim_code"),
+        error=job["error"],
+        error_code=job.get("error_code"),
+    )
+
+
 @router.post("/solve", response_model=SolveResponse)
 def solve_endpoint(payload: SolveRequest):
-    solver_output = solve_problem(
-        problem_text=payload.problem_text,
-        input_format=payload.input_format
-    )
+    # 👇 ya no bloquea: encola el job y responde con el job_id al instante
+    job_id = submit_job(payload)
+    return SolveResponse(job_id=job_id, status="queued")
 
-    steps_raw = build_steps(solver_output, locale=payload.locale)
-    steps_polished = polish_steps(steps_raw, locale=payload.locale)
 
-    manim_code = generate_manim_code(
-        latex_problem=solver_output["latex_clean"],
-        steps=steps_polished,
-        solution=solver_output["solution"],
-        style=payload.style,
-        locale=payload.locale
-    )
+@router.post("/solve/batch", response_model=BatchSolveResponse)
+def solve_batch_endpoint(payloads: List[SolveRequest]):
+    # hoja de ejercicios completa: una respuesta con el estado de cada item
+    return BatchSolveResponse(items=[_to_response(job) for job in solve_batch(payloads)])
+
+
+@router.get("/jobs", response_model=JobListResponse)
+def list_jobs_endpoint(
+    status: Optional[str] = None,
+    problem_type: Optional[str] = None,
+    validated: Optional[bool] = None,
+    equation: Optional[str] = None,
+    problem_text: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE),
+    cursor: Optional[str] = None,
+):
+    # catálogo en SQLite: más recientes primero, paginado por cursor.
+    # equation filtra por la forma canónica del solver; problem_text, por
+    # la entrada tal cual (la única que tienen los jobs que fallaron)
+    try:
+        items, next_cursor = job_index.query(
+            status=status, problem_type=problem_type, validated=validated, equation=equation,
+            problem_text=problem_text, since=since, until=until, limit=limit, cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JobListResponse(items=[JobSummary(**item) for item in items], next_cursor=next_cursor)
+
 
-    # 👇 ahora sí intenta renderizar de verdad
-    video_path, job_id = render_video(manim_code, scene_name="SolutionScene", quality="l")
+@router.get("/jobs/{job_id}", response_model=SolveResponse)
+def job_status_endpoint(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' no encontrado")
+    if job["status"] == "done":
+        artifact_store.touch(job_id)  # consultado: sube en el LRU del almacén
+    return _to_response(job)
 
-    # guardar artefactos
-    save_artifacts(
-        job_id=job_id,
-        latex=solver_output["latex_clean"],
-        solution=solver_output["solution"],
-        steps=steps_polished,
-        manim_code=manim_code
+
+def _sse(event: Dict) -> str:
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+async def _job_events(job_id: str, request: Request):
+    # suscribirse antes de mirar el estado: así no se pierde un cambio entre medio
+    events = progress_bus.subscribe_async(job_id)
+    try:
+        job = get_job(job_id)
+        if job is not None and job["status"] in TERMINAL_STATUSES:
+            # ya terminó: solo el estado final
+            event = {"type": "status", "status": job["status"]}
+            if job.get("error") is not None:
+                event["error"] = job["error"]
+            if job.get("error_code") is not None:
+                event["error_code"] = job["error_code"]
+            yield _sse(event)
+            return
+        while True:
+            try:
+                event = await asyncio.wait_for(events.get(), SSE_KEEPALIVE_S)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            yield _sse(event)
+            if is_terminal(event):
+                return
+    finally:
+        progress_bus.unsubscribe(job_id, events)
+
+
+@router.get("/jobs/{job_id}/events")
+def job_events_endpoint(job_id: str, request: Request):
+    # progreso en vivo (Server-Sent Events): status y "animación i de n"
+    # mientras renderiza; el stream se cierra cuando el job termina
+    if get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' no encontrado")
+    return StreamingResponse(
+        _job_events(job_id, request),
+        media_type="text/event-stream",
+        headers={"cache-control": "no-cache", "x-accel-buffering": "no"},
     )
 
-    return SolveResponse(
-        job_id=job_id,
-        status="done",
-        latex=solver_output["latex_clean"],
-        solution=solver_output["solution"],
-        validated=solver_output["validated"],
-        steps=[Step(**s) for s in steps_polished],
-        video_url=video_path,
-        manim_code=manim_code
+
+def _video_file(job_id: str) -> Optional[Path]:
+    if not JOB_ID_RE.match(job_id):
+        return None
+    # layout con shards y, por compatibilidad, el viejo <storage_dir>/<job_id>/
+    for path in (job_dir(job_id) / "video.mp4", Path(settings.storage_dir) / job_id / "video.mp4"):
+        if path.is_file():
+            return path
+    return None
+
+
+def _not_modified(request_headers: Mapping[str, str], etag: str, last_modified: str) -> bool:
+    """
+    GET condicional: If-None-Match manda sobre If-Modified-Since (RFC 9110).
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+@router.api_route("/videos/{job_id}", methods=["GET", "HEAD"])
+def video_endpoint(job_id: str, request: Request):
+    # el mp4 final: Range/206 para buscar, ETag/Last-Modified para caché,
+    # y FileResponse lo manda por partes (o con pathsend si el server lo
+    # soporta) sin cargarlo en memoria
+    path = _video_file(job_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Video del job '{job_id}' no encontrado")
+
+    response = FileResponse(
+        path,
+        media_type="video/mp4",
+        stat_result=path.stat(),
+        # el video de un job puede mejorar de calidad: se revalida siempre (304 si no cambió)
+        headers={"cache-control": "no-cache"},
     )
+    etag, last_modified = response.headers["etag"], response.headers["last-modified"]
+    if _not_modified(request.headers, etag, last_modified):
+        return Response(
+            status_code=304,
+            headers={"etag": etag, "last-modified": last_modified, "cache-control": "no-cache"},
+        )
+
+    artifact_store.touch(job_id)
+    return response
@@ -0,0 +1,87 @@
+# app/config.py
+from pydantic import BaseModel
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+
+class Settings(BaseModel):
+    # carpeta raíz donde viven los jobs (scene.json, video, metadata...)
+    storage_dir: str = os.getenv("STORAGE_DIR", "app/storage/local_store")
+
+    # presupuesto del almacén de jobs (0 = sin límite); la eviction corre en segundo plano
+    storage_max_mb: int = int(os.getenv("STORAGE_MAX_MB", "10240"))
+    storage_max_age_days: float = float(os.getenv("STORAGE_MAX_AGE_DAYS", "30"))
+    storage_sweep_interval_s: float = float(os.getenv("STORAGE_SWEEP_INTERVAL_S", "60"))
+
+    # catálogo SQLite de jobs (vacío = <storage_dir>/jobs.sqlite3)
+    job_index_path: str = os.getenv("JOB_INDEX_PATH", "")
+
+    # fsync de los artefactos (por lotes, en el hilo escritor); 0 = confiar en el SO
+    artifact_fsync: bool = os.getenv("ARTIFACT_FSYNC", "1") == "1"
+
+    # hilos que orquestan jobs completos (solve -> pasos -> código -> render)
+    job_workers: int = int(os.getenv("JOB_WORKERS", "4"))
+    # jobs terminados que se recuerdan en memoria (LRU); los más viejos se
+    # leen del catálogo (job_index) y de su metadata.json
+    job_memory_max: int = int(os.getenv("JOB_MEMORY_MAX", "10000"))
+
+    # procesos que renderizan con Manim en paralelo (acotado a propósito)
+    render_workers: int = int(os.getenv("RENDER_WORKERS", "2"))
+
+    # workers de Manim de larga vida (0 = siempre un subprocess por job);
+    # también acotan cuántos segmentos de un mismo video se renderizan a la vez
+    warm_render_workers: int = int(os.getenv("WARM_RENDER_WORKERS", os.getenv("RENDER_WORKERS", "2")))
+    warm_worker_max_jobs: int = int(os.getenv("WARM_WORKER_MAX_JOBS", "50"))
+    warm_worker_max_rss_mb: int = int(os.getenv("WARM_WORKER_MAX_RSS_MB", "1500"))
+    render_timeout_s: float = float(os.getenv("RENDER_TIMEOUT_S", "600"))
+
+    # render por segmentos (título, cada paso, final) con caché entre jobs
+    segment_render: bool = os.getenv("SEGMENT_RENDER", "1") not in ("0", "false", "False")
+
+    # render progresivo: primero un preview rápido; la versión en
+    # UPGRADE_QUALITY se renderiza cuando no hay otros renders y reemplaza
+    # al preview (vacío = sin mejora, solo el preview)
+    preview_quality: str = os.getenv("PREVIEW_QUALITY", "l")
+    upgrade_quality: str = os.getenv("UPGRADE_QUALITY", "m")
+
+    # métricas por etapa en /metrics (0 = desactivadas, costo casi nulo)
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "1") not in ("0", "false", "False")
+
+    # procesos que resuelven con SymPy (aislados, con límites de tiempo y memoria)
+    solver_workers: int = int(os.getenv("SOLVER_WORKERS", str(os.cpu_count() or 2)))
+    solver_sandbox: bool = os.getenv("SOLVER_SANDBOX", "1") not in ("0", "false", "False")
+    solver_timeout_s: float = float(os.getenv("SOLVER_TIMEOUT_S", "10"))
+    solver_max_memory_mb: int = int(os.getenv("SOLVER_MAX_MEMORY_MB", "1024"))
+    solver_max_input_chars: int = int(os.getenv("SOLVER_MAX_INPUT_CHARS", "2000"))
+
+    # al arrancar: parseo + solve de muestra en segundo plano (imports y sandbox calientes)
+    prewarm: bool = os.getenv("PREWARM", "0") in ("1", "true", "True")
+
+    # caché de renders por contenido (mismo código Manim -> mismo video)
+    render_cache_dir: str = os.getenv("RENDER_CACHE_DIR", "app/storage/render_cache")
+    render_cache_max_mb: int = int(os.getenv("RENDER_CACHE_MAX_MB", "2048"))
+
+    # caché compartida de SVGs de Text/Tex entre jobs y workers de render
+    glyph_cache_dir: str = os.getenv("GLYPH_CACHE_DIR", "app/storage/glyph_cache")
+    glyph_cache_max_mb: int = int(os.getenv("GLYPH_CACHE_MAX_MB", "512"))
+    glyph_cache_sweep_interval_s: float = float(os.getenv("GLYPH_CACHE_SWEEP_INTERVAL_S", "60"))
+
+    # caché de resultados del solver (memoria LRU + disco opcional)
+    solver_cache_size: int = int(os.getenv("SOLVER_CACHE_SIZE", "1024"))
+    solver_cache_dir: str = os.getenv("SOLVER_CACHE_DIR", "")  # vacío = solo memoria
+
+    # pulido de la narración: "stub" (la deja igual) o "http" (POLISHER_URL)
+    polisher_backend: str = os.getenv("POLISHER_BACKEND", "stub")
+    polisher_url: str = os.getenv("POLISHER_URL", "")
+    polisher_model: str = os.getenv("POLISHER_MODEL", "")
+    polisher_api_key: str = os.getenv("POLISHER_API_KEY", "")
+    polisher_batch_size: int = int(os.getenv("POLISHER_BATCH_SIZE", "16"))
+    # lo que no llegue en este tiempo (por job) queda con la narración original
+    polisher_budget_s: float = float(os.getenv("POLISHER_BUDGET_S", "2.0"))
+    polisher_cache_size: int = int(os.getenv("POLISHER_CACHE_SIZE", "4096"))
+    polisher_cache_dir: str = os.getenv("POLISHER_CACHE_DIR", "")  # vacío = solo memoria
+
+
+settings = Settings()
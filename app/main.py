@@ -1,11 +1,40 @@
 # app/main.py
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from .api import router as api_router
+from .config import settings
+from .services import batch, job_queue, metrics, prewarm, video_renderer
+from .storage.artifact_store import artifact_store
+from .storage.artifact_writer import artifact_writer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # opcional: SymPy/ANTLR se cargan en segundo plano y /health ya responde
+    if settings.prewarm:
+        prewarm.start()
+        # los workers de Manim también: el primer render no paga su import
+        video_renderer.warm_pool.start()
+    # eviction por tamaño/edad en un hilo de fondo (nunca en el request)
+    artifact_store.start()
+    video_renderer.start_glyph_eviction()
+    yield
+    artifact_store.stop()
+    video_renderer.glyph_cache.stop()
+    # al apagar: cerrar los pools de jobs/render sin dejar procesos colgados
+    job_queue.shutdown(wait=False)
+    batch.shutdown(wait=False)
+    # lo que quedó encolado para disco se escribe antes de salir
+    artifact_writer.shutdown()
+
 
 app = FastAPI(
     title="Math Solver Video Agent MVP",
     description="Resuelve un problema matemático y genera video educativo paso a paso.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.include_router(api_router)
@@ -14,3 +43,9 @@ app.include_router(api_router)
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    # formato de texto de Prometheus (latencia por etapa, fallos, cachés, cola)
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -22,10 +22,42 @@ class SolveRequest(BaseModel):
 
 class SolveResponse(BaseModel):
     job_id: str
-    status: str  # "done" en el MVP síncrono
-    latex: str
-    solution: List[str]
-    validated: bool
-    steps: List[Step]
-    video_url: str
-    manim_code: str  # opcional: para debug/descarga
+    status: str  # "queued" | "running" | "done" | "failed"
+    # los campos del resultado llegan cuando el job termina (status="done")
+    latex: Optional[str] = None
+    solution: Optional[List[str]] = None
+    validated: Optional[bool] = None
+    steps: Optional[List[Step]] = None
+    video_url: Optional[str] = None  # /videos/{job_id} (Range y GET condicional)
+    video_tier: Optional[str] = None  # "preview" (mejora en camino) | "full"
+    video_quality: Optional[str] = None  # calidad de Manim del video actual: "l" | "m" | "h"...
+    manim_code: Optional[str] = None  # opcional: para debug/descarga
+    error: Optional[str] = None  # motivo si status="failed"
+    error_code: Optional[str] = None  # "timeout" | "too_complex" si el solver cortó por límites
+
+
+class JobSummary(BaseModel):
+    # una fila del catálogo de jobs (GET /jobs)
+    job_id: str
+    status: str  # "done" | "render_failed" | "failed"
+    created_at: float  # epoch, segundos
+    equation: Optional[str] = None  # forma canónica (latex_clean); vacía si falló antes de resolver
+    problem_text: Optional[str] = None  # la entrada tal como llegó
+    problem_type: Optional[str] = None
+    validated: Optional[bool] = None
+    solution: Optional[List[str]] = None
+    render_s: Optional[float] = None
+    video_path: Optional[str] = None
+    metadata_path: Optional[str] = None
+    artifact_bytes: Optional[int] = None
+    error: Optional[str] = None
+
+
+class JobListResponse(BaseModel):
+    items: List[JobSummary]
+    next_cursor: Optional[str] = None  # None = última página
+
+
+class BatchSolveResponse(BaseModel):
+    # un item por problema recibido, en el mismo orden (cada uno con su status)
+    items: List[SolveResponse]
@@ -0,0 +1,140 @@
+# app/services/batch.py
+"""
+/solve/batch: muchas ecuaciones (una hoja de ejercicios) en una sola llamada.
+
+1. Deduplica: el mismo problema se resuelve una vez y la misma combinación
+   (problema, locale, style) se renderiza una vez.
+2. solve_problem corre en paralelo: los hilos solo esperan, el cálculo
+   va a los procesos del sandbox del solver (con límites de tiempo/memoria).
+3. Los renders se reparten en paralelo sobre el pool de render.
+4. Cada item devuelve su propio estado (done | failed, con error_code si
+   el solver cortó por límites). Los jobs se registran como queued al
+   entrar, running al despachar el render y con su estado final apenas
+   terminan; los que fallan (al resolver o al renderizar) van al catálogo.
+
+Usa las mismas etapas que el job individual (pipeline.py), así que la
+salida de un item es idéntica a la de POST /solve.
+"""
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..models import SolveRequest
+from .solver_sandbox import SolverLimitError
+from .pipeline import prepare_scene, render_job
+from .job_queue import new_job_id, record_job
+from ..storage.save_artifacts import save_failure
+
+
+_solve_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _solve_executor
+    with _executor_lock:
+        if _solve_executor is None:
+            _solve_executor = ThreadPoolExecutor(max_workers=settings.solver_workers, thread_name_prefix="batch-solve")
+        return _solve_executor
+
+
+def shutdown(wait: bool = True) -> None:
+    global _solve_executor
+    with _executor_lock:
+        if _solve_executor is not None:
+            _solve_executor.shutdown(wait=wait)
+            _solve_executor = None
+
+
+def _solve_key(payload: SolveRequest) -> Tuple[str, str]:
+    return payload.problem_text.strip(), payload.input_format.lower()
+
+
+def _render_key(payload: SolveRequest) -> Tuple:
+    return _solve_key(payload) + (payload.locale, payload.style)
+
+
+def _error(e: BaseException) -> str:
+    return f"{type(e).__name__}: {e}"
+
+
+def solve_batch(payloads: List[SolveRequest]) -> List[Dict]:
+    """
+    Devuelve una lista (en el mismo orden que la entrada) de jobs con
+    job_id, status, result y error. Cada job se puede consultar en
+    GET /jobs/{job_id} desde que se despacha, y su estado final queda
+    registrado apenas termina (no al final de todo el batch).
+    """
+    from .sympy_solver import solve_problem  # diferido, como en job_queue
+
+    # 0. Un job por combinación distinta, consultable desde ya
+    jobs: Dict[Tuple, Dict] = {}
+    for payload in payloads:
+        key = _render_key(payload)
+        if key not in jobs:
+            jobs[key] = {"job_id": new_job_id(), "status": "queued", "result": None, "error": None, "error_code": None}
+            record_job(jobs[key]["job_id"], "queued")
+
+    def _update(key: Tuple, payload: SolveRequest, **fields) -> None:
+        job = jobs[key]
+        job.update(fields)
+        record_job(job["job_id"], job["status"], result=job["result"], error=job["error"], error_code=job["error_code"])
+        if job["status"] == "failed":
+            try:
+                save_failure(job["job_id"], payload.problem_text, job["error"])
+            except Exception:
+                traceback.print_exc()  # el catálogo es secundario
+
+    # 1. Resolver cada problema distinto una sola vez, en paralelo
+    solve_futures = {}
+    for payload in payloads:
+        key = _solve_key(payload)
+        if key not in solve_futures:
+            solve_futures[key] = _executor().submit(
+                solve_problem, problem_text=payload.problem_text, input_format=payload.input_format
+            )
+
+    solver_outputs: Dict[Tuple, Dict] = {}
+    solver_errors: Dict[Tuple, Tuple[str, Optional[str]]] = {}
+    for key, future in solve_futures.items():
+        try:
+            solver_outputs[key] = future.result()
+        except SolverLimitError as e:
+            solver_errors[key] = (str(e), e.code)
+        except Exception as e:
+            solver_errors[key] = (_error(e), None)
+
+    # 2. Renderizar cada combinación distinta una sola vez, en paralelo
+    def _render_one(job_id: str, payload: SolveRequest) -> Dict:
+        solver_output = solver_outputs[_solve_key(payload)]
+        steps, scene_spec, manim_code, segments = prepare_scene(payload, solver_output)
+        return render_job(job_id, solver_output, steps, scene_spec, manim_code, segments, payload.problem_text)
+
+    with ThreadPoolExecutor(max_workers=settings.render_workers, thread_name_prefix="batch") as pool:
+        render_futures = {}
+        dispatched = set()
+        for payload in payloads:
+            key = _render_key(payload)
+            if key in dispatched:
+                continue
+            dispatched.add(key)
+            if _solve_key(payload) in solver_errors:
+                error, error_code = solver_errors[_solve_key(payload)]
+                _update(key, payload, status="failed", error=error, error_code=error_code)
+            else:
+                _update(key, payload, status="running")
+                render_futures[pool.submit(_render_one, jobs[key]["job_id"], payload)] = (key, payload)
+
+        # cada render se registra cuando termina, sin esperar a los demás
+        for future in as_completed(render_futures):
+            key, payload = render_futures[future]
+            try:
+                _update(key, payload, status="done", result=future.result())
+            except Exception as e:
+                traceback.print_exc()
+                _update(key, payload, status="failed", error=_error(e))
+
+    # los duplicados comparten job (mismo video y artefactos)
+    return [jobs[_render_key(payload)] for payload in payloads]
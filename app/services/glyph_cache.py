@@ -0,0 +1,173 @@
+# app/services/glyph_cache.py
+"""
+Caché compartida de SVGs de texto y LaTeX entre jobs y workers de render.
+
+Manim guarda lo que rasteriza (media/texts, media/Tex) dentro de la
+carpeta de cada job, así que cada render empieza en frío: "Regla:
+factorización" o "Solución:" se vuelven a dar forma en cada request, y
+con MathTex cada expresión sería una compilación de LaTeX.
+
+- Clave: tupla (tipo, texto, fuente, tamaño, estilo...), hasheada.
+  Vive en <root>/<tipo>/<2 chars>/<hash>.svg.
+- Escritores concurrentes (varios procesos): cada uno publica el archivo
+  completo con link/copia a un .tmp propio + os.replace. Nadie lee un
+  SVG a medias y, si dos escriben la misma clave, gana cualquiera (son iguales).
+- Un hit se enlaza dentro de la carpeta del job: si la eviction borra
+  el original a mitad del render, el job tiene su copia.
+- Eviction LRU por bytes usando el mtime (cada hit lo actualiza), para
+  que valga entre procesos y reinicios. La barrida principal la hace el
+  proceso de la API en un hilo de fondo (start()); los renders solo
+  revisan cuando publicaron una fracción del presupuesto, así un proceso
+  recién lanzado no recorre toda la caché en su primer glifo.
+
+Sin dependencias de la app: scene_runtime la importa también cuando la
+CLI de manim carga ese archivo por ruta.
+"""
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+# cada cuántos bytes publicados se revisa el tamaño total en disco
+EVICT_CHECK_FRACTION = 0.1
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class GlyphCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._since_check = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def path(self, key: Tuple) -> Path:
+        h = hashlib.sha256()
+        for part in key:
+            h.update(str(part).encode("utf-8"))
+            h.update(b"\0")
+        digest = h.hexdigest()
+        return self.root / str(key[0]) / digest[:2] / f"{digest}.svg"
+
+    def fetch(self, key: Tuple, dest: Path) -> bool:
+        """
+        Si la clave está, la deja en `dest` y devuelve True (hit).
+        """
+        src = self.path(key)
+        try:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            _link_or_copy(src, dest)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return False
+        try:
+            os.utime(src)  # orden LRU
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def store(self, key: Tuple, src: Path) -> None:
+        """
+        Publica un SVG recién generado (atómico; best-effort).
+        """
+        path = self.path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _link_or_copy(Path(src), tmp)
+            os.replace(tmp, path)
+            # si tmp y path ya eran el mismo inodo, rename no hace nada: limpiamos
+            tmp.unlink(missing_ok=True)
+            size = path.stat().st_size
+        except OSError:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self._since_check += size
+            check = self.max_bytes > 0 and self._since_check >= self.max_bytes * EVICT_CHECK_FRACTION
+            if check:
+                self._since_check = 0
+        if check:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Si el total pasa el presupuesto, borra los menos usados. Devuelve cuántos.
+        """
+        files = []
+        total = 0
+        for p in self.root.glob("*/*/*.svg"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return 0
+
+        files.sort()
+        removed = 0
+        for _, size, p in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass  # otro proceso ya lo sacó
+            total -= size
+            removed += 1
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def _loop(self, interval_s: float, on_evict: Optional[Callable[[int], None]]) -> None:
+        while not self._stop.is_set():
+            try:
+                removed = self.evict()
+                if removed and on_evict is not None:
+                    on_evict(removed)
+            except Exception:
+                pass  # best-effort: lo reintenta la próxima pasada
+            self._stop.wait(interval_s)
+
+    def start(self, interval_s: float = 60, on_evict: Optional[Callable[[int], None]] = None) -> None:
+        """
+        Barrida periódica en un hilo de fondo (en el proceso de la API).
+        """
+        if self.max_bytes <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(interval_s, on_evict), name="glyph-eviction", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
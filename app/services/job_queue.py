@@ -0,0 +1,242 @@
+# app/services/job_queue.py
+"""
+Cola de jobs en memoria para /solve.
+
+- submit_job() registra el job como "queued" y devuelve el job_id al instante.
+- Un pool de hilos orquesta cada job (solve -> pasos -> código Manim).
+- El render, que es lo lento, corre en el pool de procesos acotado de
+  video_renderer (y antes pasa por la caché de renders).
+- get_job() devuelve el estado: queued | running | done | failed.
+  Si el solver cortó por límites, error_code dice por qué (timeout | too_complex).
+- Un job "done" puede tener todavía el preview (video_tier="preview");
+  render_upgrades lo pasa a "full" con update_result().
+- Cada cambio de status (y el progreso del render) se publica en
+  progress_bus para GET /jobs/{job_id}/events.
+- Jobs iguales que llegan a la vez comparten el solve (por forma
+  canónica) y el render (por spec): ver single_flight.
+- En memoria quedan como mucho JOB_MEMORY_MAX jobs terminados (LRU; los
+  que están en curso no se sacan nunca). Los demás, y los de antes de un
+  reinicio, get_job() los lee del catálogo (job_index + metadata.json).
+"""
+import json
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..config import settings
+from ..models import SolveRequest
+from . import metrics
+from .solver_sandbox import SolverLimitError, solver_sandbox
+from .pipeline import prepare_scene, render_job
+from .progress import progress_bus
+from . import video_renderer
+from .render_upgrades import upgrade_scheduler
+from ..storage.job_index import job_index
+from ..storage.save_artifacts import save_failure
+
+TERMINAL = ("done", "failed")
+
+_jobs: "OrderedDict[str, Dict]" = OrderedDict()
+_jobs_lock = threading.Lock()
+
+_job_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    """
+    Crea el pool la primera vez que se necesita (no al importar el módulo).
+    """
+    global _job_executor
+    with _executor_lock:
+        if _job_executor is None:
+            _job_executor = ThreadPoolExecutor(
+                max_workers=settings.job_workers, thread_name_prefix="job"
+            )
+        return _job_executor
+
+
+def _publish_status(job_id: str, status: str, error: Optional[str] = None, error_code: Optional[str] = None) -> None:
+    event = {"type": "status", "status": status}
+    if error is not None:
+        event["error"] = error
+    if error_code is not None:
+        event["error_code"] = error_code
+    progress_bus.publish(job_id, event)
+
+
+def _remember(job_id: str, job: Dict) -> None:
+    """
+    Guarda/actualiza un job (con el lock tomado) y saca los terminados más
+    viejos si se pasó del máximo.
+    """
+    _jobs[job_id] = job
+    _jobs.move_to_end(job_id)
+    excess = len(_jobs) - max(1, settings.job_memory_max)
+    if excess <= 0:
+        return
+    for old_id in [j for j, old in _jobs.items() if old["status"] in TERMINAL][:excess]:
+        del _jobs[old_id]
+
+
+def _set_job(job_id: str, **fields) -> None:
+    with _jobs_lock:
+        _remember(job_id, {**_jobs[job_id], **fields})
+    if "status" in fields:
+        _publish_status(job_id, fields["status"], fields.get("error"), fields.get("error_code"))
+
+
+def _run_job(job_id: str, payload: SolveRequest) -> None:
+    """
+    Ejecuta el pipeline completo de un job y va actualizando su estado.
+    """
+    _set_job(job_id, status="running")
+    try:
+        # import diferido: SymPy no se carga hasta el primer job (o el prewarm)
+        from .sympy_solver import solve_problem
+
+        solver_output = solve_problem(
+            problem_text=payload.problem_text,
+            input_format=payload.input_format
+        )
+
+        steps, scene_spec, manim_code, segments = prepare_scene(payload, solver_output)
+
+        # el render va al pool de procesos; este hilo solo espera
+        result = render_job(job_id, solver_output, steps, scene_spec, manim_code, segments, payload.problem_text)
+
+        _set_job(job_id, status="done", result=result)
+        metrics.inc("jobs_total", status="done")
+    except SolverLimitError as e:
+        # entrada demasiado costosa: resultado esperado, sin traceback
+        _fail_job(job_id, payload, str(e), e.code)
+    except Exception as e:
+        traceback.print_exc()
+        _fail_job(job_id, payload, f"{type(e).__name__}: {e}")
+
+
+def _fail_job(job_id: str, payload: SolveRequest, error: str, error_code: Optional[str] = None) -> None:
+    _set_job(job_id, status="failed", error=error, error_code=error_code)
+    metrics.inc("jobs_total", status="failed")
+    try:
+        save_failure(job_id, payload.problem_text, error)
+    except Exception:
+        # el catálogo es secundario: el estado del job ya quedó registrado
+        traceback.print_exc()
+
+
+def new_job_id() -> str:
+    return str(uuid.uuid4())[:8]
+
+
+def record_job(
+    job_id: str,
+    status: str,
+    result: Optional[Dict] = None,
+    error: Optional[str] = None,
+    error_code: Optional[str] = None,
+) -> None:
+    """
+    Registra un job ya resuelto por otro camino (p.ej. /solve/batch)
+    para que también se pueda consultar en GET /jobs/{job_id}.
+    """
+    with _jobs_lock:
+        _remember(job_id, {"job_id": job_id, "status": status, "result": result, "error": error, "error_code": error_code})
+    _publish_status(job_id, status, error, error_code)
+
+
+def submit_job(payload: SolveRequest) -> str:
+    """
+    Encola un job y devuelve su job_id sin esperar a que termine.
+    """
+    job_id = new_job_id()
+    record_job(job_id, "queued")
+
+    _executor().submit(_run_job, job_id, payload)
+    return job_id
+
+
+def update_result(job_id: str, **fields) -> None:
+    """
+    Actualiza campos del resultado de un job terminado (p.ej. la calidad del video).
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is not None and job.get("result") is not None:
+            job["result"] = {**job["result"], **fields}
+
+
+def get_job(job_id: str) -> Optional[Dict]:
+    """
+    Copia del estado actual del job, o None si no existe. Si ya no está en
+    memoria, lo arma desde el catálogo.
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            return dict(job)
+    try:
+        return _job_from_index(job_id)
+    except Exception:
+        traceback.print_exc()
+        return None
+
+
+def _job_from_index(job_id: str) -> Optional[Dict]:
+    row = job_index.get(job_id)
+    if row is None:
+        return None
+    if row["status"] == "failed":
+        return {"job_id": job_id, "status": "failed", "result": None, "error": row["error"], "error_code": None}
+
+    # done / render_failed: el resultado sale de la metadata del job
+    base_dir = Path(row["metadata_path"]).parent if row["metadata_path"] else None
+    try:
+        meta = json.loads((base_dir / "metadata.json").read_text(encoding="utf-8"))
+    except (OSError, TypeError, ValueError):
+        meta = {}
+    try:
+        manim_code = (base_dir / "manim_code.py").read_text(encoding="utf-8")
+    except (OSError, TypeError):
+        manim_code = None
+    rendered = row["video_path"] is not None
+    result = {
+        "latex": meta.get("latex", row["equation"]),
+        "solution": meta.get("solution", row["solution"]),
+        "validated": meta.get("validated", row["validated"]),
+        "steps": meta.get("steps"),
+        "video_url": f"/videos/{job_id}" if rendered else None,
+        "video_quality": meta.get("video_quality") if rendered else None,
+        "video_tier": meta.get("video_tier") if rendered else None,
+        "manim_code": manim_code,
+    }
+    return {"job_id": job_id, "status": "done", "result": result, "error": row["error"], "error_code": None}
+
+
+def queue_depth() -> int:
+    """
+    Jobs encolados que todavía no empezaron.
+    """
+    with _jobs_lock:
+        return sum(1 for job in _jobs.values() if job["status"] == "queued")
+
+
+metrics.register_collector("job_queue_depth", "gauge", "Jobs encolados esperando un worker.", queue_depth)
+
+
+def shutdown(wait: bool = True) -> None:
+    """
+    Cierra los pools (al apagar la app o al terminar los tests).
+    """
+    global _job_executor
+    with _executor_lock:
+        if _job_executor is not None:
+            _job_executor.shutdown(wait=wait)
+            _job_executor = None
+    upgrade_scheduler.shutdown()
+    video_renderer.shutdown(wait=wait)
+    solver_sandbox.shutdown()
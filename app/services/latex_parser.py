@@ -0,0 +1,293 @@
+# app/services/latex_parser.py
+"""
+Parser rápido para el LaTeX que mandan los estudiantes, con ANTLR de respaldo.
+
+parse_latex de SymPy carga el runtime de ANTLR (import pesado) y tarda
+milisegundos hasta en "x^2-5x+6". Acá se cubre el subconjunto habitual:
+
+    números, letras (con subíndice x_1, x_{12}), + - * /, \\cdot, \\times,
+    \\div, ^ (con o sin llaves), \\frac{a}{b}, \\sqrt{x}, \\sqrt[n]{x},
+    ( ), [ ], { }, \\left( \\right) y multiplicación implícita (2x, 3(x+1))
+
+y se arma exactamente el mismo árbol que parse_latex (sin evaluar, con
+la misma asociatividad), así latex_clean y las claves de caché no
+cambian según el camino. Una diferencia a propósito: "x(x+1)" es un
+producto (ANTLR lo lee como la función x aplicada a x+1).
+
+Cualquier otra cosa (funciones, |x|, !, diferenciales, comandos
+desconocidos, errores de sintaxis) va a parse_latex tal cual. Las
+etapas latex_parse_fast / latex_parse_fallback de /metrics cuentan
+cuántas entradas toma cada camino.
+"""
+import time
+from typing import List, Tuple
+
+import sympy
+from sympy import Add, Mul, Pow, Symbol
+
+from . import metrics
+
+# comandos que el lexer de ANTLR descarta
+_SKIPPED = {"left", "right", "quad", "qquad", "thinspace", "medspace", "thickspace", "negthinspace"}
+_SKIPPED_SHORT = {",", ":", ";", "!"}
+_MUL_CMDS = {"cdot", "times"}
+_FRAC_CMDS = {"frac", "dfrac", "tfrac"}
+_DIGITS = frozenset("0123456789")
+
+# tipos de token
+NUM, LETTER, CMD, CHAR, END = "num", "letter", "cmd", "char", "end"
+
+Token = Tuple[str, str]
+
+
+class Unsupported(Exception):
+    """
+    La entrada sale del subconjunto: que la resuelva parse_latex.
+    """
+
+
+def tokenize(text: str) -> List[Token]:
+    tokens: List[Token] = []
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c in " \t\r\n":
+            i += 1
+        elif c == "\\":
+            j = i + 1
+            while j < n and text[j].isascii() and text[j].isalpha():
+                j += 1
+            name = text[i + 1:j]
+            if not name:
+                if j < n and text[j] in _SKIPPED_SHORT:
+                    i = j + 1
+                    continue
+                raise Unsupported(text[i:j + 1])
+            if name in ("left", "right") and j < n and text[j] == "|":
+                raise Unsupported("\\" + name + "|")  # valor absoluto
+            if name not in _SKIPPED:
+                tokens.append((CMD, name))
+            i = j
+        elif c in _DIGITS:
+            j = i
+            while j < n and text[j] in _DIGITS:
+                j += 1
+            if j < n and text[j] == ".":
+                k = j + 1
+                while k < n and text[k] in _DIGITS:
+                    k += 1
+                if k == j + 1:
+                    raise Unsupported("número terminado en punto")
+                j = k
+            tokens.append((NUM, text[i:j]))
+            i = j
+        elif c.isascii() and c.isalpha():
+            if c == "d":
+                # "dx" es un diferencial para ANTLR
+                j = i + 1
+                while j < n and text[j] in " \t\r\n":
+                    j += 1
+                if j < n and (text[j].isalpha() or text[j] == "\\"):
+                    raise Unsupported("diferencial")
+            tokens.append((LETTER, c))
+            i += 1
+        elif c in "+-*/^_()[]{}":
+            tokens.append((CHAR, c))
+            i += 1
+        else:
+            raise Unsupported(c)
+    tokens.append((END, ""))
+    return tokens
+
+
+class _Parser:
+    """
+    Descenso recursivo que sigue la gramática LaTeX.g4 de SymPy:
+    additive > mp > unary > postfix+ > exp > comp/atom.
+    """
+
+    def __init__(self, text: str):
+        self.tokens = tokenize(text)
+        self.i = 0
+
+    def peek(self) -> Token:
+        return self.tokens[self.i]
+
+    def next(self) -> Token:
+        tok = self.tokens[self.i]
+        self.i += 1
+        return tok
+
+    def expect(self, char: str) -> None:
+        if self.next() != (CHAR, char):
+            raise Unsupported(f"se esperaba {char}")
+
+    def additive(self):
+        lhs = self.mp()
+        while self.peek() in ((CHAR, "+"), (CHAR, "-")):
+            op = self.next()[1]
+            rhs = self.mp()
+            if op == "+":
+                lhs = Add(lhs, rhs, evaluate=False)
+            elif rhs.is_Atom:
+                lhs = Add(lhs, -1 * rhs, evaluate=False)
+            else:
+                lhs = Add(lhs, Mul(-1, rhs, evaluate=False), evaluate=False)
+        return lhs
+
+    def mp(self):
+        lhs = self.unary()
+        while True:
+            tok = self.peek()
+            if tok == (CHAR, "*") or (tok[0] == CMD and tok[1] in _MUL_CMDS):
+                self.next()
+                lhs = Mul(lhs, self.unary(), evaluate=False)
+            elif tok == (CHAR, "/") or tok == (CMD, "div"):
+                self.next()
+                lhs = Mul(lhs, Pow(self.unary(), -1, evaluate=False), evaluate=False)
+            else:
+                return lhs
+
+    def unary(self):
+        tok = self.peek()
+        if tok == (CHAR, "+"):
+            self.next()
+            return self.unary()
+        if tok == (CHAR, "-"):
+            self.next()
+            return -self.unary()
+        items = [self.exp()]
+        while self._starts_exp(self.peek()):
+            items.append(self.exp())
+        return _implicit_product(items)
+
+    @staticmethod
+    def _starts_exp(tok: Token) -> bool:
+        kind, value = tok
+        return (
+            kind in (NUM, LETTER)
+            or (kind == CHAR and value in "([{")
+            or (kind == CMD and (value in _FRAC_CMDS or value == "sqrt"))
+        )
+
+    def exp(self):
+        base = self.comp()
+        while self.peek() == (CHAR, "^"):
+            self.next()
+            if self.peek() == (CHAR, "{"):
+                self.next()
+                exponent = self.additive()
+                self.expect("}")
+            else:
+                exponent = self.atom()
+            if self.peek() == (CHAR, "_"):
+                raise Unsupported("subíndice después de un exponente")
+            base = Pow(base, exponent, evaluate=False)
+        return base
+
+    def comp(self):
+        tok = self.peek()
+        closing = {"(": ")", "[": "]", "{": "}"}
+        if tok[0] == CHAR and tok[1] in closing:
+            self.next()
+            inner = self.additive()
+            self.expect(closing[tok[1]])
+            return inner
+        if tok == (CMD, "sqrt"):
+            self.next()
+            root = None
+            if self.peek() == (CHAR, "["):
+                self.next()
+                root = self.additive()
+                self.expect("]")
+            self.expect("{")
+            base = self.additive()
+            self.expect("}")
+            if root is not None:
+                return sympy.root(base, root, evaluate=False)
+            return sympy.sqrt(base, evaluate=False)
+        return self.atom()
+
+    def atom(self):
+        kind, value = self.next()
+        if kind == NUM:
+            return sympy.Number(value)
+        if kind == LETTER:
+            if self.peek() == (CHAR, "_"):
+                self.next()
+                return Symbol(f"{value}_{{{self._subscript()}}}")
+            return Symbol(value)
+        if kind == CMD and value in _FRAC_CMDS:
+            top = self._frac_part()
+            bottom = self._frac_part()
+            inverse = Pow(bottom, -1, evaluate=False)
+            return inverse if top == 1 else Mul(top, inverse, evaluate=False)
+        raise Unsupported(value or "fin de la expresión")
+
+    def _subscript(self) -> str:
+        braced = self.peek() == (CHAR, "{")
+        if braced:
+            self.next()
+        kind, value = self.next()
+        if kind not in (NUM, LETTER) or "." in value:
+            raise Unsupported("subíndice")
+        if braced:
+            self.expect("}")
+        return value
+
+    def _frac_part(self):
+        kind, value = self.peek()
+        if kind == NUM and len(value) == 1:
+            self.next()
+            return sympy.Number(value)
+        self.expect("{")
+        part = self.additive()
+        self.expect("}")
+        return part
+
+
+def _implicit_product(items: List, i: int = 0):
+    """
+    Igual que convert_postfix_list de SymPy: producto anidado a derecha,
+    y una 'x' suelta entre dos números se lee como "por" (2 x 3).
+    """
+    res = items[i]
+    if i == len(items) - 1:
+        return res
+    if i > 0:
+        left, right = items[i - 1], items[i + 1]
+        if not (left.atoms(Symbol) or right.atoms(Symbol)) and str(res) == "x":
+            return _implicit_product(items, i + 1)
+    return Mul(res, _implicit_product(items, i + 1), evaluate=False)
+
+
+def parse_fast(text: str):
+    """
+    Solo el subconjunto; lanza Unsupported para todo lo demás.
+    """
+    parser = _Parser(text.strip())
+    if parser.peek()[0] == END:
+        raise Unsupported("vacío")
+    expr = parser.additive()
+    if parser.peek()[0] != END:
+        raise Unsupported(parser.peek()[1])
+    return expr
+
+
+def parse_latex_expr(text: str):
+    """
+    Una expresión LaTeX (sin '=') a SymPy: camino rápido y, si no alcanza, ANTLR.
+    """
+    t0 = time.perf_counter()
+    try:
+        expr = parse_fast(text)
+    except (Unsupported, RecursionError):
+        pass
+    else:
+        metrics.observe("latex_parse_fast", time.perf_counter() - t0)
+        return expr
+    with metrics.timed("latex_parse_fallback"):
+        # parse_latex arrastra el runtime de ANTLR: solo si hace falta
+        from sympy.parsing.latex import parse_latex
+
+        return parse_latex(text)
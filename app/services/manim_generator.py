@@ -1,66 +1,184 @@
 # app/services/manim_generator.py
+"""
+Descripción de la escena de un job.
+
+Lo que se renderiza es un spec JSON compacto (build_scene_spec) que
+interpreta la única escena precompilada, scene_runtime.SpecScene: no hay
+código Python por job que escribir, compilar ni importar, y el JSON
+canónico es además la clave de la caché de renders.
+
+generate_manim_code sigue existiendo como exportación equivalente en
+Python (para depurar o descargar).
+"""
+import json
 from typing import List, Dict
 
-def generate_manim_code(
-    latex_problem: str,
-    steps: List[Dict],
-    solution: List[str],
-    style: str = "clean",
-    locale: str = "es"
-) -> str:
-    """
-    Versión sin LaTeX: usa Text en vez de Tex.
-    Esto evita tener instalado LaTeX en Windows.
-    """
+# la escena precompilada que interpreta los specs (app/services/scene_runtime.py)
+SPEC_SCENE = "SpecScene"
 
-    steps_defs = []
-    steps_plays = []
+# sube si cambia cómo SpecScene dibuja un spec (invalida la caché de renders)
+SPEC_VERSION = 1
 
-    for step in steps:
-        idx = step["index"]
-        step_txt = f"Paso {idx}: {step['latex_after']}"
-        rule_txt = f"Regla: {step['rule']}"
-        narr_txt = step["narration"]
+# animaciones (play + wait) que hace SpecScene por cada parte del spec
+TITLE_ANIMATIONS, STEP_ANIMATIONS, FINAL_ANIMATIONS = 3, 5, 2
+
+
+def _title_text(latex_problem: str) -> str:
+    return f"Problema: {latex_problem}"
+
+
+def _step_texts(step: Dict):
+    return (
+        f"Paso {step['index']}: {step['latex_after']}",
+        f"Regla: {step['rule']}",
+        step["narration"],
+    )
 
-        steps_defs.append(
-            f"""
+
+def _final_text(solution: List[str]) -> str:
+    return "Solución: " + " , ".join(solution)
+
+
+def _py_str(text: str) -> str:
+    # literal de Python válido aunque el texto traiga comillas, barras o saltos
+    return json.dumps(text, ensure_ascii=False)
+
+
+def _step_defs(step: Dict) -> str:
+    idx = step["index"]
+    step_txt, rule_txt, narr_txt = (_py_str(t) for t in _step_texts(step))
+    return f"""
         # Paso {idx}
-        step_{idx} = Text("{step_txt}", font_size=32)
-        rule_{idx} = Text("{rule_txt}", font_size=26).next_to(step_{idx}, DOWN)
-        narr_{idx} = Text("{narr_txt}", font_size=24).next_to(rule_{idx}, DOWN)
+        step_{idx} = Text({step_txt}, font_size=32)
+        rule_{idx} = Text({rule_txt}, font_size=26).next_to(step_{idx}, DOWN)
+        narr_{idx} = Text({narr_txt}, font_size=24).next_to(rule_{idx}, DOWN)
         """
-        )
 
-        steps_plays.append(
-            f"""
+
+def _step_plays(step: Dict) -> str:
+    idx = step["index"]
+    return f"""
         self.play(Write(step_{idx}))
         self.play(Write(rule_{idx}))
         self.play(Write(narr_{idx}))
         self.wait(0.5)
         self.play(FadeOut(step_{idx}, rule_{idx}, narr_{idx}))
         """
-        )
 
-    steps_defs_code = "\n".join(steps_defs)
-    steps_play_code = "\n".join(steps_plays)
-    final_solution_txt = "Solución: " + " , ".join(solution)
+
+def _title_code(latex_problem: str) -> str:
+    return f"""title = Text({_py_str(_title_text(latex_problem))}, font_size=36)
+        self.play(Write(title))
+        self.wait(0.5)
+        self.play(FadeOut(title))"""
+
+
+def _final_code(solution: List[str]) -> str:
+    return f"""final_txt = Text({_py_str(_final_text(solution))}, font_size=36)
+        self.play(Write(final_txt))
+        self.wait(2)"""
+
+
+def generate_manim_code(
+    latex_problem: str,
+    steps: List[Dict],
+    solution: List[str],
+    style: str = "clean",
+    locale: str = "es"
+) -> str:
+    """
+    Versión sin LaTeX: usa Text en vez de Tex.
+    Esto evita tener instalado LaTeX en Windows.
+
+    Solo exportación (debug/descarga): el render usa build_scene_spec.
+    """
+
+    steps_defs_code = "\n".join(_step_defs(step) for step in steps)
+    steps_play_code = "\n".join(_step_plays(step) for step in steps)
 
     code = f"""
 from manim import *
 
 class SolutionScene(Scene):
     def construct(self):
-        title = Text("Problema: {latex_problem}", font_size=36)
-        self.play(Write(title))
-        self.wait(0.5)
-        self.play(FadeOut(title))
+        {_title_code(latex_problem)}
 
         {steps_defs_code}
 
         {steps_play_code}
 
-        final_txt = Text("{final_solution_txt}", font_size=36)
-        self.play(Write(final_txt))
-        self.wait(2)
+        {_final_code(solution)}
 """
     return code
+
+
+def _spec_json(spec: Dict) -> str:
+    # canónico: mismo contenido -> mismos bytes -> misma clave de caché
+    return json.dumps(spec, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def _spec_step(step: Dict) -> Dict:
+    step_txt, rule_txt, narr_txt = _step_texts(step)
+    return {"index": step["index"], "text": step_txt, "rule": rule_txt, "narration": narr_txt}
+
+
+def build_scene_spec(
+    latex_problem: str,
+    steps: List[Dict],
+    solution: List[str],
+    style: str = "clean",
+    locale: str = "es"
+) -> str:
+    """
+    Spec JSON de la escena completa: título, pasos (texto, regla,
+    narración), solución final, estilo y locale. Los textos ya vienen
+    armados; SpecScene solo los dibuja.
+    """
+    return _spec_json({
+        "v": SPEC_VERSION,
+        "style": style,
+        "locale": locale,
+        "title": _title_text(latex_problem),
+        "steps": [_spec_step(step) for step in steps],
+        "final": _final_text(solution),
+    })
+
+
+def generate_segments(
+    latex_problem: str,
+    steps: List[Dict],
+    solution: List[str],
+    style: str = "clean",
+    locale: str = "es"
+) -> List[Dict]:
+    """
+    La misma escena que build_scene_spec, cortada en segmentos
+    independientes: título, un segmento por paso y solución final.
+
+    Cada segmento arranca y termina con la pantalla vacía (los pasos hacen
+    FadeOut), así que concatenar los clips da el mismo video. El spec de
+    cada segmento es su clave de caché: dos ejercicios que comparten un
+    paso idéntico lo renderizan una sola vez.
+    """
+    base = {"v": SPEC_VERSION, "style": style, "locale": locale}
+    segments = [{"name": "title", "spec": _spec_json({**base, "title": _title_text(latex_problem)})}]
+    for step in steps:
+        segments.append({
+            "name": f"step_{step['index']}",
+            "spec": _spec_json({**base, "steps": [_spec_step(step)]}),
+        })
+    segments.append({"name": "final", "spec": _spec_json({**base, "final": _final_text(solution)})})
+    return segments
+
+
+def spec_animations(scene_spec: str) -> int:
+    """
+    Cuántas animaciones va a reproducir SpecScene con este spec (el "n"
+    de "animación i de n" en el progreso).
+    """
+    spec = json.loads(scene_spec)
+    return (
+        (TITLE_ANIMATIONS if "title" in spec else 0)
+        + STEP_ANIMATIONS * len(spec.get("steps", []))
+        + (FINAL_ANIMATIONS if "final" in spec else 0)
+    )
@@ -0,0 +1,178 @@
+# app/services/metrics.py
+"""
+Instrumentación mínima, sin dependencias, en formato de texto Prometheus.
+
+- timed("etapa"): histograma de latencia por etapa del pipeline
+- inc("nombre"): contadores (renders fallidos, jobs terminados...)
+- register_collector(): valores que se leen solo al hacer scrape
+  (hits de caché, profundidad de la cola), sin costo en el request
+
+Con METRICS_ENABLED=0, timed() devuelve un context manager vacío
+compartido e inc() retorna de inmediato: el costo es casi cero.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+
+
+PREFIX = "videogen"
+
+# segundos: desde un parseo (ms) hasta un render de Manim (minutos)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+enabled = settings.metrics_enabled
+
+_NOOP = nullcontext()
+_lock = threading.Lock()
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.buckets, value)
+        with _lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+
+_stages: Dict[str, Histogram] = {}
+_counters: Dict[Tuple[str, Tuple], float] = {}
+_collectors: List[Tuple[str, str, str, Callable[[], float]]] = []
+# en procesos worker: las observaciones se juntan acá y viajan con el resultado
+_sink: Optional[List[Tuple[str, float]]] = None
+
+
+def record_to(sink: Optional[List[Tuple[str, float]]]) -> None:
+    """
+    Redirige observe() a una lista (p.ej. dentro de un worker del solver).
+    """
+    global _sink
+    _sink = sink
+
+
+def observe(stage: str, seconds: float) -> None:
+    if _sink is not None:
+        _sink.append((stage, seconds))
+        return
+    hist = _stages.get(stage)
+    if hist is None:
+        with _lock:
+            hist = _stages.setdefault(stage, Histogram())
+    hist.observe(seconds)
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+def timed(stage: str):
+    """
+    with timed("solve"): ...  -> registra la duración en el histograma.
+    """
+    if not enabled:
+        return _NOOP
+    return _Timer(stage)
+
+
+def inc(name: str, amount: float = 1, **labels) -> None:
+    if not enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def register_collector(name: str, kind: str, help_text: str, fn: Callable[[], float]) -> None:
+    """
+    Registra un valor que se evalúa recién al pedir /metrics.
+    kind: "counter" | "gauge"
+    """
+    _collectors.append((name, kind, help_text, fn))
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in pairs)
+    return "{" + inner + "}"
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render_prometheus() -> str:
+    """
+    Exposición en text format 0.0.4 de Prometheus.
+    """
+    lines = []
+
+    with _lock:
+        stages = {name: (list(h.counts), h.sum, h.count) for name, h in _stages.items()}
+        counters = dict(_counters)
+
+    name = f"{PREFIX}_stage_seconds"
+    lines.append(f"# HELP {name} Latencia por etapa del pipeline de /solve.")
+    lines.append(f"# TYPE {name} histogram")
+    for stage in sorted(stages):
+        counts, total, count = stages[stage]
+        cumulative = 0
+        for le, c in zip(BUCKETS + (float("inf"),), counts):
+            cumulative += c
+            le_txt = "+Inf" if le == float("inf") else _fmt(le)
+            lines.append(f'{name}_bucket{{stage="{stage}",le="{le_txt}"}} {cumulative}')
+        lines.append(f'{name}_sum{{stage="{stage}"}} {repr(total)}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+    seen = set()
+    for (cname, labels), value in sorted(counters.items()):
+        full = f"{PREFIX}_{cname}"
+        if full not in seen:
+            seen.add(full)
+            lines.append(f"# TYPE {full} counter")
+        lines.append(f"{full}{_labels(labels)} {_fmt(value)}")
+
+    for cname, kind, help_text, fn in _collectors:
+        full = f"{PREFIX}_{cname}"
+        try:
+            value = fn()
+        except Exception:
+            continue
+        lines.append(f"# HELP {full} {help_text}")
+        lines.append(f"# TYPE {full} {kind}")
+        lines.append(f"{full} {_fmt(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def reset(enable: Optional[bool] = None) -> None:
+    """
+    Limpia histogramas y contadores (tests / benchmarks).
+    """
+    global enabled
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+    if enable is not None:
+        enabled = enable
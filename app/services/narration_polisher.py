@@ -1,12 +1,273 @@
 # app/services/narration_polisher.py
-from typing import List, Dict
+"""
+Pulido de la narración de cada paso (reescritura en tono educativo).
 
-def polish_steps(steps: List[Dict], locale: str = "es") -> List[Dict]:
+- El backend es enchufable (POLISHER_BACKEND):
+  * "stub": devuelve la narración igual (el MVP y los tests).
+  * "http": POST a POLISHER_URL con lotes de pasos, temperature=0.
+    Cuerpo {"model", "temperature", "items": [{"narration", "rule", "locale"}]}
+    y respuesta {"narrations": [...]} en el mismo orden.
+- Todos los pasos de un job van juntos: lotes de POLISHER_BATCH_SIZE,
+  en paralelo (asyncio), nunca una llamada bloqueante por paso.
+- Caché por (narración, regla, locale, modelo): memoria LRU + disco
+  opcional (POLISHER_CACHE_DIR), así el mismo paso no se vuelve a pedir.
+- Presupuesto de latencia por job (POLISHER_BUDGET_S): lo que no llegó a
+  tiempo (o falló) queda con la narración original; el job nunca espera
+  más que eso ni falla por el pulido.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import traceback
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..config import settings
+from . import metrics
+
+
+class PolisherBackend(ABC):
+    """
+    Interfaz: recibe un lote de pasos y devuelve las narraciones pulidas
+    en el mismo orden. `model` entra en la clave de la caché.
+
+    session() da el objeto que usa un job (dentro de su event loop); los
+    backends sin estado se devuelven a sí mismos.
+    """
+
+    model = "none"
+    batch_size = 16
+
+    def session(self) -> "PolisherBackend":
+        return self
+
+    @abstractmethod
+    async def polish_batch(self, items: List[Dict]) -> List[str]:
+        ...
+
+    async def aclose(self) -> None:
+        pass
+
+
+class StubBackend(PolisherBackend):
+    model = "stub"
+
+    async def polish_batch(self, items: List[Dict]) -> List[str]:
+        return [item["narration"] for item in items]
+
+
+class HttpBackend(PolisherBackend):
+    def __init__(self, url: str, model: str, batch_size: int = 16, api_key: str = "", timeout_s: float = 10.0):
+        self.url = url
+        self.model = model
+        self.batch_size = batch_size
+        self.api_key = api_key
+        self.timeout_s = timeout_s
+
+    def session(self) -> "_HttpSession":
+        return _HttpSession(self)
+
+    async def polish_batch(self, items: List[Dict]) -> List[str]:
+        # fuera de un job (un lote suelto): sesión de un solo uso
+        session = self.session()
+        try:
+            return await session.polish_batch(items)
+        finally:
+            await session.aclose()
+
+
+class _HttpSession(PolisherBackend):
+    """
+    Un cliente HTTP por job: las conexiones se reusan entre sus lotes y
+    no se comparten entre event loops de hilos distintos.
+    """
+
+    def __init__(self, backend: HttpBackend):
+        import httpx
+
+        self.model = backend.model
+        self.batch_size = backend.batch_size
+        self.url = backend.url
+        headers = {"authorization": f"Bearer {backend.api_key}"} if backend.api_key else {}
+        self._client = httpx.AsyncClient(timeout=backend.timeout_s, headers=headers)
+
+    async def polish_batch(self, items: List[Dict]) -> List[str]:
+        response = await self._client.post(
+            self.url, json={"model": self.model, "temperature": 0, "items": items}
+        )
+        response.raise_for_status()
+        narrations = response.json()["narrations"]
+        if len(narrations) != len(items) or not all(isinstance(n, str) for n in narrations):
+            raise ValueError("respuesta del polisher con otra cantidad de narraciones")
+        return narrations
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class PolishCache:
+    def __init__(self, max_entries: int, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(narration: str, rule: str, locale: str, model: str) -> str:
+        raw = json.dumps([narration, rule, locale, model], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return text
+
+        if self.disk_dir is not None:
+            try:
+                text = json.loads(self._disk_path(key).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                text = None
+            if isinstance(text, str):
+                with self._lock:
+                    self.hits += 1
+                    self._remember(key, text)
+                return text
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, text: str) -> None:
+        with self._lock:
+            self._remember(key, text)
+
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp.write_text(json.dumps(text, ensure_ascii=False), encoding="utf-8")
+                os.replace(tmp, path)
+            except OSError:
+                pass  # best-effort: la memoria ya lo tiene
+
+    def _remember(self, key: str, text: str) -> None:
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+def make_backend() -> PolisherBackend:
+    if settings.polisher_backend == "http":
+        return HttpBackend(
+            url=settings.polisher_url,
+            model=settings.polisher_model,
+            batch_size=settings.polisher_batch_size,
+            api_key=settings.polisher_api_key,
+            timeout_s=settings.polisher_budget_s,
+        )
+    return StubBackend()
+
+
+async def _polish_within_budget(
+    backend: PolisherBackend, items: List[Dict], budget_s: float
+) -> List[Optional[str]]:
+    """
+    Manda los lotes en paralelo y junta lo que llegó antes del presupuesto
+    (None donde no hubo respuesta).
+    """
+    session = backend.session()
+    size = max(1, session.batch_size)
+    batches = [(start, items[start:start + size]) for start in range(0, len(items), size)]
+    tasks = {asyncio.ensure_future(session.polish_batch(batch)): start for start, batch in batches}
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=budget_s)
+        for task in pending:
+            task.cancel()
+        if pending:
+            metrics.inc("polish_batches_total", amount=len(pending), result="timeout")
+            await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        await session.aclose()
+
+    polished: List[Optional[str]] = [None] * len(items)
+    for task in done:
+        error = task.exception()
+        if error is not None:
+            traceback.print_exception(type(error), error, error.__traceback__)
+            metrics.inc("polish_batches_total", result="error")
+            continue
+        metrics.inc("polish_batches_total", result="ok")
+        start = tasks[task]
+        for offset, text in enumerate(task.result()):
+            polished[start + offset] = text
+    return polished
+
+
+def polish_steps(
+    steps: List[Dict],
+    locale: str = "es",
+    backend: Optional[PolisherBackend] = None,
+    cache: Optional[PolishCache] = None,
+    budget_s: Optional[float] = None,
+) -> List[Dict]:
     """
-    FUTURO:
-    - llamar a LLM con temperature=0
-    - reescribir narration en tono educativo
-    MVP:
-    - devolver igual
+    Devuelve copias de los pasos con la narración pulida. Lo que está en
+    la caché no se pide; lo que no llega dentro del presupuesto queda igual.
     """
-    return steps
+    backend = backend or polisher_backend
+    if isinstance(backend, StubBackend):
+        # la narración queda igual: ni caché ni event loop
+        return [dict(step) for step in steps]
+    cache = cache or polish_cache
+    budget_s = settings.polisher_budget_s if budget_s is None else budget_s
+
+    keys = [PolishCache.key(s["narration"], s.get("rule", ""), locale, backend.model) for s in steps]
+    narrations = [cache.get(k) for k in keys]
+    missing = [i for i, text in enumerate(narrations) if text is None]
+
+    if missing:
+        items = [
+            {"narration": steps[i]["narration"], "rule": steps[i].get("rule", ""), "locale": locale}
+            for i in missing
+        ]
+        try:
+            polished = asyncio.run(_polish_within_budget(backend, items, budget_s))
+        except Exception:
+            traceback.print_exc()
+            polished = [None] * len(items)
+        for i, text in zip(missing, polished):
+            if text is None:
+                metrics.inc("polish_steps_total", result="fallback")
+                continue
+            cache.put(keys[i], text)
+            narrations[i] = text
+            metrics.inc("polish_steps_total", result="polished")
+
+    return [
+        {**step, "narration": text} if text is not None else dict(step)
+        for step, text in zip(steps, narrations)
+    ]
+
+
+polisher_backend = make_backend()
+polish_cache = PolishCache(
+    max_entries=settings.polisher_cache_size,
+    disk_dir=settings.polisher_cache_dir or None,
+)
+
+metrics.register_collector("polish_cache_hits_total", "counter", "Narraciones pulidas servidas desde la caché.", lambda: polish_cache.hits)
+metrics.register_collector("polish_cache_misses_total", "counter", "Narraciones que hubo que pedirle al polisher.", lambda: polish_cache.misses)
@@ -0,0 +1,127 @@
+# app/services/pipeline.py
+"""
+Etapas del pipeline de /solve que comparten el job individual y el batch,
+para que ambos caminos generen exactamente la misma salida.
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..models import SolveRequest
+from . import metrics
+from .step_builder import build_steps
+from .narration_polisher import polish_steps
+from .manim_generator import SPEC_SCENE, build_scene_spec, generate_manim_code, generate_segments
+from .video_renderer import render_video
+from .render_cache import render_cache, render_key
+from .render_upgrades import upgrade_scheduler
+from .progress import progress_bus
+from ..storage.save_artifacts import save_artifacts
+from ..storage.artifact_store import artifact_store
+
+
+def prepare_scene(payload: SolveRequest, solver_output: Dict) -> Tuple[List[Dict], str, str, List[Dict]]:
+    """
+    Pasos (ya pulidos) + spec de la escena + código Manim (exportación) +
+    segmentos a partir de la salida del solver.
+    """
+    with metrics.timed("build_steps"):
+        steps_raw = build_steps(solver_output, locale=payload.locale)
+    with metrics.timed("polish_steps"):
+        steps_polished = polish_steps(steps_raw, locale=payload.locale)
+
+    with metrics.timed("generate_manim_code"):
+        scene_spec = build_scene_spec(
+            latex_problem=solver_output["latex_clean"],
+            steps=steps_polished,
+            solution=solver_output["solution"],
+            style=payload.style,
+            locale=payload.locale
+        )
+        manim_code = generate_manim_code(
+            latex_problem=solver_output["latex_clean"],
+            steps=steps_polished,
+            solution=solver_output["solution"],
+            style=payload.style,
+            locale=payload.locale
+        )
+        segments = generate_segments(
+            latex_problem=solver_output["latex_clean"],
+            steps=steps_polished,
+            solution=solver_output["solution"],
+            style=payload.style,
+            locale=payload.locale
+        )
+    return steps_polished, scene_spec, manim_code, segments
+
+
+def render_job(
+    job_id: str,
+    solver_output: Dict,
+    steps: List[Dict],
+    scene_spec: str,
+    manim_code: str,
+    segments: Optional[List[Dict]] = None,
+    problem_text: Optional[str] = None,
+) -> Dict:
+    """
+    Renderiza, guarda artefactos y arma el resultado que expone la API.
+    `problem_text` es la entrada original (va al catálogo junto a latex_clean).
+
+    Render progresivo: se publica el preview y la versión en
+    UPGRADE_QUALITY queda encolada para cuando haya capacidad libre. Si
+    esa versión ya está en la caché de renders, se usa directamente.
+    """
+    quality, upgrade = settings.preview_quality, settings.upgrade_quality
+    if upgrade == quality:
+        upgrade = ""
+    if upgrade and render_cache.contains(render_key(scene_spec, SPEC_SCENE, upgrade)):
+        quality, upgrade = upgrade, ""
+
+    def on_progress(event: Dict) -> None:
+        progress_bus.publish(job_id, {"type": "progress", **event})
+
+    t0 = time.perf_counter()
+    video_path, _ = render_video(
+        scene_spec, quality=quality, job_id=job_id, segments=segments, on_progress=on_progress
+    )
+    render_s = time.perf_counter() - t0
+    rendered = video_path.endswith(".mp4")
+    video_tier = None
+    if rendered:
+        video_tier = "preview" if upgrade else "full"
+
+    # de un job exitoso solo quedan el video, el código y (enseguida) la metadata
+    with metrics.timed("compact"):
+        artifact_store.compact(job_id)
+
+    with metrics.timed("save_artifacts"):
+        save_artifacts(
+            job_id=job_id,
+            latex=solver_output["latex_clean"],
+            solution=solver_output["solution"],
+            steps=steps,
+            manim_code=manim_code,
+            scene_spec=scene_spec,
+            problem_type=solver_output["problem_type"],
+            validated=solver_output["validated"],
+            render_s=render_s,
+            video_quality=quality if rendered else None,
+            video_tier=video_tier,
+            problem_text=problem_text,
+        )
+
+    if video_tier == "preview":
+        upgrade_scheduler.schedule(job_id, scene_spec, segments, upgrade)
+
+    return {
+        "latex": solver_output["latex_clean"],
+        "solution": solver_output["solution"],
+        "validated": solver_output["validated"],
+        "steps": steps,
+        # URL servible (GET /videos/{job_id}); si el render falló, la ruta del aviso
+        "video_url": f"/videos/{job_id}" if rendered else video_path,
+        "video_quality": quality if rendered else None,
+        "video_tier": video_tier,
+        "manim_code": manim_code,
+    }
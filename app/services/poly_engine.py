@@ -0,0 +1,79 @@
+# app/services/poly_engine.py
+"""
+Camino rápido para ecuaciones polinómicas en una variable.
+
+En vez de solve() + simplify() por solución + as_poly() + simplify() +
+factor() (cuatro o cinco pasadas de SymPy sobre la misma expresión),
+construimos un Poly una sola vez y de ahí sacamos todo:
+
+- grado -> problem_type
+- raíces exactas en forma cerrada (hasta grado 4) con multiplicidad
+- forma factorizada (factor_list del mismo Poly)
+- validación con check_solutions (numérico primero), como el camino
+  genérico: comprobar raíces con radicales anidados con simplify costaba
+  segundos (x^3 + x + 1 = 0) y más que todo lo demás junto
+
+Si la ecuación no es un polinomio con coeficientes racionales en una sola
+variable, analyze_polynomial() devuelve None y se usa el camino genérico.
+"""
+from typing import Dict, List, Optional
+
+from sympy import Eq, Mul, Poly, Symbol, roots
+from sympy.core.mul import _keep_coeff
+from sympy.core.sorting import default_sort_key
+from sympy.polys.domains import QQ, ZZ
+from sympy.polys.polyerrors import PolynomialError
+
+from .solution_check import check_solutions
+
+# más allá de grado 4 no hay fórmula cerrada general: que decida solve()
+MAX_CLOSED_FORM_DEGREE = 4
+
+PROBLEM_TYPES = {1: "linear", 2: "quadratic", 3: "cubic"}
+
+
+def analyze_polynomial(eq: Eq, vars_candidates: List[str]) -> Optional[Dict]:
+    """
+    Devuelve el mismo dict que sympy_solver._solve_core, o None si la
+    ecuación no entra en el camino rápido.
+    """
+    if len(vars_candidates) != 1:
+        return None
+
+    var = Symbol(vars_candidates[0])
+    try:
+        poly = Poly(eq.lhs - eq.rhs, var)
+    except PolynomialError:
+        return None
+
+    # coeficientes flotantes o simbólicos: mejor el camino genérico
+    if poly.domain not in (ZZ, QQ):
+        return None
+
+    degree = poly.degree()
+    if degree < 1 or degree > MAX_CLOSED_FORM_DEGREE:
+        return None
+
+    root_mults = roots(poly, cubics=True, quartics=True)
+    if sum(root_mults.values()) != degree:
+        # roots() no encontró todas las raíces en forma cerrada
+        return None
+
+    # mismo orden que devuelve solve()
+    ordered_roots = sorted(root_mults, key=default_sort_key)
+
+    coeff, factors = poly.factor_list()
+    factored = _keep_coeff(coeff, Mul(*[f.as_expr() ** m for f, m in factors]))
+
+    solutions = [Eq(var, r) for r in ordered_roots]
+    validated, validation_method = check_solutions(eq, solutions)
+
+    return {
+        "solutions": solutions,
+        "validated": validated,
+        "validation_method": validation_method,
+        "problem_type": PROBLEM_TYPES.get(degree, "generic"),
+        "simplified": poly.as_expr(),
+        "factored": factored,
+        "multiplicities": [root_mults[r] for r in ordered_roots],
+    }
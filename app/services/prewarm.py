@@ -0,0 +1,46 @@
+# app/services/prewarm.py
+"""
+Pre-calentamiento opcional al arrancar la API (PREWARM=1).
+
+Los imports pesados (SymPy, NumPy) son diferidos: la app contesta /health enseguida. Para que el primer
+/solve real tampoco los pague, prewarm() hace en segundo plano un parseo
+y un solve representativos (texto y LaTeX), lo que además levanta un
+worker del sandbox del solver. El runtime de ANTLR no se calienta: solo
+lo usa el LaTeX que el parser rápido no cubre (latex_parse_fallback).
+"""
+import threading
+import traceback
+from typing import Optional
+
+from . import metrics
+
+# una ecuación por camino: texto plano (poly rápido) y LaTeX (parser rápido + solve)
+SAMPLES = [
+    ("x^2 - 5x + 6 = 0", "text"),
+    (r"\frac{1}{x} + 2 = 6", "latex"),
+]
+
+_thread: Optional[threading.Thread] = None
+
+
+def prewarm() -> None:
+    from .sympy_solver import solve_problem
+
+    with metrics.timed("prewarm"):
+        for problem_text, input_format in SAMPLES:
+            try:
+                solve_problem(problem_text, input_format)
+            except Exception:
+                # calentar es best-effort: nunca tumba el arranque
+                traceback.print_exc()
+
+
+def start() -> threading.Thread:
+    """
+    Lanza prewarm() en un hilo daemon (no bloquea el arranque de la app).
+    """
+    global _thread
+    if _thread is None or not _thread.is_alive():
+        _thread = threading.Thread(target=prewarm, name="prewarm", daemon=True)
+        _thread.start()
+    return _thread
@@ -0,0 +1,169 @@
+# app/services/progress.py
+"""
+Progreso en vivo de los jobs (para GET /jobs/{job_id}/events, SSE).
+
+- ProgressBus: publish(job_id, evento) desde cualquier hilo; cada
+  suscriptor tiene su propia cola (queue.Queue, o asyncio.Queue con
+  subscribe_async para el endpoint, así un stream abierto no ocupa un
+  hilo). Se guarda el último evento de cada job para quien se suscribe
+  tarde (acotado: los jobs viejos se olvidan).
+- ManimOutputParser: consume la salida de Manim a medida que llega
+  (las barras de tqdm se reescriben con \\r) y la convierte en eventos
+  {"animation": i, "frames": k, "frames_total": n}.
+
+Eventos:
+  {"type": "status", "status": "queued" | "running" | "done" | "failed", ...}
+  {"type": "progress", "animation": 3, "animations": 13, "frames": 27,
+   "frames_total": 60, "segment": "step_1", "segment_index": 2, "segments": 5}
+  {"type": "progress", "coalesced": true}  (otro job ya renderiza este mismo video)
+"""
+import asyncio
+import queue
+import re
+import threading
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from . import metrics
+
+# status con los que el stream termina
+TERMINAL_STATUSES = {"done", "failed"}
+
+# cuántos jobs recuerdan su último evento
+MAX_JOBS = 10_000
+
+# eventos pendientes por suscriptor (un cliente lento pierde los más viejos)
+SUBSCRIBER_BACKLOG = 1000
+
+
+def is_terminal(event: Dict) -> bool:
+    return event.get("type") == "status" and event.get("status") in TERMINAL_STATUSES
+
+
+class ProgressBus:
+    def __init__(self, max_jobs: int = MAX_JOBS):
+        self.max_jobs = max_jobs
+        # por job: (cola, cómo entregarle un evento desde cualquier hilo)
+        self._subs: Dict[str, List[Tuple[object, Callable[[Dict], None]]]] = {}
+        self._last: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def publish(self, job_id: str, event: Dict) -> None:
+        with self._lock:
+            self._last[job_id] = event
+            self._last.move_to_end(job_id)
+            while len(self._last) > self.max_jobs:
+                self._last.popitem(last=False)
+            subs = list(self._subs.get(job_id, ()))
+        for _, deliver in subs:
+            deliver(event)
+
+    def subscribe(self, job_id: str) -> "queue.Queue[Dict]":
+        """
+        Cola con los eventos que vengan; arranca con el último conocido.
+        """
+        q: "queue.Queue[Dict]" = queue.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        self._add(job_id, q, partial(_put_dropping_oldest, q))
+        return q
+
+    def subscribe_async(self, job_id: str) -> "asyncio.Queue[Dict]":
+        """
+        Igual que subscribe() pero para esperar con await en el event loop actual.
+        """
+        loop = asyncio.get_running_loop()
+        q: "asyncio.Queue[Dict]" = asyncio.Queue(maxsize=SUBSCRIBER_BACKLOG)
+
+        def deliver(event: Dict) -> None:
+            try:
+                loop.call_soon_threadsafe(_put_dropping_oldest, q, event)
+            except RuntimeError:
+                pass  # el loop ya cerró
+
+        self._add(job_id, q, deliver)
+        return q
+
+    def _add(self, job_id: str, q, deliver: Callable[[Dict], None]) -> None:
+        with self._lock:
+            self._subs.setdefault(job_id, []).append((q, deliver))
+            last = self._last.get(job_id)
+        if last is not None:
+            _put_dropping_oldest(q, last)
+
+    def unsubscribe(self, job_id: str, q) -> None:
+        with self._lock:
+            subs = self._subs.get(job_id)
+            if subs is None:
+                return
+            subs[:] = [s for s in subs if s[0] is not q]
+            if not subs:
+                del self._subs[job_id]
+
+    def last(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._last.get(job_id)
+
+    def subscribers(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subs.values())
+
+
+def _put_dropping_oldest(q, event: Dict) -> None:
+    # sirve para queue.Queue y asyncio.Queue (esta, siempre desde su loop)
+    while True:
+        try:
+            q.put_nowait(event)
+            return
+        except (queue.Full, asyncio.QueueFull):
+            try:
+                q.get_nowait()
+            except (queue.Empty, asyncio.QueueEmpty):
+                pass
+
+
+# "Animation 3: Write(Text('...')):  45%|####5     | 27/60 [00:01<00:01, 25.1it/s]"
+# (el texto de la animación puede traer "3/4": vale el último "| n/m [")
+_TQDM_RE = re.compile(r"Animation (\d+)\b.*\|\s*(\d+)/(\d+)\s*\[")
+_LINE_SPLIT_RE = re.compile(r"[\r\n]")
+
+
+class ManimOutputParser:
+    """
+    Se le da la salida de Manim en pedazos; devuelve los eventos nuevos.
+    Solo guarda la última línea incompleta, nunca el log entero.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._last = None
+
+    def feed(self, text: str) -> Iterator[Dict]:
+        lines = _LINE_SPLIT_RE.split(self._pending + text)
+        self._pending = lines.pop()
+        for line in lines:
+            event = self._parse(line)
+            if event is not None:
+                yield event
+
+    def close(self) -> Iterator[Dict]:
+        pending, self._pending = self._pending, ""
+        event = self._parse(pending)
+        if event is not None:
+            yield event
+
+    def _parse(self, line: str) -> Optional[Dict]:
+        m = _TQDM_RE.search(line)
+        if m is None:
+            return None
+        event = {"animation": int(m.group(1)) + 1, "frames": int(m.group(2)), "frames_total": int(m.group(3))}
+        if event == self._last:
+            return None
+        self._last = event
+        return event
+
+
+progress_bus = ProgressBus()
+
+metrics.register_collector(
+    "progress_subscribers", "gauge", "Streams de progreso abiertos.", progress_bus.subscribers
+)
@@ -0,0 +1,167 @@
+# app/services/render_cache.py
+"""
+Caché de renders direccionada por contenido.
+
+La clave es un hash de (spec de la escena, scene_name, quality, versión de
+manim): si el spec es idéntico byte a byte, el video también lo es, así
+que no hace falta volver a lanzar Manim.
+
+- Los videos viven en <root>/<2 primeros chars>/<clave>.mp4
+- Un hit devuelve el archivo por hardlink (o por referencia si no se puede).
+- Eviction LRU acotada por bytes (el mtime guarda el orden entre reinicios).
+"""
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..config import settings
+from . import metrics
+
+
+@lru_cache(maxsize=1)
+def manim_version() -> str:
+    try:
+        return metadata.version("manim")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def render_key(source: str, scene_name: str, quality: str) -> str:
+    """
+    Clave estable del render: cambia si cambia el spec (o código), la
+    escena, la calidad o la versión de Manim instalada.
+    """
+    h = hashlib.sha256()
+    for part in (manim_version(), scene_name, quality, source):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def link_or_copy(src: Path, dst: Path) -> None:
+    """
+    Hardlink si el filesystem lo permite; si no, copia.
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class RenderCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # clave -> bytes
+        self._total_bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.mp4"
+
+    def _load(self) -> None:
+        """
+        Reconstruye el índice LRU desde disco (una sola vez, perezosamente).
+        """
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.root.exists():
+            return
+        files = [p for p in self.root.glob("*/*.mp4") if p.is_file()]
+        files.sort(key=lambda p: p.stat().st_mtime)
+        for p in files:
+            size = p.stat().st_size
+            self._entries[p.stem] = size
+            self._total_bytes += size
+
+    def get(self, key: str) -> Optional[Path]:
+        """
+        Devuelve la ruta del video cacheado o None. Cuenta hit/miss.
+        """
+        with self._lock:
+            self._load()
+            path = self._path(key)
+            if key in self._entries and path.exists():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                try:
+                    os.utime(path)  # mantiene el orden LRU si reiniciamos
+                except OSError:
+                    pass
+                return path
+
+            if key in self._entries:
+                # alguien borró el archivo por fuera
+                self._total_bytes -= self._entries.pop(key)
+            self.misses += 1
+            return None
+
+    def contains(self, key: str) -> bool:
+        """
+        Si la clave está en caché, sin contar hit/miss ni tocar el LRU.
+        """
+        with self._lock:
+            self._load()
+            return key in self._entries and self._path(key).exists()
+
+    def put(self, key: str, video_path: Path) -> Path:
+        """
+        Guarda un video recién renderizado bajo su clave y aplica eviction.
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        link_or_copy(video_path, tmp)
+        os.replace(tmp, path)  # atómico: nadie ve un mp4 a medias
+
+        with self._lock:
+            self._load()
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+            size = path.stat().st_size
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict()
+        return path
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                self._path(old_key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+            }
+
+
+render_cache = RenderCache(
+    root=settings.render_cache_dir,
+    max_bytes=settings.render_cache_max_mb * 1024 * 1024,
+)
+
+metrics.register_collector("render_cache_hits_total", "counter", "Renders servidos desde la caché.", lambda: render_cache.hits)
+metrics.register_collector("render_cache_misses_total", "counter", "Renders que tuvieron que lanzar Manim.", lambda: render_cache.misses)
+metrics.register_collector("render_cache_evictions_total", "counter", "Videos expulsados de la caché por tamaño.", lambda: render_cache.evictions)
+metrics.register_collector("render_cache_bytes", "gauge", "Bytes ocupados por la caché de renders.", lambda: render_cache.stats()["bytes"])
@@ -0,0 +1,124 @@
+# app/services/render_upgrades.py
+"""
+Render progresivo: mejora de calidad en segundo plano.
+
+El job se publica con el preview (PREVIEW_QUALITY, rápido) y acá se
+encola la versión en UPGRADE_QUALITY. Un único hilo la renderiza solo
+cuando no hay jobs esperando ni renders de jobs en curso, así la
+capacidad de render va primero a lo que el usuario todavía no vio.
+
+- Se renderiza en <job>/upgrade_<calidad>/ y el video se reemplaza con
+  os.replace (atómico: quien está descargando sigue con el archivo viejo;
+  el ETag de GET /videos cambia solo).
+- Después se actualiza el job (video_tier="full") y su metadata.
+- Si la mejora falla o el job ya no existe, queda el preview.
+"""
+import os
+import queue
+import shutil
+import threading
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+from . import metrics
+from . import video_renderer
+from ..storage.artifact_store import job_dir
+
+# cada cuánto se re-chequea si hay capacidad libre
+IDLE_POLL_S = 0.5
+
+
+class UpgradeScheduler:
+    def __init__(self, idle_poll_s: float = IDLE_POLL_S):
+        self.idle_poll_s = idle_poll_s
+        self.upgraded = 0
+        self.failed = 0
+        self._queue: "queue.Queue[Tuple[str, str, Optional[List[Dict]], str]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def schedule(self, job_id: str, scene_spec: str, segments: Optional[List[Dict]], quality: str) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._loop, name="render-upgrade", daemon=True)
+                self._thread.start()
+        self._queue.put((job_id, scene_spec, segments, quality))
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _idle(self) -> bool:
+        from .job_queue import queue_depth
+
+        return video_renderer.active_renders() == 0 and queue_depth() == 0
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                task = self._queue.get(timeout=self.idle_poll_s)
+            except queue.Empty:
+                continue
+            while not self._idle():
+                if self._stop.wait(self.idle_poll_s):
+                    return
+            try:
+                self._upgrade(*task)
+            except Exception:
+                traceback.print_exc()
+                self.failed += 1
+
+    def _upgrade(self, job_id: str, scene_spec: str, segments: Optional[List[Dict]], quality: str) -> None:
+        final = job_dir(job_id) / "video.mp4"
+        if not final.exists():
+            return  # el job ya no está (eviction) o no tuvo preview
+        work = job_dir(job_id) / f"upgrade_{quality}"
+        try:
+            with metrics.timed("render_upgrade"):
+                video_path, _ = video_renderer.render_video(
+                    scene_spec, quality=quality, job_id=job_id,
+                    segments=segments, out_dir=work, background=True,
+                )
+            if not video_path.endswith(".mp4"):
+                self.failed += 1
+                metrics.inc("render_upgrades_total", status="failed")
+                return
+
+            os.replace(video_path, final)
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+        self.upgraded += 1
+        metrics.inc("render_upgrades_total", status="done")
+        _publish(job_id, quality)
+
+    def shutdown(self) -> None:
+        """
+        Corta el hilo; las mejoras pendientes se descartan (quedan los previews).
+        """
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+
+def _publish(job_id: str, quality: str) -> None:
+    from .job_queue import update_result
+    from ..storage.save_artifacts import update_metadata
+
+    update_result(job_id, video_tier="full", video_quality=quality)
+    update_metadata(job_id, video_tier="full", video_quality=quality)
+
+
+upgrade_scheduler = UpgradeScheduler()
+
+metrics.register_collector(
+    "render_upgrades_pending", "gauge", "Mejoras de calidad esperando capacidad libre.", upgrade_scheduler.pending
+)
@@ -0,0 +1,294 @@
+# app/services/render_workers.py
+"""
+Workers de render "calientes": procesos de larga vida que ya importaron
+manim (y con eso Cairo/Pango y las fuentes) y la escena precompilada
+SpecScene, así cada job solo paga el render en sí: ni el arranque del
+intérprete, ni el `from manim import *`, ni compilar código por job.
+
+- Cada worker recibe jobs por un Pipe local y renderiza en-proceso el
+  <carpeta>/scene.json, con media_dir dentro de la carpeta del job.
+- Se recicla solo después de N jobs o si su memoria pasa un umbral.
+- Los workers arrancan en segundo plano: start() al iniciar la app (con
+  PREWARM=1) o en el primer render, y cada reemplazo (reciclado o
+  muerto) se lanza en otro hilo. Ningún request espera el import de
+  manim de un worker nuevo salvo que no quede ninguno listo.
+- Si manim no está disponible (o el worker muere) render() devuelve None
+  y video_renderer usa el camino de siempre: un subprocess por job.
+"""
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from ..config import settings
+from . import metrics
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# -q<letra> de la CLI -> nombre de calidad de la config de manim
+QUALITY_NAMES = {
+    "l": "low_quality",
+    "m": "medium_quality",
+    "h": "high_quality",
+    "p": "production_quality",
+    "k": "fourk_quality",
+}
+
+
+def _rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    # ru_maxrss viene en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+_glyph_cache = None
+
+
+def _glyphs():
+    """
+    Caché de glifos del worker (una instancia por proceso, el disco es compartido).
+    """
+    global _glyph_cache
+    if _glyph_cache is None:
+        from .glyph_cache import GlyphCache
+
+        _glyph_cache = GlyphCache(
+            str(Path(settings.glyph_cache_dir).resolve()), settings.glyph_cache_max_mb * 1024 * 1024
+        )
+    return _glyph_cache
+
+
+def _render_in_process(base_dir: str, quality: str, on_progress: Optional[Callable[[Dict], None]] = None) -> bool:
+    """
+    Renderiza <base_dir>/scene.json con SpecScene dentro de este proceso.
+    Deja el resultado en <base_dir>/video.mp4 (y lo que usó de la caché
+    de glifos en <base_dir>/glyph_stats.json). on_progress recibe
+    {"animation": n} a medida que terminan las animaciones.
+    """
+    from manim import tempconfig
+    from .scene_runtime import SpecScene, load_spec
+
+    base_dir = Path(base_dir)
+    output_path = base_dir / "video.mp4"
+    try:
+        spec = load_spec(str(base_dir / "scene.json"))
+        with tempconfig({
+            "quality": QUALITY_NAMES.get(quality, "low_quality"),
+            "media_dir": str(base_dir / "media"),
+            "output_file": "video",
+        }):
+            scene = SpecScene(
+                spec,
+                glyphs=_glyphs(),
+                stats_path=str(base_dir / "glyph_stats.json"),
+                on_animation=(lambda n: on_progress({"animation": n})) if on_progress else None,
+            )
+            scene.render()
+            produced = Path(scene.renderer.file_writer.movie_file_path)
+
+        produced.replace(output_path)
+        return True
+    except Exception:
+        (base_dir / "manim.log").write_text(traceback.format_exc(), encoding="utf-8")
+        return False
+
+
+def _worker_main(conn, max_jobs: int, max_rss_mb: int) -> None:
+    """
+    Loop del worker: importa manim una vez y atiende jobs hasta reciclarse.
+    """
+    try:
+        import manim  # noqa: F401  (el import caliente es todo el punto)
+        from . import scene_runtime  # noqa: F401  (la escena se importa una vez)
+    except Exception as e:
+        conn.send({"ready": False, "error": f"{type(e).__name__}: {e}"})
+        return
+    conn.send({"ready": True})
+
+    jobs_done = 0
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+
+        # el progreso viaja por el mismo Pipe antes de la respuesta final
+        ok = _render_in_process(**job, on_progress=lambda event: conn.send({"progress": event}))
+        jobs_done += 1
+        recycle = jobs_done >= max_jobs or (max_rss_mb > 0 and _rss_mb() > max_rss_mb)
+        conn.send({"ok": ok, "recycle": recycle})
+        if recycle:
+            return
+
+
+class _Worker:
+    def __init__(self, ctx, max_jobs: int, max_rss_mb: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, max_jobs, max_rss_mb),
+            daemon=True,
+            name="manim-worker",
+        )
+        self.process.start()
+        child_conn.close()
+
+    def stop(self, kill: bool = False) -> None:
+        try:
+            if kill:
+                self.process.kill()
+            else:
+                self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class WarmRenderPool:
+    def __init__(self, size: int, max_jobs: int, max_rss_mb: int, timeout_s: float):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.timeout_s = timeout_s
+        self.available = size > 0
+        self.recycled = 0
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._started = False
+        self._lock = threading.Lock()
+        # spawn: el worker arranca limpio (sin heredar hilos ni estado de la API)
+        self._ctx = multiprocessing.get_context("spawn")
+
+    def _spawn(self) -> Optional[_Worker]:
+        worker = _Worker(self._ctx, self.max_jobs, self.max_rss_mb)
+        try:
+            hello = worker.conn.recv()
+        except EOFError:
+            hello = {"ready": False, "error": "el worker murió al arrancar"}
+        if not hello.get("ready"):
+            worker.stop(kill=True)
+            print(f"[render_workers] sin workers calientes: {hello.get('error')}", file=sys.stderr)
+            self.available = False
+            return None
+        return worker
+
+    def _spawn_into_pool(self) -> None:
+        if not self._started:
+            return
+        worker = self._spawn()
+        if worker is None:
+            return
+        with self._lock:
+            if self._started:
+                self._idle.put(worker)
+                return
+        worker.stop()  # el pool se cerró mientras arrancaba
+
+    def _spawn_async(self) -> None:
+        threading.Thread(target=self._spawn_into_pool, name="manim-worker-spawn", daemon=True).start()
+
+    def start(self) -> None:
+        """
+        Lanza los workers en segundo plano (no bloquea; idempotente).
+        """
+        with self._lock:
+            if self._started or not self.available:
+                return
+            self._started = True
+        for _ in range(self.size):
+            self._spawn_async()
+
+    def _acquire(self) -> Optional[_Worker]:
+        while self.available:
+            try:
+                return self._idle.get(timeout=1)
+            except queue.Empty:
+                continue
+        return None
+
+    def render(
+        self, base_dir: str, quality: str, on_progress: Optional[Callable[[Dict], None]] = None
+    ) -> Optional[bool]:
+        """
+        True/False si un worker caliente hizo el render; None si no hay
+        workers disponibles y hay que caer al subprocess.
+        on_progress recibe los eventos de progreso del worker.
+        """
+        if not self.available:
+            return None
+        self.start()
+
+        worker = self._acquire()  # acota la concurrencia al tamaño del pool
+        if worker is None:
+            return None
+
+        replace = False
+        try:
+            worker.conn.send({"base_dir": base_dir, "quality": quality})
+            deadline = time.monotonic() + self.timeout_s
+            while True:
+                if not worker.conn.poll(max(0.0, deadline - time.monotonic())):
+                    # colgado: lo matamos y damos el render por fallido
+                    worker.stop(kill=True)
+                    replace = True
+                    return False
+                reply = worker.conn.recv()
+                if "progress" not in reply:
+                    break
+                if on_progress is not None:
+                    try:
+                        on_progress(reply["progress"])
+                    except Exception:
+                        traceback.print_exc()
+            if reply["recycle"]:
+                worker.stop()
+                replace = True
+                self.recycled += 1
+            return reply["ok"]
+        except (EOFError, OSError):
+            # el worker murió a mitad del job: que lo intente el subprocess
+            worker.stop(kill=True)
+            replace = True
+            return None
+        finally:
+            if replace:
+                self._spawn_async()  # el reemplazo arranca fuera de este request
+            else:
+                self._idle.put(worker)
+
+    def stats(self) -> Dict:
+        return {
+            "available": self.available,
+            "idle": self._idle.qsize(),
+            "recycled": self.recycled,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().stop()
+                except queue.Empty:
+                    break
+            self._started = False
+
+
+warm_pool = WarmRenderPool(
+    size=settings.warm_render_workers,
+    max_jobs=settings.warm_worker_max_jobs,
+    max_rss_mb=settings.warm_worker_max_rss_mb,
+    timeout_s=settings.render_timeout_s,
+)
+
+metrics.register_collector("render_workers_recycled_total", "counter", "Workers de Manim reciclados.", lambda: warm_pool.recycled)
@@ -0,0 +1,169 @@
+# app/services/scene_runtime.py
+"""
+La única escena de Manim del servicio: interpreta los specs JSON de
+manim_generator (build_scene_spec / generate_segments).
+
+- Los workers calientes la importan una vez y hacen SpecScene(spec, ...).
+- El fallback por subprocess corre `manim <este archivo> SpecScene` con
+  la ruta del spec en la variable de entorno SCENE_SPEC (y la caché de
+  glifos en GLYPH_CACHE_DIR); por eso este módulo no importa nada del
+  resto de la app salvo glyph_cache, que tampoco depende de nada.
+
+Dibuja exactamente lo mismo que el código que exporta generate_manim_code.
+Los SVG de Text (y de Tex/MathTex) salen de la caché de glifos compartida
+cuando ya se generaron en otro job.
+"""
+import json
+import os
+from pathlib import Path
+
+from manim import DOWN, FadeOut, Scene, Text, Write, config
+
+try:
+    from .glyph_cache import GlyphCache
+except ImportError:  # cargado por ruta desde la CLI de manim (su carpeta va al sys.path)
+    from glyph_cache import GlyphCache
+
+SPEC_ENV = "SCENE_SPEC"
+GLYPH_DIR_ENV = "GLYPH_CACHE_DIR"
+GLYPH_MAX_MB_ENV = "GLYPH_CACHE_MAX_MB"
+GLYPH_STATS_ENV = "GLYPH_STATS"
+
+
+def load_spec(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _cached_text_class(glyphs: GlyphCache):
+    """
+    Text que busca su SVG en la caché compartida antes de llamar a Pango.
+    La clave es el hash que ya arma Manim (texto, fuente, tamaño, peso,
+    inclinación, color...); si la versión de Manim no lo expone, Text a secas.
+    """
+    if not (hasattr(Text, "_text2hash") and hasattr(Text, "_text2svg")):
+        return Text
+
+    class CachedText(Text):
+        def _text2svg(self, color):
+            name = self._text2hash(color)
+            dest = Path(config.get_dir("text_dir")) / f"{name}.svg"
+            key = ("text", name)
+            if dest.exists() or glyphs.fetch(key, dest):
+                return super()._text2svg(color)  # Manim encuentra el archivo y no rasteriza
+            svg = super()._text2svg(color)
+            glyphs.store(key, Path(svg))
+            return svg
+
+    return CachedText
+
+
+_tex_glyphs = None
+
+
+def _install_tex_cache(glyphs: GlyphCache) -> None:
+    """
+    Envuelve tex_to_svg_file (LaTeX -> dvi -> svg, lo más caro) con la caché.
+    """
+    global _tex_glyphs
+    first = _tex_glyphs is None
+    _tex_glyphs = glyphs
+    if not first:
+        return
+    try:
+        from manim.mobject.text import tex_mobject
+        from manim.utils import tex_file_writing
+    except ImportError:
+        return
+    original = getattr(tex_file_writing, "tex_to_svg_file", None)
+    if original is None:
+        return
+
+    def tex_to_svg_file(expression, environment=None, tex_template=None):
+        template = tex_template or config["tex_template"]
+        key = ("tex", expression, environment or "", getattr(template, "body", ""))
+        dest = Path(config.get_dir("tex_dir")) / "cached" / _tex_glyphs.path(key).name
+        if dest.exists() or _tex_glyphs.fetch(key, dest):
+            return dest
+        svg = original(expression, environment=environment, tex_template=tex_template)
+        _tex_glyphs.store(key, Path(svg))
+        return svg
+
+    tex_file_writing.tex_to_svg_file = tex_to_svg_file
+    if hasattr(tex_mobject, "tex_to_svg_file"):
+        tex_mobject.tex_to_svg_file = tex_to_svg_file
+
+
+def _glyphs_from_env():
+    root = os.environ.get(GLYPH_DIR_ENV)
+    if not root:
+        return None
+    return GlyphCache(root, int(float(os.environ.get(GLYPH_MAX_MB_ENV, "512")) * 1024 * 1024))
+
+
+class SpecScene(Scene):
+    def __init__(
+        self, spec: dict = None, glyphs: GlyphCache = None, stats_path: str = None, on_animation=None, **kwargs
+    ):
+        self.spec = spec if spec is not None else load_spec(os.environ[SPEC_ENV])
+        self.on_animation = on_animation  # callback(n): animaciones terminadas hasta ahora
+        self._reported = 0
+        self.glyphs = glyphs if glyphs is not None else _glyphs_from_env()
+        self.stats_path = stats_path or os.environ.get(GLYPH_STATS_ENV)
+        self.text_cls = Text
+        self._stats_before = {}
+        if self.glyphs is not None:
+            self.text_cls = _cached_text_class(self.glyphs)
+            _install_tex_cache(self.glyphs)
+            self._stats_before = self.glyphs.stats()
+        super().__init__(**kwargs)
+
+    def _animation_done(self):
+        # num_plays cuenta play y wait (según la versión, wait pasa o no por play)
+        done = getattr(self.renderer, "num_plays", 0)
+        if self.on_animation is not None and done != self._reported:
+            self._reported = done
+            self.on_animation(done)
+
+    def play(self, *args, **kwargs):
+        super().play(*args, **kwargs)
+        self._animation_done()
+
+    def wait(self, *args, **kwargs):
+        super().wait(*args, **kwargs)
+        self._animation_done()
+
+    def _write_stats(self):
+        if self.glyphs is None or not self.stats_path:
+            return
+        after = self.glyphs.stats()
+        delta = {k: after[k] - self._stats_before.get(k, 0) for k in after}
+        with open(self.stats_path, "w", encoding="utf-8") as f:
+            json.dump(delta, f)
+
+    def construct(self):
+        spec = self.spec
+        Txt = self.text_cls
+
+        if "title" in spec:
+            title = Txt(spec["title"], font_size=36)
+            self.play(Write(title))
+            self.wait(0.5)
+            self.play(FadeOut(title))
+
+        for step in spec.get("steps", []):
+            step_txt = Txt(step["text"], font_size=32)
+            rule_txt = Txt(step["rule"], font_size=26).next_to(step_txt, DOWN)
+            narr_txt = Txt(step["narration"], font_size=24).next_to(rule_txt, DOWN)
+            self.play(Write(step_txt))
+            self.play(Write(rule_txt))
+            self.play(Write(narr_txt))
+            self.wait(0.5)
+            self.play(FadeOut(step_txt, rule_txt, narr_txt))
+
+        if "final" in spec:
+            final_txt = Txt(spec["final"], font_size=36)
+            self.play(Write(final_txt))
+            self.wait(2)
+
+        self._write_stats()
@@ -0,0 +1,95 @@
+# app/services/single_flight.py
+"""
+Deduplicación de trabajo en curso ("single flight").
+
+Cuando un curso recibe una tarea, decenas de estudiantes mandan el mismo
+ejercicio en segundos. Las cachés (solver_cache, render_cache) solo
+ayudan cuando el primero ya terminó; mientras tanto cada request
+resolvía y renderizaba lo mismo. Con SingleFlight el primero que pide
+una clave la calcula (líder) y los que llegan mientras tanto esperan y
+se llevan el mismo resultado.
+
+- Si el líder falla con una excepción normal, todos reciben ese error
+  (misma entrada, mismo resultado) y la clave queda libre: el próximo
+  request vuelve a intentar.
+- Si el líder se cancela (KeyboardInterrupt, SystemExit, CancelledError...),
+  los que esperaban no heredan la cancelación: uno de ellos pasa a ser
+  el líder y calcula.
+- La clave se libera antes de despertar a los que esperan, así nadie
+  se engancha a un cálculo que ya terminó.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from . import metrics
+
+
+class _Call:
+    __slots__ = ("done", "value", "error", "cancelled")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.cancelled = False
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self.leaders = 0
+        self.shared = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Devuelve (resultado, compartido). `compartido` es True si el
+        resultado lo calculó otro request que ya estaba en curso.
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self.leaders += 1
+            if leader:
+                return self._lead(key, call, fn), False
+
+            call.done.wait()
+            if call.cancelled:
+                continue  # el líder no terminó: probamos de nuevo (quizás como líder)
+            with self._lock:
+                self.shared += 1
+            metrics.inc("single_flight_shared_total", flight=self.name)
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+    def _lead(self, key: Hashable, call: _Call, fn: Callable[[], Any]) -> Any:
+        try:
+            call.value = fn()
+            return call.value
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException:
+            call.cancelled = True
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def running(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"leaders": self.leaders, "shared": self.shared, "in_flight": len(self._calls)}
@@ -0,0 +1,190 @@
+# app/services/solution_check.py
+"""
+Validación de soluciones "numérico primero".
+
+Antes: simplify() del residuo sustituido por cada solución, que en raíces
+con radicales o racionales suele costar más que resolver.
+
+Ahora, en tres escalones:
+1. numérico (NumPy): la ecuación se convierte una vez con lambdify y se
+   evalúa vectorizada sobre todas las soluciones candidatas (y unos puntos
+   de muestra para las demás variables). Si el residuo está claramente
+   lejos de cero -> no valida; si está claramente cerca (muy por debajo
+   de la tolerancia en todos los puntos) -> valida. Sin más trabajo.
+2. alta precisión (50 dígitos) solo para los dudosos (entre esos dos
+   umbrales o sin número): si el residuo es cero a esa precisión -> valida.
+3. exacto (simplify) solo si aún así no queda claro.
+
+check_solutions() informa qué escalón decidió ("numeric" | "symbolic"),
+para que `validated` siga siendo confiable y se sepa cuánto costó.
+"""
+import random
+from typing import Dict, List, Tuple
+
+from sympy import Eq, Poly, RootOf, lambdify, simplify
+from sympy.core.relational import Relational
+from sympy.polys.polyerrors import PolynomialError
+
+try:
+    import numpy as np
+except ImportError:  # sin NumPy pasamos directo al escalón 2
+    np = None
+
+
+SAMPLE_POINTS = 3
+HIGH_PRECISION_DIGITS = 50
+# tolerancia relativa al tamaño de lhs/rhs en doble precisión
+DOUBLE_TOL = 1e-9
+# por debajo de esto (en todos los puntos) el residuo es redondeo de doble
+# precisión: se acepta sin pasar a 50 dígitos
+CLEAR_ZERO_TOL = 1e-12
+# relativa, con 50 dígitos: por debajo lo damos por cero exacto
+ZERO_TOL = 1e-40
+
+
+def _sample_points(params: List) -> List[Dict]:
+    """
+    Puntos de muestra deterministas para las variables que no se despejan.
+    Evitamos enteros chicos (0, 1, -1) que suelen anular denominadores.
+    """
+    if not params:
+        return [{}]
+    rng = random.Random(0)
+    return [
+        {p: rng.uniform(0.3, 2.7) for p in params}
+        for _ in range(SAMPLE_POINTS)
+    ]
+
+
+def _candidate(sol: Relational):
+    # sol: Eq(x, valor); la variable despejada es el lhs
+    var = sol.lhs if sol.lhs.is_Symbol else list(sol.free_symbols)[0]
+    return var, sol.rhs
+
+
+def _divides(eq: Eq, var, root: RootOf) -> bool:
+    """
+    Una raíz implícita (RootOf) anula su polinomio por definición: si ese
+    polinomio divide a lhs - rhs, la solución vale sin evaluar nada.
+    (Evaluar numéricamente raíces complejas de RootOf cuesta segundos.)
+    """
+    try:
+        residual = Poly(eq.lhs - eq.rhs, var)
+        return residual.rem(root.poly.replace(root.poly.gen, var)).is_zero
+    except PolynomialError:
+        return False
+
+
+def _numeric_screen(eq: Eq, var, values: List, params: List, points: List[Dict]) -> List[str]:
+    """
+    Escalón 1: un solo lambdify de (lhs, rhs) evaluado sobre todas las
+    candidatas x todos los puntos. Por candidata:
+    "zero" | "nonzero" | "near_zero" (dudoso) | "unknown".
+    """
+    if np is None:
+        return ["unknown"] * len(values)
+
+    try:
+        fn = lambdify([var] + params, [eq.lhs, eq.rhs], modules="numpy")
+        var_col = [complex(v.evalf(17, subs=pt)) for v in values for pt in points]
+        param_cols = [[pt[p] for _ in values for pt in points] for p in params]
+        with np.errstate(all="ignore"):
+            lhs_v, rhs_v = (
+                np.broadcast_to(np.asarray(side, dtype=complex), (len(var_col),))
+                for side in fn(np.array(var_col, dtype=complex), *(np.array(c, dtype=complex) for c in param_cols))
+            )
+            residual = np.abs(lhs_v - rhs_v).reshape(len(values), len(points))
+            scale = (1 + np.abs(lhs_v) + np.abs(rhs_v)).reshape(len(values), len(points))
+    except Exception:
+        return ["unknown"] * len(values)
+
+    verdicts = []
+    for res, sc in zip(residual, scale):
+        if not np.all(np.isfinite(res)):
+            verdicts.append("unknown")
+        elif np.any(res > DOUBLE_TOL * sc):
+            verdicts.append("nonzero")
+        elif np.all(res <= CLEAR_ZERO_TOL * sc):
+            verdicts.append("zero")
+        else:
+            verdicts.append("near_zero")
+    return verdicts
+
+
+def _high_precision(eq: Eq, var, value, points: List[Dict]) -> str:
+    """
+    Escalón 2: evalúa con HIGH_PRECISION_DIGITS dígitos sustituyendo el
+    valor ya numérico (así evalf no persigue cancelaciones exactas).
+    Devuelve "zero" | "nonzero" | "unknown".
+    """
+    verdict = "zero"
+    for pt in points:
+        try:
+            value_n = value.evalf(HIGH_PRECISION_DIGITS, subs=pt)
+            subs = {**pt, var: value_n}
+            lhs_n = complex(eq.lhs.evalf(HIGH_PRECISION_DIGITS, subs=subs))
+            rhs_n = complex(eq.rhs.evalf(HIGH_PRECISION_DIGITS, subs=subs))
+        except (TypeError, ValueError, ZeroDivisionError):
+            return "unknown"
+
+        residual = abs(lhs_n - rhs_n)
+        scale = 1 + abs(lhs_n) + abs(rhs_n)
+        if residual != residual:  # NaN
+            return "unknown"
+        if residual > DOUBLE_TOL * scale:
+            return "nonzero"
+        if residual > ZERO_TOL * scale:
+            verdict = "unknown"
+    return verdict
+
+
+def check_solutions(eq: Eq, solutions: List[Relational]) -> Tuple[bool, str]:
+    """
+    Valida sustituyendo las soluciones en la ecuación original.
+    Devuelve (todas_validas, método) con método "numeric" o "symbolic".
+    """
+    candidates = [_candidate(s) for s in solutions if isinstance(s, Relational) and s.free_symbols]
+    if not candidates:
+        return True, "numeric"
+
+    method = "numeric"
+    # normalmente todas despejan la misma variable: un grupo, un lambdify
+    by_var: Dict = {}
+    for var, value in candidates:
+        by_var.setdefault(var, []).append(value)
+
+    for var, values in by_var.items():
+        implicit = [v for v in values if isinstance(v, RootOf)]
+        if implicit:
+            method = "symbolic"
+            if not all(_divides(eq, var, v) for v in implicit):
+                return False, method
+            values = [v for v in values if not isinstance(v, RootOf)]
+            if not values:
+                continue
+
+        params = sorted(
+            (eq.lhs.free_symbols | eq.rhs.free_symbols | set().union(*(v.free_symbols for v in values))) - {var},
+            key=str,
+        )
+        points = _sample_points(params)
+
+        for value, verdict in zip(values, _numeric_screen(eq, var, values, params, points)):
+            if verdict == "nonzero":
+                return False, method
+            if verdict == "zero":
+                continue
+
+            # dudoso (o sin NumPy): recién ahí 50 dígitos
+            verdict = _high_precision(eq, var, value, points)
+            if verdict == "zero":
+                continue
+            if verdict == "nonzero":
+                return False, method
+
+            # ni los números se ponen de acuerdo: prueba exacta
+            method = "symbolic"
+            if simplify(eq.lhs.subs(var, value) - eq.rhs.subs(var, value)) != 0:
+                return False, method
+
+    return True, method
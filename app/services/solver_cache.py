@@ -0,0 +1,183 @@
+# app/services/solver_cache.py
+"""
+Memoización de solve_problem sobre una forma canónica de la ecuación.
+
+"2x+3=11", "3 + 2x = 11" y "2x+3=11" en LaTeX terminan siendo la misma
+expresión lhs - rhs. Además renombramos las variables (v0, v1, ...) para
+que "2y+3=11" también reutilice el trabajo: guardamos el resultado con los
+nombres canónicos y al leerlo lo traducimos a los nombres del usuario.
+
+Dos niveles:
+- memoria: LRU acotado por número de entradas
+- disco (opcional, SOLVER_CACHE_DIR): sobrevive reinicios
+
+Además, si la misma forma canónica ya se está resolviendo en otro
+request, get_or_compute espera ese resultado en vez de resolverla de
+nuevo (single flight).
+"""
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sympy import Eq, Symbol, srepr
+from sympy.core.parameters import evaluate
+
+from ..config import settings
+from . import metrics
+from .single_flight import SingleFlight
+
+
+def canonicalize(eq: Eq, vars_candidates: List[str]) -> Tuple[str, Eq, List[str], Dict]:
+    """
+    Devuelve (clave, ecuación canónica, variables canónicas, mapa inverso).
+
+    - normaliza a lhs - rhs = 0 (SymPy ya ordena los args de Add/Mul)
+    - renombra variables en orden: la principal es v0, el resto v1, v2...
+    """
+    rename = {Symbol(name): Symbol(f"v{i}") for i, name in enumerate(vars_candidates)}
+    expr = (eq.lhs - eq.rhs).xreplace(rename)
+    canon_eq = Eq(expr, 0)
+
+    key = hashlib.sha256(srepr(expr).encode("utf-8")).hexdigest()
+    inverse = {new: old for old, new in rename.items()}
+    return key, canon_eq, [str(s) for s in rename.values()], inverse
+
+
+def _rename(core: Dict, mapping: Dict) -> Dict:
+    """
+    Aplica el mapa de símbolos a todos los objetos SymPy del resultado.
+    Sin evaluar: si no, 2*(x - 4) volvería a distribuirse en 2*x - 8.
+    """
+    with evaluate(False):
+        return {
+            **core,
+            "solutions": [s.xreplace(mapping) for s in core["solutions"]],
+            "simplified": core["simplified"].xreplace(mapping),
+            "factored": core["factored"].xreplace(mapping),
+        }
+
+
+def dump_core(core: Dict) -> bytes:
+    """
+    Serializa un resultado del solver (disco y procesos del sandbox).
+
+    Todo viaja con pickle normal salvo `factored`, que se reconstruye sin
+    evaluar: si no, 2*(x - 4) volvería como 2*x - 8. (Las soluciones no
+    pueden ir sin evaluar: CRootOf no se deja reconstruir así.)
+    """
+    rest = {k: v for k, v in core.items() if k != "factored"}
+    return pickle.dumps((rest, pickle.dumps(core["factored"])))
+
+
+def load_core(blob: bytes) -> Dict:
+    rest, factored = pickle.loads(blob)
+    with evaluate(False):
+        return {**rest, "factored": pickle.loads(factored)}
+
+
+class SolverCache:
+    def __init__(self, max_entries: int, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.flight = SingleFlight("solver")
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.pkl"
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            core = self._memory.get(key)
+            if core is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return core
+
+        if self.disk_dir is not None:
+            try:
+                core = load_core(self._disk_path(key).read_bytes())
+            except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+                core = None
+            if core is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(key, core)
+                return core
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, core: Dict) -> None:
+        with self._lock:
+            self._remember(key, core)
+
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp.write_bytes(dump_core(core))
+                os.replace(tmp, path)
+            except OSError:
+                # el disco es best-effort: la memoria ya tiene el resultado
+                pass
+
+    def _remember(self, key: str, core: Dict) -> None:
+        self._memory[key] = core
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_or_compute(
+        self,
+        eq: Eq,
+        vars_candidates: List[str],
+        compute: Callable[[Eq, List[str]], Dict],
+    ) -> Dict:
+        """
+        Busca la ecuación canónica; si no está, la resuelve con compute()
+        (una sola vez aunque lleguen varios requests iguales a la vez) y la
+        guarda. Siempre devuelve el resultado con los nombres originales.
+        """
+        key, canon_eq, canon_vars, inverse = canonicalize(eq, vars_candidates)
+        core = self.get(key)
+        if core is None:
+            core, _ = self.flight.do(key, lambda: self._compute(key, canon_eq, canon_vars, compute))
+        return _rename(core, inverse)
+
+    def _compute(self, key: str, canon_eq: Eq, canon_vars: List[str], compute: Callable) -> Dict:
+        with self._lock:
+            core = self._memory.get(key)  # otro líder pudo terminar justo antes
+        if core is None:
+            core = compute(canon_eq, canon_vars)
+            self.put(key, core)
+        return core
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._memory),
+            }
+
+
+solver_cache = SolverCache(
+    max_entries=settings.solver_cache_size,
+    disk_dir=settings.solver_cache_dir or None,
+)
+
+metrics.register_collector("solver_cache_hits_total", "counter", "Resultados del solver servidos desde memoria.", lambda: solver_cache.hits)
+metrics.register_collector("solver_cache_disk_hits_total", "counter", "Resultados del solver servidos desde disco.", lambda: solver_cache.disk_hits)
+metrics.register_collector("solver_cache_misses_total", "counter", "Ecuaciones resueltas con SymPy.", lambda: solver_cache.misses)
+metrics.register_collector("solver_in_flight", "gauge", "Ecuaciones canónicas resolviéndose ahora mismo.", lambda: solver_cache.flight.in_flight())
@@ -0,0 +1,247 @@
+# app/services/solver_sandbox.py
+"""
+SymPy con límites: tiempo de reloj y memoria por llamada.
+
+sympify/parse_latex/solve() con una entrada patológica (grado enorme,
+radicales anidados, 9**9**9) pueden quedarse minutos en CPU y comerse
+gigabytes. Para que un request así no arrastre al resto:
+
+- El parseo y el cálculo corren en procesos worker aparte (spawn, SymPy
+  ya importado), con RLIMIT_AS = memoria al arrancar + presupuesto.
+- Si no responde en `timeout_s`, el worker se mata (cancelación limpia,
+  sin hilos zombis) y se levanta otro -> SolverTimeout.
+- MemoryError o un worker que muere a mitad -> SolverTooComplex.
+- Cualquier otra excepción se re-lanza tal cual en el proceso principal.
+
+Las latencias por etapa medidas dentro del worker se devuelven con el
+resultado y se registran en las métricas del proceso principal.
+"""
+import multiprocessing
+import os
+import queue
+import threading
+from typing import Callable, Dict, Optional
+
+from ..config import settings
+from . import metrics
+
+try:
+    import resource
+except ImportError:  # Windows: sin límite de memoria, solo timeout
+    resource = None
+
+
+class SolverLimitError(Exception):
+    code = "limit"
+
+
+class SolverTimeout(SolverLimitError):
+    code = "timeout"
+
+
+class SolverTooComplex(SolverLimitError):
+    code = "too_complex"
+
+
+def _vm_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _limit_memory(max_memory_mb: int) -> None:
+    """
+    El presupuesto es por encima de lo que ya ocupa el worker con SymPy
+    (y NumPy, que reserva bastante espacio virtual) importado.
+    """
+    if resource is None or max_memory_mb <= 0:
+        return
+    limit = _vm_bytes() + max_memory_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        pass
+
+
+def _worker_main(conn, max_memory_mb: int) -> None:
+    # import caliente: el primer solve no paga el import de SymPy
+    from . import sympy_solver  # noqa: F401
+
+    observations = []
+    metrics.record_to(observations)
+    _limit_memory(max_memory_mb)
+    conn.send({"ready": True})
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+
+        fn, args = job
+        observations.clear()
+        try:
+            reply = {"ok": True, "value": fn(*args)}
+        except MemoryError:
+            # el heap puede quedar fragmentado: mejor reciclar
+            conn.send({"ok": False, "limit": True})
+            return
+        except Exception as e:
+            reply = {"ok": False, "error": e}
+        reply["observations"] = list(observations)
+
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # resultado o excepción que no se puede picklear
+            conn.send({"ok": False, "error": RuntimeError(f"{type(e).__name__}: {e}"), "observations": []})
+
+
+class _Worker:
+    def __init__(self, ctx, max_memory_mb: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, max_memory_mb),
+            daemon=True,
+            name="solver-worker",
+        )
+        self.process.start()
+        child_conn.close()
+
+    def stop(self, kill: bool = False) -> None:
+        try:
+            if kill:
+                self.process.kill()
+            else:
+                self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class SolverSandbox:
+    def __init__(self, size: int, timeout_s: float, max_memory_mb: int):
+        self.size = size
+        self.timeout_s = timeout_s
+        self.max_memory_mb = max_memory_mb
+        self.timeouts = 0
+        self.too_complex = 0
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers = 0
+        self._lock = threading.Lock()
+        # spawn: el worker arranca limpio (sin heredar hilos ni locks de la API)
+        self._ctx = multiprocessing.get_context("spawn")
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx, self.max_memory_mb)
+        try:
+            worker.conn.recv()
+        except EOFError:
+            worker.stop(kill=True)
+            raise RuntimeError("el worker del solver murió al arrancar")
+        return worker
+
+    def _acquire(self) -> _Worker:
+        """
+        Un worker libre; se crean a demanda hasta `size` y después se espera.
+        """
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                grow = self._workers < self.size
+                if grow:
+                    self._workers += 1
+            if grow:
+                try:
+                    return self._spawn()
+                except Exception:
+                    self._release(None)
+                    raise
+            try:
+                # con timeout: si matan un worker se libera un cupo para crear otro
+                return self._idle.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+    def _release(self, worker: Optional[_Worker]) -> None:
+        if worker is not None:
+            self._idle.put(worker)
+        else:
+            with self._lock:
+                self._workers -= 1
+
+    def call(self, fn: Callable, *args):
+        """
+        fn(*args) en un worker, con timeout y tope de memoria.
+        fn y args tienen que poder picklearse (funciones de módulo, objetos SymPy).
+        """
+        if not self.enabled:
+            return fn(*args)
+
+        worker = self._acquire()
+        reply = None
+        try:
+            worker.conn.send((fn, args))
+            if worker.conn.poll(self.timeout_s):
+                reply = worker.conn.recv()
+        except (EOFError, OSError):
+            # murió a mitad (p.ej. el kernel lo mató por memoria)
+            reply = {"ok": False, "limit": True}
+        finally:
+            healthy = reply is not None and not reply.get("limit")
+            if not healthy:
+                # colgado, sin memoria o muerto: se descarta y el próximo se crea de nuevo
+                worker.stop(kill=True)
+            self._release(worker if healthy else None)
+
+        if reply is None:
+            self.timeouts += 1
+            metrics.inc("solver_limits_total", reason="timeout")
+            raise SolverTimeout(f"el solver superó el límite de {self.timeout_s:g}s")
+        if reply.get("limit"):
+            self.too_complex += 1
+            metrics.inc("solver_limits_total", reason="too_complex")
+            raise SolverTooComplex(f"el problema superó el límite de memoria del solver ({self.max_memory_mb} MB)")
+
+        for stage, seconds in reply["observations"]:
+            metrics.observe(stage, seconds)
+        if not reply["ok"]:
+            raise reply["error"]
+        return reply["value"]
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self._workers,
+            "idle": self._idle.qsize(),
+            "timeouts": self.timeouts,
+            "too_complex": self.too_complex,
+        }
+
+    def shutdown(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._workers -= 1
+
+
+solver_sandbox = SolverSandbox(
+    size=settings.solver_workers if settings.solver_sandbox else 0,
+    timeout_s=settings.solver_timeout_s,
+    max_memory_mb=settings.solver_max_memory_mb,
+)
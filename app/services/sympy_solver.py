@@ -1,46 +1,30 @@
 # app/services/sympy_solver.py
 from typing import Dict, List, Tuple
-import re
-from sympy import symbols, Eq, sympify, solve, factor, simplify
-from sympy.parsing.latex import parse_latex
+import pickle
+from sympy import E, pi, symbols, Eq, solve, factor, simplify
+from sympy.core.parameters import evaluate
 from sympy.core.relational import Relational
-from sympy.core.sympify import SympifyError
 
+from ..config import settings
+from . import metrics
+from .solver_cache import dump_core, load_core, solver_cache
+from .solver_sandbox import SolverTooComplex, solver_sandbox
+from .poly_engine import analyze_polynomial
+from .solution_check import check_solutions
+from .latex_parser import parse_latex_expr
+from .text_parser import parse_equation
 
-def _normalize_plaintext_expr(expr_text: str) -> str:
-    """
-    Limpia una expresión matemática escrita estilo humano para que SymPy la entienda.
-    Hace:
-    - reemplaza ^ por ** (potencia)
-    - inserta * en casos como 5x -> 5*x
-    - inserta * en 5(x+1) -> 5*(x+1)
-    - inserta * en )(
-        (x-2)(x-3) -> (x-2)*(x-3)
-    - inserta * en x(x+1) -> x*(x+1)
-
-    Nota: esto es heurístico, pero suficiente para álgebra básica MVP.
-    """
-
-    s = expr_text.strip()
-
-    # potencia estilo humano -> python
-    s = s.replace("^", "**")
-
-    # )(
-    # ejemplo: (x-2)(x-3)  -> (x-2)*(x-3)
-    s = re.sub(r"\)\s*\(", ")*(", s)
+# letras que, si hay otra incógnita, son las constantes de siempre
+_CONSTANT_NAMES = {"e": E, "pi": pi}
+# incógnitas habituales, en orden de preferencia para la variable principal
+_PREFERRED_UNKNOWNS = ("x", "y", "z", "t")
 
-    # número seguido de variable: 5x -> 5*x
-    # (\d)  ( [a-zA-Z] )
-    s = re.sub(r"(\d)([a-zA-Z])", r"\1*\2", s)
 
-    # variable seguida de paréntesis: x( -> x*(
-    s = re.sub(r"([a-zA-Z])\s*\(", r"\1*(", s)
-
-    # número seguido de paréntesis: 2( -> 2*(
-    s = re.sub(r"(\d)\s*\(", r"\1*(", s)
-
-    return s
+def _unknowns_order(name: str) -> Tuple:
+    # primero x, y, z, t; después el resto en orden alfabético (determinista)
+    if name in _PREFERRED_UNKNOWNS:
+        return (0, _PREFERRED_UNKNOWNS.index(name), name)
+    return (1, 0, name)
 
 
 def _to_equation(expr_text: str, input_format: str) -> Tuple[Eq, List[str]]:
@@ -57,33 +41,29 @@ def _to_equation(expr_text: str, input_format: str) -> Tuple[Eq, List[str]]:
 
     if input_format.lower() == "latex":
         # Para LaTeX, hacemos split manual si trae '='
+        # (parser propio para lo habitual; ANTLR solo si hace falta)
         if "=" in expr_text:
             left_txt, right_txt = expr_text.split("=", 1)
-            lhs = parse_latex(left_txt)
-            rhs = parse_latex(right_txt)
+            lhs = parse_latex_expr(left_txt)
+            rhs = parse_latex_expr(right_txt)
         else:
-            lhs = parse_latex(expr_text)
+            lhs = parse_latex_expr(expr_text)
             rhs = 0
     else:
-        # input_format == "text" (o cualquier otra cosa que no sea latex)
-        fixed = _normalize_plaintext_expr(expr_text)
-
-        if "=" in fixed:
-            left_txt, right_txt = fixed.split("=", 1)
-        else:
-            left_txt, right_txt = fixed, "0"
+        # input_format == "text" (o cualquier otra cosa que no sea latex):
+        # parser propio, sin sympify/eval (ParseError dice en qué posición falla)
+        lhs, rhs = parse_equation(expr_text)
 
-        try:
-            lhs = sympify(left_txt)
-            rhs = sympify(right_txt)
-        except SympifyError as e:
-            raise ValueError(
-                f"No pude interpretar la expresión matemática: '{expr_text}'. "
-                f"Intenté normalizarla como '{fixed}' y aún así SymPy no la aceptó."
-            ) from e
+    # e / pi sueltos son constantes salvo que sean lo único que hay ("e + 2 = 5")
+    free = lhs.free_symbols | getattr(rhs, "free_symbols", set())
+    constants = {s: _CONSTANT_NAMES[s.name] for s in free if s.name in _CONSTANT_NAMES}
+    if constants and len(constants) < len(free):
+        lhs = lhs.xreplace(constants)
+        rhs = rhs.xreplace(constants) if hasattr(rhs, "xreplace") else rhs
+        free -= set(constants)
 
-    # detectar símbolos
-    symbols_used = list(map(str, (lhs.free_symbols | getattr(rhs, "free_symbols", set()))))
+    # la variable principal (la primera) no depende del hash del set
+    symbols_used = sorted(map(str, free), key=_unknowns_order)
 
     # construir ecuación simbólica
     equation = Eq(lhs, rhs)
@@ -113,46 +93,23 @@ def _solve_equation(eq: Eq, vars_candidates: List[str]) -> List[Relational]:
     return normalized
 
 
-def _validate_solutions(eq: Eq, solutions: List[Relational]) -> bool:
+def _factor_parts(eq: Eq) -> Tuple:
     """
-    Valida sustituyendo las soluciones en la ecuación original.
-    Si TODAS cumplen -> True. Si alguna no, -> False.
+    Simplifica y factoriza lhs - rhs.
+    Devuelve (expr, factored) como objetos SymPy.
     """
     lhs = eq.lhs
     rhs = eq.rhs
 
-    for sol in solutions:
-        if not isinstance(sol, Relational):
-            continue
-
-        # sol: Eq(x, 2)
-        var_symbols = list(sol.free_symbols)
-        if not var_symbols:
-            continue
-
-        # normalmente es una sola variable, ej x
-        main_var = var_symbols[0]
-        value = sol.rhs
-
-        diff = simplify(lhs.subs(main_var, value) - rhs.subs(main_var, value))
-        # si no da 0 exacto -> no validado
-        if diff != 0:
-            return False
-
-    return True
+    expr = simplify(lhs - rhs)
+    factored = factor(expr)
+    return expr, factored
 
 
-def _factor_expression(eq: Eq) -> str:
+def _factor_expression(expr, factored) -> str:
     """
-    Intenta factorizar lhs - rhs.
     Devuelve string estilo "(x - 2)*(x - 3) = 0" o "x**2 - 5*x + 6 = 0".
     """
-    lhs = eq.lhs
-    rhs = eq.rhs
-
-    expr = simplify(lhs - rhs)
-    factored = factor(expr)
-
     # Si factor() no cambió nada, devolvemos la forma original
     if str(factored) == str(expr):
         return f"{str(expr)} = 0"
@@ -160,6 +117,27 @@ def _factor_expression(eq: Eq) -> str:
         return f"{str(factored)} = 0"
 
 
+def _problem_type(eq: Eq, vars_candidates: List[str]) -> str:
+    """
+    Heurística de tipo de problema (lineal, cuadrática, cúbica...).
+    """
+    problem_type = "generic"
+    try:
+        if len(vars_candidates) == 1:
+            var_symbol = symbols(vars_candidates[0])
+            poly_expr = (eq.lhs - eq.rhs)
+            poly_degree = poly_expr.as_poly(var_symbol).degree()
+            if poly_degree == 1:
+                problem_type = "linear"
+            elif poly_degree == 2:
+                problem_type = "quadratic"
+            elif poly_degree == 3:
+                problem_type = "cubic"
+    except Exception:
+        pass
+    return problem_type
+
+
 def _to_latex_clean(eq: Eq) -> str:
     """
     Representación amigable de la ecuación original para mostrar/la respuesta JSON.
@@ -181,6 +159,66 @@ def _to_solution_strings(solutions: List[Relational]) -> List[str]:
     return out
 
 
+def _solve_core(eq: Eq, vars_candidates: List[str]) -> Dict:
+    """
+    Todo el trabajo pesado de SymPy, sin strings: es lo que se memoiza.
+    """
+    # Camino rápido: polinomio en una variable -> un solo Poly para todo
+    with metrics.timed("poly_fast_path"):
+        fast = analyze_polynomial(eq, vars_candidates)
+    if fast is not None:
+        return fast
+
+    # 2. Resolver para la variable principal
+    with metrics.timed("solve"):
+        raw_solutions = _solve_equation(eq, vars_candidates)
+
+    # 3. Validar sustituyendo (numérico primero, exacto solo si hace falta)
+    with metrics.timed("validate"):
+        is_valid, validation_method = check_solutions(eq, raw_solutions)
+
+    # 4. Heurística de tipo de problema
+    with metrics.timed("classify"):
+        problem_type = _problem_type(eq, vars_candidates)
+
+    # 5. Factorización útil para pasos
+    with metrics.timed("factor"):
+        simplified, factored = _factor_parts(eq)
+
+    return {
+        "solutions": raw_solutions,
+        "validated": is_valid,
+        "validation_method": validation_method,
+        "problem_type": problem_type,
+        "simplified": simplified,
+        "factored": factored,
+    }
+
+
+def _to_equation_dumped(expr_text: str, input_format: str) -> bytes:
+    # parse_latex deja sumas anidadas sin evaluar: que lleguen tal cual
+    return pickle.dumps(_to_equation(expr_text, input_format))
+
+
+def _sandboxed_parse(expr_text: str, input_format: str) -> Tuple[Eq, List[str]]:
+    if not solver_sandbox.enabled:
+        return _to_equation(expr_text, input_format)
+    blob = solver_sandbox.call(_to_equation_dumped, expr_text, input_format)
+    with evaluate(False):
+        return pickle.loads(blob)
+
+
+def _solve_core_dumped(eq: Eq, vars_candidates: List[str]) -> bytes:
+    # pickle a secas re-evalúa al reconstruir (2*(x - 4) -> 2*x - 8)
+    return dump_core(_solve_core(eq, vars_candidates))
+
+
+def _sandboxed_core(eq: Eq, vars_candidates: List[str]) -> Dict:
+    if not solver_sandbox.enabled:
+        return _solve_core(eq, vars_candidates)
+    return load_core(solver_sandbox.call(_solve_core_dumped, eq, vars_candidates))
+
+
 def solve_problem(problem_text: str, input_format: str) -> Dict:
     """
     Función principal llamada por /solve.
@@ -189,45 +227,37 @@ def solve_problem(problem_text: str, input_format: str) -> Dict:
     - solution: List[str]
     - problem_type: str
     - validated: bool
+    - validation_method: str ("numeric" | "symbolic")
     - factored_form: str
-    """
-
-    # 1. Construir ecuación simbólica
-    eq, vars_candidates = _to_equation(problem_text, input_format)
-
-    # 2. Resolver para la variable principal
-    raw_solutions = _solve_equation(eq, vars_candidates)
-
-    # 3. Validar sustituyendo
-    is_valid = _validate_solutions(eq, raw_solutions)
-
-    # 4. Heurística de tipo de problema (lineal, cuadrática, cúbica...)
-    problem_type = "generic"
-    try:
-        if len(vars_candidates) == 1:
-            var_symbol = symbols(vars_candidates[0])
-            poly_expr = (eq.lhs - eq.rhs)
-            poly_degree = poly_expr.as_poly(var_symbol).degree()
-            if poly_degree == 1:
-                problem_type = "linear"
-            elif poly_degree == 2:
-                problem_type = "quadratic"
-            elif poly_degree == 3:
-                problem_type = "cubic"
-    except Exception:
-        pass
 
-    # 5. Factorización útil para pasos
-    factored_form = _factor_expression(eq)
+    Parseo y cálculo corren en el sandbox (tiempo y memoria acotados):
+    lanza SolverTimeout / SolverTooComplex si la entrada se pasa de la raya.
+    """
+    if len(problem_text) > settings.solver_max_input_chars:
+        raise SolverTooComplex(
+            f"la entrada tiene {len(problem_text)} caracteres (máximo {settings.solver_max_input_chars})"
+        )
+
+    # 1. Construir ecuación simbólica (armarla también puede explotar: 9^9^9)
+    with metrics.timed("parse"):
+        eq, vars_candidates = _sandboxed_parse(problem_text, input_format)
+
+    # 2-5. Resolver, validar, clasificar y factorizar (memoizado por forma canónica)
+    if vars_candidates:
+        core = solver_cache.get_or_compute(eq, vars_candidates, _sandboxed_core)
+    else:
+        core = _sandboxed_core(eq, vars_candidates)
 
     # 6. Convertir a strings utilizables en el pipeline
     latex_clean = _to_latex_clean(eq)
-    solution_strings = _to_solution_strings(raw_solutions)
+    solution_strings = _to_solution_strings(core["solutions"])
+    factored_form = _factor_expression(core["simplified"], core["factored"])
 
     return {
         "latex_clean": latex_clean,
         "solution": solution_strings,
-        "problem_type": problem_type,
-        "validated": is_valid,
+        "problem_type": core["problem_type"],
+        "validated": core["validated"],
+        "validation_method": core.get("validation_method", "symbolic"),
         "factored_form": factored_form
     }
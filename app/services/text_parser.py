@@ -0,0 +1,214 @@
+# app/services/text_parser.py
+"""
+Parser de ecuaciones en texto plano ("2x^2 - 5(x+1) = 3"), sin sympify.
+
+Antes: cinco pasadas de regex para insertar '*' y '**' y después
+sympify, que tokeniza, transforma y hace eval() de Python (lento y
+ejecuta cualquier expresión). Acá: una sola pasada que tokeniza y un
+parser por precedencia (precedence climbing) que arma el árbol de SymPy
+directamente.
+
+Gramática (de menor a mayor precedencia):
+    ecuación   := expr ["=" expr]
+    expr       := expr ("+" | "-") expr
+               |  expr ("*" | "/" | <implícita>) expr
+               |  ("+" | "-") expr
+               |  expr ("^" | "**") expr          (asocia a derecha)
+               |  primario
+    primario   := número | nombre | función "(" expr {"," expr} ")" | "(" expr ")"
+
+- Multiplicación implícita delante de un nombre, una función o un
+  paréntesis: 5x, 2(x+1), (x-2)(x-3), x(x+1), 3sin(x). Tiene la misma
+  precedencia que '*' (1/2x = x/2, igual que antes).
+- Los nombres son variables salvo las constantes pi, E, I, oo y las
+  funciones de FUNCTIONS (que exigen paréntesis).
+- Los números sin punto son Integer y con punto Float (como sympify).
+- Los errores dicen en qué posición está el problema.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sympy import (
+    Abs, E, Float, I, Integer, Symbol, acos, asin, atan, cos, cot, csc, exp, log, oo, pi, sec, sin, sqrt, tan,
+)
+
+FUNCTIONS: Dict[str, Callable] = {
+    "sin": sin, "cos": cos, "tan": tan, "cot": cot, "sec": sec, "csc": csc,
+    "asin": asin, "acos": acos, "atan": atan,
+    "sqrt": sqrt, "exp": exp, "log": log, "ln": log, "abs": Abs,
+}
+
+CONSTANTS = {"pi": pi, "E": E, "I": I, "oo": oo}
+
+# tipos de token
+NUM, NAME, OP, LPAREN, RPAREN, COMMA, EQ, END = "número", "nombre", "operador", "(", ")", ",", "=", "fin"
+
+# operadores binarios: precedencia y si asocian a derecha
+_BINARY = {"+": (1, False), "-": (1, False), "*": (2, False), "/": (2, False), "^": (4, True)}
+_IMPLICIT_PREC = 2
+_UNARY_PREC = 3
+
+Token = Tuple[str, str, int]  # (tipo, texto, posición)
+
+# solo dígitos ASCII: str.isdigit() también acepta '²' o '٣'
+_DIGITS = frozenset("0123456789")
+
+
+class ParseError(ValueError):
+    """
+    Error de sintaxis con la posición (0-based) donde se detectó.
+    """
+
+    def __init__(self, detail: str, text: str, pos: int):
+        super().__init__(detail, text, pos)
+        self.detail = detail
+        self.text = text
+        self.pos = pos
+
+    def __str__(self) -> str:
+        return (
+            f"No pude interpretar la expresión matemática: '{self.text}'. "
+            f"Posición {self.pos + 1}: {self.detail}\n  {self.text}\n  {' ' * self.pos}^"
+        )
+
+
+def tokenize(text: str) -> List[Token]:
+    tokens: List[Token] = []
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c.isspace():
+            i += 1
+        elif c in _DIGITS or (c == "." and i + 1 < n and text[i + 1] in _DIGITS):
+            start = i
+            while i < n and text[i] in _DIGITS:
+                i += 1
+            if i < n and text[i] == ".":
+                i += 1
+                while i < n and text[i] in _DIGITS:
+                    i += 1
+            tokens.append((NUM, text[start:i], start))
+        elif c.isalpha() or c == "_":
+            start = i
+            while i < n and (text[i].isalnum() or text[i] == "_"):
+                i += 1
+            tokens.append((NAME, text[start:i], start))
+        elif c == "*" and text.startswith("**", i):
+            tokens.append((OP, "^", i))
+            i += 2
+        elif c in "+-*/^":
+            tokens.append((OP, c, i))
+            i += 1
+        elif c in "(),=":
+            tokens.append(({"(": LPAREN, ")": RPAREN, ",": COMMA, "=": EQ}[c], c, i))
+            i += 1
+        else:
+            raise ParseError(f"carácter inesperado '{c}'", text, i)
+    tokens.append((END, "", n))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.i = 0
+
+    def peek(self) -> Token:
+        return self.tokens[self.i]
+
+    def next(self) -> Token:
+        tok = self.tokens[self.i]
+        self.i += 1
+        return tok
+
+    def error(self, detail: str, tok: Optional[Token] = None) -> ParseError:
+        tok = tok or self.peek()
+        return ParseError(detail, self.text, tok[2])
+
+    def expect(self, kind: str) -> Token:
+        tok = self.peek()
+        if tok[0] != kind:
+            found = "el final" if tok[0] == END else f"'{tok[1]}'"
+            raise self.error(f"se esperaba '{kind}' y encontré {found}")
+        return self.next()
+
+    def expr(self, min_prec: int = 0):
+        lhs = self.unary()
+        while True:
+            kind, value, _ = tok = self.peek()
+            if kind == OP and value in _BINARY:
+                prec, right = _BINARY[value]
+                implicit = False
+            elif kind in (NAME, LPAREN):
+                prec, right, implicit = _IMPLICIT_PREC, False, True
+            else:
+                return lhs
+            if prec < min_prec:
+                return lhs
+            if not implicit:
+                self.next()
+            rhs = self.expr(prec if right else prec + 1)
+            if implicit or value == "*":
+                lhs = lhs * rhs
+            elif value == "/":
+                lhs = lhs / rhs
+            elif value == "+":
+                lhs = lhs + rhs
+            elif value == "-":
+                lhs = lhs - rhs
+            else:
+                lhs = lhs ** rhs
+
+    def unary(self):
+        kind, value, _ = self.peek()
+        if kind == OP and value in "+-":
+            self.next()
+            operand = self.expr(_UNARY_PREC)
+            return -operand if value == "-" else operand
+        return self.primary()
+
+    def primary(self):
+        tok = self.next()
+        kind, value, _ = tok
+        if kind == NUM:
+            return Float(value) if "." in value else Integer(value)
+        if kind == NAME:
+            if value in FUNCTIONS:
+                if self.peek()[0] != LPAREN:
+                    raise self.error(f"falta '(' después de la función {value}")
+                self.next()
+                args = [self.expr()]
+                while self.peek()[0] == COMMA:
+                    self.next()
+                    args.append(self.expr())
+                self.expect(RPAREN)
+                return FUNCTIONS[value](*args)
+            if value in CONSTANTS:
+                return CONSTANTS[value]
+            return Symbol(value)
+        if kind == LPAREN:
+            inner = self.expr()
+            self.expect(RPAREN)
+            return inner
+        if kind == END:
+            raise self.error("la expresión termina antes de tiempo", tok)
+        raise self.error(f"no esperaba '{value}'", tok)
+
+
+def parse_equation(text: str):
+    """
+    "lhs = rhs" -> (lhs, rhs); sin '=' el lado derecho es 0.
+    Lanza ParseError (un ValueError) si el texto no es válido.
+    """
+    parser = _Parser(text)
+    if parser.peek()[0] == END:
+        raise parser.error("la expresión está vacía")
+    lhs = parser.expr()
+    rhs = Integer(0)
+    if parser.peek()[0] == EQ:
+        parser.next()
+        rhs = parser.expr()
+    tok = parser.peek()
+    if tok[0] != END:
+        raise parser.error(f"no esperaba '{tok[1]}'")
+    return lhs, rhs
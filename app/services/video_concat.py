@@ -0,0 +1,155 @@
+# app/services/video_concat.py
+"""
+Une clips .mp4 sin re-codificar (stream copy) y los deja "faststart".
+
+Todos los segmentos salen de Manim con la misma calidad, así que
+comparten códec, resolución y fps: basta con reescribir el contenedor.
+
+- ffmpeg en el PATH: demuxer concat + `-c copy`
+- si no: PyAV (dependencia de Manim) con el mismo demuxer concat
+
+Faststart: el átomo moov (índice del video) va antes que mdat (los
+datos), así el navegador empieza a reproducir sin bajar el archivo entero.
+"""
+import os
+import shutil
+import struct
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+def _concat_list(paths: List[Path], list_path: Path) -> None:
+    lines = []
+    for p in paths:
+        escaped = str(Path(p).resolve()).replace("'", "'\\''")
+        lines.append(f"file '{escaped}'")
+    list_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _concat_ffmpeg(list_path: Path, output: Path) -> bool:
+    completed = subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+         "-i", str(list_path), "-c", "copy", "-movflags", "+faststart", "-f", "mp4", str(output)],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return completed.returncode == 0 and output.exists()
+
+
+def _remux_pyav(source: Path, output: Path, format: Optional[str] = None, options: Optional[Dict] = None) -> bool:
+    try:
+        import av
+    except ImportError:
+        return False
+
+    with av.open(str(source), format=format, options=options or {}) as src, \
+            av.open(str(output), mode="w", format="mp4", options={"movflags": "faststart"}) as dst:
+        in_stream = src.streams.video[0]
+        add_from_template = getattr(dst, "add_stream_from_template", None)
+        out_stream = add_from_template(in_stream) if add_from_template else dst.add_stream(template=in_stream)
+        for packet in src.demux(in_stream):
+            if packet.dts is None:  # paquete de flush del demuxer
+                continue
+            packet.stream = out_stream
+            dst.mux(packet)
+    return output.exists()
+
+
+def _concat_pyav(list_path: Path, output: Path) -> bool:
+    return _remux_pyav(list_path, output, format="concat", options={"safe": "0"})
+
+
+def concat_videos(paths: List[Path], output: Path) -> bool:
+    """
+    Escribe `output` con los clips en orden. Devuelve False si no se pudo
+    (sin ffmpeg ni PyAV, o clips incompatibles); nunca deja un mp4 a medias.
+    """
+    output = Path(output)
+    if not paths:
+        return False
+
+    list_path = output.with_name(f"{output.stem}.concat.txt")
+    tmp = output.with_name(f"{output.stem}.{os.getpid()}.tmp.mp4")
+    _concat_list(paths, list_path)
+    try:
+        ok = False
+        if shutil.which("ffmpeg"):
+            ok = _concat_ffmpeg(list_path, tmp)
+        if not ok:
+            try:
+                ok = _concat_pyav(list_path, tmp)
+            except Exception:
+                ok = False
+        if ok:
+            os.replace(tmp, output)
+        return ok
+    finally:
+        list_path.unlink(missing_ok=True)
+        tmp.unlink(missing_ok=True)
+
+
+def _top_level_boxes(path: Path) -> List[str]:
+    """
+    Tipos de los átomos de primer nivel del mp4, en orden (solo lee cabeceras).
+    """
+    boxes = []
+    size_total = path.stat().st_size
+    with open(path, "rb") as f:
+        offset = 0
+        while offset + 8 <= size_total:
+            f.seek(offset)
+            size, kind = struct.unpack(">I4s", f.read(8))
+            if size == 1:  # tamaño de 64 bits
+                size = struct.unpack(">Q", f.read(8))[0]
+            elif size == 0:  # hasta el final del archivo
+                size = size_total - offset
+            if size < 8:
+                break  # archivo corrupto: no seguimos
+            boxes.append(kind.decode("latin-1"))
+            offset += size
+    return boxes
+
+
+def is_faststart(path: Path) -> bool:
+    boxes = _top_level_boxes(Path(path))
+    if "moov" not in boxes:
+        return False
+    return "mdat" not in boxes or boxes.index("moov") < boxes.index("mdat")
+
+
+def faststart(path: Path) -> bool:
+    """
+    Mueve el moov al principio sin re-codificar (si hace falta).
+    Devuelve si el archivo quedó faststart; si no se pudo, queda como estaba.
+    """
+    path = Path(path)
+    try:
+        if is_faststart(path):
+            return True
+    except OSError:
+        return False
+
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.faststart.mp4")
+    try:
+        ok = False
+        if shutil.which("ffmpeg"):
+            completed = subprocess.run(
+                ["ffmpeg", "-y", "-loglevel", "error", "-i", str(path),
+                 "-map", "0", "-c", "copy", "-movflags", "+faststart", "-f", "mp4", str(tmp)],
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+            ok = completed.returncode == 0 and tmp.exists()
+        if not ok:
+            try:
+                ok = _remux_pyav(path, tmp)
+            except Exception:
+                ok = False
+        if ok:
+            os.replace(tmp, path)
+        return ok
+    finally:
+        tmp.unlink(missing_ok=True)
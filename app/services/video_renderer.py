@@ -1,88 +1,451 @@
 # app/services/video_renderer.py
+import codecs
+import json
+import os
+import shutil
+import signal
+import threading
 import uuid
 import subprocess
 import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from ..config import settings
+from ..storage.artifact_store import job_dir
+from ..storage.artifact_writer import atomic_write
+from . import metrics
+from .glyph_cache import GlyphCache
+from .manim_generator import SPEC_SCENE, spec_animations
+from .progress import ManimOutputParser
+from .render_cache import render_cache, render_key, link_or_copy
+from .render_workers import warm_pool
+from .single_flight import SingleFlight
+from .video_concat import concat_videos, faststart
+
+# la escena precompilada; la CLI de manim la carga por ruta
+SCENE_RUNTIME = Path(__file__).with_name("scene_runtime.py")
+
+_render_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# renders de jobs en curso (los de mejora de calidad no cuentan)
+_active_renders = 0
+_active_lock = threading.Lock()
+
+# cuánto se lee de la salida de Manim por vez (nunca se junta el log entero)
+READ_CHUNK = 64 * 1024
+
+ProgressFn = Callable[[Dict], None]
+
+# el mismo spec (video entero o segmento) pedido por varios jobs a la vez se renderiza una vez
+_render_flight = SingleFlight("render")
+
+metrics.register_collector(
+    "renders_in_flight", "gauge", "Renders distintos en curso (los jobs iguales esperan al mismo).",
+    _render_flight.in_flight,
+)
+
+# la misma caché de glifos que usan los renders: acá solo para la barrida de fondo
+glyph_cache = GlyphCache(settings.glyph_cache_dir, settings.glyph_cache_max_mb * 1024 * 1024)
+
+
+def start_glyph_eviction() -> None:
+    glyph_cache.start(
+        settings.glyph_cache_sweep_interval_s,
+        on_evict=lambda removed: metrics.inc("glyph_cache_evictions_total", amount=removed),
+    )
+
+
+def active_renders() -> int:
+    with _active_lock:
+        return _active_renders
+
+
+def _executor() -> ThreadPoolExecutor:
+    """
+    Acota cuántos subprocess de Manim corren a la vez (se crea la primera
+    vez que se usa). Hilos y no procesos: Manim ya corre en su propio
+    proceso y así el hilo puede leer su salida y publicar el progreso.
+    """
+    global _render_executor
+    with _executor_lock:
+        if _render_executor is None:
+            _render_executor = ThreadPoolExecutor(
+                max_workers=settings.render_workers, thread_name_prefix="manim"
+            )
+        return _render_executor
+
+
+def shutdown(wait: bool = True) -> None:
+    global _render_executor
+    with _executor_lock:
+        if _render_executor is not None:
+            _render_executor.shutdown(wait=wait)
+            _render_executor = None
+    warm_pool.shutdown()
+
+
+def _kill_tree(proc: subprocess.Popen) -> None:
+    """
+    Mata Manim y lo que haya lanzado (ffmpeg, latex): todo su grupo de procesos.
+    """
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except OSError:
+        pass  # ya terminó
+
+
+def _stream_manim(
+    cmd: List[str], base_dir: Path, env: Dict, log, on_progress: Optional[ProgressFn], timeout_s: float = 0
+) -> Optional[int]:
+    """
+    Corre Manim leyendo su salida (stdout + stderr) a medida que llega:
+    va entera al log en disco y las barras de progreso se traducen a eventos.
+    Si pasan timeout_s (0 = sin límite) se mata el grupo y devuelve None.
+    """
+    proc = subprocess.Popen(
+        cmd,
+        cwd=base_dir,         # ejecuta dentro de la carpeta del job
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        start_new_session=os.name == "posix",  # grupo propio: se mata entero
+    )
+    timed_out = threading.Event()
+
+    def _expire() -> None:
+        if proc.poll() is None:
+            timed_out.set()
+            _kill_tree(proc)  # el pipe se cierra y el loop de lectura termina
+
+    timer = threading.Timer(timeout_s, _expire) if timeout_s > 0 else None
+    if timer is not None:
+        timer.daemon = True
+        timer.start()
+    parser = ManimOutputParser()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        with proc:
+            while True:
+                chunk = proc.stdout.read1(READ_CHUNK)
+                if not chunk:
+                    break
+                log.write(chunk)
+                if on_progress is not None:
+                    for event in parser.feed(decoder.decode(chunk)):
+                        on_progress(event)
+            if on_progress is not None:
+                for event in parser.close():
+                    on_progress(event)
+    finally:
+        if timer is not None:
+            timer.cancel()
+    if timed_out.is_set():
+        return None
+    return proc.returncode
+
+
+def _run_manim(base_dir: str, quality: str, on_progress: Optional[ProgressFn] = None) -> bool:
+    """
+    Corre Manim como subprocess: SpecScene sobre <base_dir>/scene.json
+    (en el pool acotado). Es el fallback de los workers calientes.
+    Deja el resultado en <base_dir>/video.mp4 y devuelve si hubo video;
+    la salida de Manim queda en <base_dir>/manim.log.
+    """
+    base_dir = Path(base_dir)
+
+    # Nombre de salida dentro de esa carpeta
+    output_name = "video.mp4"
+    output_path = base_dir / output_name
+
+    # ⚠️ IMPORTANTE:
+    # Se ejecuta con cwd=base_dir (media/ queda dentro del job); la escena
+    # es siempre la misma y el spec le llega por variable de entorno
+    env = {
+        **os.environ,
+        "SCENE_SPEC": str((base_dir / "scene.json").resolve()),
+        "GLYPH_CACHE_DIR": str(Path(settings.glyph_cache_dir).resolve()),
+        "GLYPH_CACHE_MAX_MB": str(settings.glyph_cache_max_mb),
+        "GLYPH_STATS": str((base_dir / "glyph_stats.json").resolve()),
+    }
+    args = [str(SCENE_RUNTIME), SPEC_SCENE, f"-q{quality}", "-o", output_name]
+
+    timeout_s = settings.render_timeout_s
+    with open(base_dir / "manim.log", "wb") as log:
+        try:
+            # Comando manim (intento 1: manim ...)
+            code = _stream_manim(["manim", *args], base_dir, env, log, on_progress, timeout_s)
+        except FileNotFoundError:
+            # Fallback: python -m manim ...
+            code = _stream_manim([sys.executable, "-m", "manim", *args], base_dir, env, log, on_progress, timeout_s)
+        if code is None:
+            # colgado: se mató y el render queda fallido (aunque haya dejado un video a medias)
+            log.write(f"\n[video_renderer] Manim superó RENDER_TIMEOUT_S={timeout_s:g}s y se cortó\n".encode("utf-8"))
+            metrics.inc("render_timeouts_total")
+            output_path.unlink(missing_ok=True)
+            return False
+
+    # Manim ignora la carpeta de -o y deja el archivo en
+    # media/videos/<modulo>/<resolucion>/video.mp4: lo subimos a la raíz del job
+    if not output_path.exists():
+        produced = next(base_dir.glob(f"media/videos/*/*/{output_name}"), None)
+        if produced is not None:
+            produced.replace(output_path)
+
+    return output_path.exists()
+
+
+def _render_dir(base_dir: Path, quality: str, on_progress: Optional[ProgressFn] = None) -> bool:
+    """
+    Renderiza <base_dir>/scene.json: primero en un worker caliente,
+    si no hay, con el subprocess de siempre.
+    """
+    ok = warm_pool.render(str(base_dir), quality, on_progress)
+    if ok is None:
+        ok = _executor().submit(_run_manim, str(base_dir), quality, on_progress).result()
+    _record_glyph_stats(base_dir)
+    return ok
+
+
+def _record_glyph_stats(base_dir: Path) -> None:
+    """
+    El render (en otro proceso) deja hits/misses de la caché de glifos en
+    glyph_stats.json: los pasamos a las métricas de este proceso.
+    """
+    stats_path = base_dir / "glyph_stats.json"
+    try:
+        stats = json.loads(stats_path.read_text(encoding="utf-8"))
+        stats_path.unlink()
+    except (OSError, ValueError):
+        return
+    for result, field in (("hit", "hits"), ("miss", "misses")):
+        if stats.get(field):
+            metrics.inc("glyph_cache_total", amount=stats[field], result=result)
+    if stats.get("evictions"):
+        metrics.inc("glyph_cache_evictions_total", amount=stats["evictions"])
+
+
+def _with_context(on_progress: Optional[ProgressFn], **context) -> Optional[ProgressFn]:
+    # agrega a cada evento de progreso de qué segmento es y cuántas animaciones tiene
+    if on_progress is None:
+        return None
+    return lambda event: on_progress({**context, **event})
+
+
+def _coalesced(
+    key: str, dest: Path, render: Callable[[], Optional[Path]], on_progress: Optional[ProgressFn]
+) -> bool:
+    """
+    Corre render() (que deja el video en `dest` y devuelve su ruta, o
+    None si falló) salvo que otro job ya esté renderizando la misma clave:
+    en ese caso espera y enlaza en `dest` lo que produjo el otro.
+    """
+    if on_progress is not None and _render_flight.running(key):
+        on_progress({"coalesced": True})
+    produced, shared = _render_flight.do(key, render)
+    if not shared:
+        return produced is not None
+    if produced is None:
+        return False
+    # preferimos la caché (el líder ya la llenó); si no está, su propio archivo
+    src = render_cache.get(key) or produced
+    try:
+        link_or_copy(src, dest)
+    except OSError:
+        return False
+    return True
+
+
+def _render_segment(
+    seg_dir: Path, spec: str, key: str, quality: str, on_progress: Optional[ProgressFn] = None
+) -> bool:
+    clip = seg_dir / "video.mp4"
+
+    def render() -> Optional[Path]:
+        atomic_write(seg_dir / "scene.json", spec.encode("utf-8"))
+        with metrics.timed("render_segment"):
+            ok = _render_dir(seg_dir, quality, on_progress)
+        if not ok:
+            return None
+        render_cache.put(key, clip)
+        return clip
+
+    return _coalesced(key, clip, render, on_progress)
+
+
+def _segment_parallelism() -> int:
+    # los procesos reales los acotan los pools (workers calientes / subprocess)
+    return max(settings.warm_render_workers, settings.render_workers, 1)
+
+
+def _render_segments(
+    segments: List[Dict], quality: str, base_dir: Path, on_progress: Optional[ProgressFn] = None
+) -> Optional[bool]:
+    """
+    Cada segmento sale de la caché de renders o se renderiza solo (en
+    <base_dir>/segments/NN_nombre/); los que faltan se renderizan en
+    paralelo, uno por proceso. Después se concatenan sin re-codificar en
+    <base_dir>/video.mp4 (mismo video, frame a frame, que en secuencia).
+
+    True: video listo. False: falló el render de un segmento.
+    None: no se pudo concatenar (sin ffmpeg/PyAV) -> render de la escena entera.
+    """
+    seg_root = base_dir / "segments"
+    clips, missing = [], []
+    for i, segment in enumerate(segments):
+        seg_dir = seg_root / f"{i:02d}_{segment['name']}"
+        seg_dir.mkdir(parents=True, exist_ok=True)
+        clip = seg_dir / "video.mp4"
+        clips.append(clip)
+        report = on_progress and _with_context(
+            on_progress,
+            segment=segment["name"],
+            segment_index=i + 1,
+            segments=len(segments),
+            animations=spec_animations(segment["spec"]),
+        )
+
+        key = render_key(segment["spec"], SPEC_SCENE, quality)
+        cached = render_cache.get(key)
+        try:
+            if cached is not None:
+                # copia local: que la eviction no nos saque el clip a mitad del job
+                link_or_copy(cached, clip)
+                metrics.inc("render_segments_total", source="cache")
+                if report is not None:
+                    report({"cached": True})
+                continue
+        except OSError:
+            pass
+        missing.append((seg_dir, segment["spec"], key, quality, report))
+
+    if missing:
+        workers = min(len(missing), _segment_parallelism())
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="segment") as pool:
+            pending = {pool.submit(_render_segment, *m) for m in missing}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                if not all(f.result() for f in done):
+                    # un segmento falló: los que no arrancaron ya no hacen falta
+                    for f in pending:
+                        f.cancel()
+                    return False
+        metrics.inc("render_segments_total", amount=len(missing), source="rendered")
+
+    with metrics.timed("concat"):
+        ok = concat_videos(clips, base_dir / "video.mp4")
+    if not ok:
+        return None
+    shutil.rmtree(seg_root, ignore_errors=True)
+    return True
 
 
 def render_video(
-    manim_code: str,
-    scene_name: str = "SolutionScene",
+    scene_spec: str,
     quality: str = "l",
+    job_id: Optional[str] = None,
+    segments: Optional[List[Dict]] = None,
+    out_dir: Optional[Path] = None,
+    background: bool = False,
+    on_progress: Optional[ProgressFn] = None,
 ) -> tuple[str, str]:
     """
-    Renderiza un video de Manim de verdad.
+    Renderiza un video de Manim de verdad: SpecScene sobre `scene_spec`
+    (manim_generator.build_scene_spec).
+    Si viene job_id (la cola ya lo asignó) se usa ese; si no, se genera uno.
+
+    Si ya renderizamos exactamente este spec (y calidad), se reutiliza el
+    video de la caché sin lanzar Manim.
+
+    Con `segments` (manim_generator.generate_segments) se renderiza por
+    segmentos: solo los que no están en caché cuestan tiempo de Manim.
+
+    `out_dir` cambia la carpeta de trabajo (por defecto la del job) y
+    `background=True` marca los renders de mejora de calidad, que no
+    cuentan en active_renders().
+
+    `on_progress` recibe eventos a medida que Manim avanza: animación i
+    de n, frames (si corre por subprocess) y segmento actual.
 
     Devuelve:
     - video_path (str)
     - job_id (str)
     """
 
-    # 1. Crear carpeta del job
-    job_id = str(uuid.uuid4())[:8]
-    base_dir = Path("app/storage/local_store") / job_id
-    base_dir.mkdir(parents=True, exist_ok=True)
+    global _active_renders
+    if background:
+        return _render_video(scene_spec, quality, job_id, segments, out_dir, on_progress)
+    with _active_lock:
+        _active_renders += 1
+    try:
+        return _render_video(scene_spec, quality, job_id, segments, out_dir, on_progress)
+    finally:
+        with _active_lock:
+            _active_renders -= 1
 
-    # 2. Guardar el código
-    manim_file = base_dir / "manim_code.py"
-    manim_file.write_text(manim_code, encoding="utf-8")
 
-    # 3. Nombre de salida dentro de esa carpeta
-    output_name = "video.mp4"
-    output_path = base_dir / output_name
+def _render_video(
+    scene_spec: str,
+    quality: str,
+    job_id: Optional[str],
+    segments: Optional[List[Dict]],
+    out_dir: Optional[Path],
+    on_progress: Optional[ProgressFn],
+) -> tuple[str, str]:
+    # 1. Crear carpeta del job
+    job_id = job_id or str(uuid.uuid4())[:8]
+    base_dir = Path(out_dir) if out_dir is not None else job_dir(job_id)
+    base_dir.mkdir(parents=True, exist_ok=True)
+    output_path = base_dir / "video.mp4"
 
-    # ⚠️ IMPORTANTE:
-    # Como vamos a ejecutar con cwd=base_dir,
-    # al comando le pasamos SOLO el nombre del archivo: "manim_code.py"
-    manim_input_name = "manim_code.py"
-
-    # 4. Comando manim (intento 1: manim ...)
-    manim_cmd = [
-        "manim",
-        manim_input_name,       # NO ruta absoluta
-        scene_name,
-        f"-q{quality}",
-        "-o",
-        output_name,
-    ]
+    # 2. ¿Ya existe este video en la caché?
+    key = render_key(scene_spec, SPEC_SCENE, quality)
+    cached = render_cache.get(key)
+    if cached is not None:
+        try:
+            link_or_copy(cached, output_path)
+            return str(output_path), job_id
+        except OSError:
+            # sin link ni copia el video no queda en la carpeta del job (y
+            # /videos/{job_id} no lo encontraría): se trata como un miss
+            pass
 
-    try:
-        completed = subprocess.run(
-            manim_cmd,
-            cwd=base_dir,         # ejecuta dentro de la carpeta del job
-            capture_output=True,
-            text=True,
-            check=False,
-        )
-    except FileNotFoundError:
-        # 5. Fallback: python -m manim ...
-        manim_cmd = [
-            sys.executable,
-            "-m",
-            "manim",
-            manim_input_name,
-            scene_name,
-            f"-q{quality}",
-            "-o",
-            output_name,
-        ]
-        completed = subprocess.run(
-            manim_cmd,
-            cwd=base_dir,
-            capture_output=True,
-            text=True,
-            check=False,
-        )
+    # 3. Renderizar (si otro job ya está renderizando este mismo spec,
+    #    se espera ese video en vez de lanzar Manim otra vez)
+    def render() -> Optional[Path]:
+        # el spec se guarda antes (Manim lo lee ya: escritura sincrónica, una
+        # sola vez); por segmentos si se puede, si no, la escena entera
+        atomic_write(base_dir / "scene.json", scene_spec.encode("utf-8"))
+        with metrics.timed("render"):
+            ok = None
+            if segments and settings.segment_render:
+                ok = _render_segments(segments, quality, base_dir, on_progress)
+            if ok is None:
+                report = on_progress and _with_context(on_progress, animations=spec_animations(scene_spec))
+                ok = _render_dir(base_dir, quality, report)
+        if not ok:
+            return None
+        # moov al principio (los segmentos concatenados ya salen así): el
+        # cliente reproduce mientras descarga; si no hay con qué remuxear, queda igual
+        with metrics.timed("faststart"):
+            faststart(output_path)
+        render_cache.put(key, output_path)
+        return output_path
 
-    # 6. Verificar que el video exista
-    if not output_path.exists():
-        # guardar logs para depurar
-        (base_dir / "manim_stdout.log").write_text(completed.stdout or "", encoding="utf-8")
-        (base_dir / "manim_stderr.log").write_text(completed.stderr or "", encoding="utf-8")
+    ok = _coalesced(key, output_path, render, on_progress)
 
+    # 4. Verificar que el video exista
+    if not ok:
+        metrics.inc("render_failures_total")
         # para no romper el flujo:
         (base_dir / "RENDER_FAILED.txt").write_text(
-            "Manim no generó el video. Revisa manim_stdout.log y manim_stderr.log",
+            "Manim no generó el video. Revisa manim.log "
+            "(dentro de segments/ si falló un segmento)",
             encoding="utf-8",
         )
         return str(base_dir / "RENDER_FAILED.txt"), job_id
@@ -0,0 +1,249 @@
+# app/storage/artifact_store.py
+"""
+Almacén de artefactos de jobs con presupuesto de bytes y de antigüedad.
+
+- Layout con shards: <storage_dir>/<2 primeros chars del job_id>/<job_id>/
+  (ningún directorio junta millones de entradas).
+- Compactación post-render: de un job exitoso quedan solo video.mp4,
+  scene.json, manim_code.py y metadata.json (media/, partial_movie_files
+  y segments/ se borran).
+- Eviction LRU por bytes (STORAGE_MAX_MB) y por edad (STORAGE_MAX_AGE_DAYS),
+  en un hilo de fondo y de a poco: nunca en el camino del request.
+- El orden LRU es el mtime del directorio del job (touch() al consultarlo),
+  así sobrevive reinicios.
+"""
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from ..config import settings
+from ..services import metrics
+
+# lo único que sobrevive a la compactación de un job exitoso
+KEEP_AFTER_COMPACTION = {"video.mp4", "scene.json", "manim_code.py", "metadata.json"}
+
+# un job sin metadata (a medio hacer) solo se considera abandonado pasado esto
+ABANDONED_AFTER_S = 24 * 3600
+
+# cuántos jobs borra como mucho cada pasada del hilo de fondo
+EVICTIONS_PER_SWEEP = 200
+
+
+def dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class ArtifactStore:
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        max_bytes: int = 0,
+        max_age_s: float = 0,
+        sweep_interval_s: float = 60,
+    ):
+        # root=None: se lee settings.storage_dir en cada uso (tests/bench lo cambian)
+        self._root = root
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.sweep_interval_s = sweep_interval_s
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()  # job_id -> (bytes, último uso)
+        self._total_bytes = 0
+        self._legacy_paths: Dict[str, Path] = {}  # jobs del layout viejo, sin shard
+        self._scanned = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def root(self) -> Path:
+        return Path(self._root or settings.storage_dir)
+
+    def job_dir(self, job_id: str) -> Path:
+        return self.root / job_id[:2] / job_id
+
+    # --- ciclo de vida de un job ---
+
+    def compact(self, job_id: str) -> int:
+        """
+        Deja solo el video final, el spec, el código y la metadata. Devuelve los bytes liberados.
+        Si no hay video (render fallido) no toca nada: los logs sirven.
+        """
+        base_dir = self.job_dir(job_id)
+        if not (base_dir / "video.mp4").exists():
+            return 0
+
+        freed = 0
+        for entry in base_dir.iterdir():
+            if entry.name in KEEP_AFTER_COMPACTION:
+                continue
+            if entry.is_dir() and not entry.is_symlink():
+                freed += dir_size(entry)
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                try:
+                    freed += entry.lstat().st_size
+                    entry.unlink()
+                except OSError:
+                    pass
+        return freed
+
+    def record(self, job_id: str) -> None:
+        """
+        Suma un job terminado al presupuesto (lo más reciente en el LRU).
+        """
+        size = dir_size(self.job_dir(job_id))
+        with self._lock:
+            self._forget(job_id)
+            self._entries[job_id] = (size, time.time())
+            self._total_bytes += size
+
+    def touch(self, job_id: str) -> None:
+        """
+        Marca un job como usado (sube en el LRU).
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is None:
+                return
+            self._entries[job_id] = (entry[0], now)
+            self._entries.move_to_end(job_id)
+        try:
+            os.utime(self.job_dir(job_id), (now, now))
+        except OSError:
+            pass
+
+    def _forget(self, job_id: str) -> None:
+        entry = self._entries.pop(job_id, None)
+        if entry is not None:
+            self._total_bytes -= entry[0]
+
+    # --- índice y eviction (hilo de fondo) ---
+
+    def iter_job_dirs(self) -> Iterator[Tuple[str, Path]]:
+        if not self.root.exists():
+            return
+        for shard in self.root.iterdir():
+            if not shard.is_dir():
+                continue
+            if len(shard.name) == 2:
+                for job in shard.iterdir():
+                    if job.is_dir():
+                        yield job.name, job
+            else:
+                # layout viejo sin shards: <storage_dir>/<job_id>/
+                yield shard.name, shard
+
+    def scan(self) -> None:
+        """
+        Reconstruye el índice LRU desde disco (una vez, desde el hilo de fondo).
+        """
+        now = time.time()
+        found = []
+        for job_id, path in self.iter_job_dirs():
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            finished = (path / "metadata.json").exists() or (path / "RENDER_FAILED.txt").exists()
+            if not finished and now - mtime < ABANDONED_AFTER_S:
+                continue  # job en curso
+            found.append((mtime, job_id, dir_size(path), path))
+
+        with self._lock:
+            for mtime, job_id, size, path in found:
+                if job_id in self._entries:
+                    continue
+                self._entries[job_id] = (size, mtime)
+                self._total_bytes += size
+                if path != self.job_dir(job_id):
+                    self._legacy_paths[job_id] = path
+            # orden LRU por último uso (lo que record() sumó mientras tanto queda al final)
+            self._entries = OrderedDict(sorted(self._entries.items(), key=lambda kv: kv[1][1]))
+            self._scanned = True
+
+    def sweep(self, limit: int = EVICTIONS_PER_SWEEP) -> int:
+        """
+        Borra jobs vencidos y, si el total pasa el presupuesto, los menos
+        usados. Como mucho `limit` por pasada. Devuelve cuántos borró.
+        """
+        now = time.time()
+        victims = []
+        with self._lock:
+            while self._entries and len(victims) < limit:
+                job_id, (size, last_used) = next(iter(self._entries.items()))
+                expired = self.max_age_s > 0 and now - last_used > self.max_age_s
+                over_budget = self.max_bytes > 0 and self._total_bytes > self.max_bytes
+                if not (expired or over_budget):
+                    break
+                self._forget(job_id)
+                victims.append((job_id, self._legacy_paths.pop(job_id, None) or self.job_dir(job_id)))
+            self.evictions += len(victims)
+
+        # el borrado en disco (y en el catálogo), fuera del lock
+        for _, path in victims:
+            shutil.rmtree(path, ignore_errors=True)
+        if victims:
+            from .job_index import job_index
+            job_index.remove(job_id for job_id, _ in victims)
+        return len(victims)
+
+    def _loop(self) -> None:
+        self.scan()
+        while not self._stop.is_set():
+            try:
+                while self.sweep() == EVICTIONS_PER_SWEEP and not self._stop.is_set():
+                    pass
+            except Exception:
+                pass  # best-effort: lo reintenta la próxima pasada
+            self._stop.wait(self.sweep_interval_s)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="artifact-eviction", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "jobs": len(self._entries),
+                "bytes": self._total_bytes,
+                "evictions": self.evictions,
+                "scanned": self._scanned,
+            }
+
+
+artifact_store = ArtifactStore(
+    max_bytes=settings.storage_max_mb * 1024 * 1024,
+    max_age_s=settings.storage_max_age_days * 86400,
+    sweep_interval_s=settings.storage_sweep_interval_s,
+)
+
+
+def job_dir(job_id: str) -> Path:
+    return artifact_store.job_dir(job_id)
+
+
+metrics.register_collector("storage_bytes", "gauge", "Bytes ocupados por los jobs guardados.", lambda: artifact_store.stats()["bytes"])
+metrics.register_collector("storage_jobs", "gauge", "Jobs guardados en disco.", lambda: artifact_store.stats()["jobs"])
+metrics.register_collector("storage_evictions_total", "counter", "Jobs borrados por tamaño o antigüedad.", lambda: artifact_store.evictions)
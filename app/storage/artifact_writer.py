@@ -0,0 +1,215 @@
+# app/storage/artifact_writer.py
+"""
+Escritor único de artefactos, fuera del hilo del request.
+
+- Cada archivo se escribe una sola vez, en un .tmp que después se
+  renombra (os.replace): un crash nunca deja un metadata.json a medias.
+- Los fsync van por lotes: el hilo junta lo que llegó en una ventana
+  corta, escribe todo, hace fsync de cada archivo y una sola vez de cada
+  carpeta, y recién ahí renombra (group commit).
+- Cada submit es independiente dentro del lote: si falla uno, los demás
+  se escriben igual y corren su on_done. Si dos submits del mismo lote
+  tocan la misma ruta, gana el último (se renombra en orden).
+- submit() vuelve enseguida; on_done corre en el hilo escritor cuando
+  los archivos ya están en disco (p.ej. para indexar el job). El Event
+  que devuelve se marca cuando ese submit terminó (bien o mal): sirve
+  para esperar solo lo propio, no toda la cola como flush().
+"""
+import itertools
+import os
+import queue
+import threading
+import traceback
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+
+BATCH_SIZE = 64
+BATCH_WINDOW_S = 0.05
+
+_tmp_seq = itertools.count()
+
+
+def _tmp_path(path: Path) -> Path:
+    # único por escritura: dos submits de la misma ruta no comparten el .tmp
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.{next(_tmp_seq)}.tmp")
+
+
+def _discard(tmps: List[Path]) -> None:
+    for tmp in tmps:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # p.ej. Windows no abre carpetas
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: Path, data: bytes, fsync: bool = False) -> None:
+    """
+    Escritura sincrónica tmp + rename (para lo que se necesita ya, como el
+    manim_code.py que va a leer Manim).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_path(path)
+    with open(tmp, "wb") as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class ArtifactWriter:
+    def __init__(self, fsync: bool = True, batch_size: int = BATCH_SIZE, batch_window_s: float = BATCH_WINDOW_S):
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.batch_window_s = batch_window_s
+        self.batches = 0
+        self.files_written = 0
+        self._queue: "queue.Queue[Optional[Tuple[Dict[Path, bytes], Optional[Callable], threading.Event]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="artifact-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, files: Dict[Path, bytes], on_done: Optional[Callable[[], None]] = None) -> threading.Event:
+        """
+        Encola archivos {ruta: bytes}; no espera al disco.
+        """
+        done = threading.Event()
+        self._ensure_thread()
+        self._queue.put((files, on_done, done))
+        return done
+
+    def flush(self) -> None:
+        """
+        Espera a que todo lo encolado esté escrito (tests, apagado).
+        """
+        if self._thread is not None:
+            self._queue.join()
+
+    def shutdown(self) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=30)
+        self._thread = None
+
+    def _next_batch(self) -> Tuple[List, bool]:
+        item = self._queue.get()
+        if item is None:
+            self._queue.task_done()
+            return [], True
+        batch = [item]
+        stop = False
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=self.batch_window_s)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.task_done()
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    def _stage(self, files: Dict[Path, bytes]) -> Optional[List[Tuple[Path, Path]]]:
+        """
+        Escribe los .tmp de un submit; None (y sin .tmp sueltos) si falló.
+        """
+        pending: List[Tuple[Path, Path]] = []  # (tmp, destino)
+        try:
+            for path, data in files.items():
+                path = Path(path)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = _tmp_path(path)
+                pending.append((tmp, path))
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+        except OSError:
+            traceback.print_exc()
+            _discard([tmp for tmp, _ in pending])
+            return None
+        return pending
+
+    def _write_batch(self, batch: List) -> None:
+        """
+        batch: [(archivos, on_done, done)]; `done` (Event o None) se marca
+        apenas termina ese submit, sin esperar a los callbacks de los demás.
+        """
+        staged = [self._stage(files) for files, _, _ in batch]
+
+        committed = []
+        dirs = set()
+        for (_, on_done, done_event), pending in zip(batch, staged):
+            if pending is None:
+                if done_event is not None:
+                    done_event.set()
+                continue
+            done = 0
+            try:
+                for tmp, path in pending:
+                    os.replace(tmp, path)
+                    done += 1
+            except OSError:
+                traceback.print_exc()
+                _discard([tmp for tmp, _ in pending[done:]])
+                if done_event is not None:
+                    done_event.set()
+                continue
+            dirs.update(path.parent for _, path in pending)
+            self.files_written += len(pending)
+            committed.append((on_done, done_event))
+
+        if self.fsync:
+            # una sola vez por carpeta: los renombres quedan persistidos
+            for d in dirs:
+                _fsync_dir(d)
+        self.batches += 1
+
+        for on_done, done_event in committed:
+            try:
+                if on_done is not None:
+                    on_done()
+            except Exception:
+                traceback.print_exc()
+            finally:
+                if done_event is not None:
+                    done_event.set()
+
+    def _loop(self) -> None:
+        while True:
+            batch, stop = self._next_batch()
+            if batch:
+                try:
+                    self._write_batch(batch)
+                finally:
+                    for _, _, done in batch:
+                        done.set()  # ya marcado, salvo que _write_batch haya reventado
+                        self._queue.task_done()
+            if stop:
+                return
+
+
+artifact_writer = ArtifactWriter(fsync=settings.artifact_fsync)
@@ -0,0 +1,233 @@
+# app/storage/job_index.py
+"""
+Catálogo de jobs en SQLite (embebido, un archivo junto al almacén).
+
+Antes, buscar jobs por ecuación, tipo o fecha era recorrer todos los
+metadata.json. Ahora cada job suma una fila apenas su metadata queda en
+disco (el escritor de artefactos la agrega), y GET /jobs consulta con índices:
+
+- orden: más recientes primero, (created_at, job_id) como clave estable
+- filtros: status, problem_type, validated, equation, problem_text,
+  rango de fechas. `equation` es la forma canónica del solver
+  (latex_clean): solo la tienen los jobs que llegaron a resolverse.
+  `problem_text` es lo que mandó el usuario, tal cual: la tienen todos,
+  también los que fallaron antes de resolver
+- paginación por cursor (keyset): cada página es O(log n) aunque haya
+  millones de filas, sin OFFSET
+
+rebuild_from_disk() reconstruye el índice leyendo los metadata.json
+(p.ej. si se borró el archivo o viene de una versión anterior). Los jobs
+que fallaron antes del render no tienen carpeta (save_failure solo
+escribe en el catálogo), así que un rebuild no los recupera:
+
+  python -m app.storage.job_index rebuild
+"""
+import base64
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id         TEXT PRIMARY KEY,
+    created_at     REAL NOT NULL,
+    status         TEXT NOT NULL,
+    equation       TEXT,
+    problem_text   TEXT,
+    problem_type   TEXT,
+    validated      INTEGER,
+    solution       TEXT,
+    render_s       REAL,
+    video_path     TEXT,
+    metadata_path  TEXT,
+    artifact_bytes INTEGER,
+    error          TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at, job_id);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at, job_id);
+CREATE INDEX IF NOT EXISTS jobs_type ON jobs (problem_type, created_at, job_id);
+CREATE INDEX IF NOT EXISTS jobs_validated ON jobs (validated, created_at, job_id);
+CREATE INDEX IF NOT EXISTS jobs_equation ON jobs (equation, created_at, job_id);
+CREATE INDEX IF NOT EXISTS jobs_problem_text ON jobs (problem_text, created_at, job_id);
+"""
+
+COLUMNS = (
+    "job_id", "created_at", "status", "equation", "problem_text", "problem_type", "validated",
+    "solution", "render_s", "video_path", "metadata_path", "artifact_bytes", "error",
+)
+
+MAX_PAGE = 500
+
+
+def _encode_cursor(created_at: float, job_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created_at!r}|{job_id}".encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        created_at, job_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return float(created_at), job_id
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"cursor inválido: {cursor!r}") from e
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict:
+    item = dict(row)
+    item["solution"] = json.loads(item["solution"]) if item["solution"] else None
+    item["validated"] = None if item["validated"] is None else bool(item["validated"])
+    return item
+
+
+class JobIndex:
+    def __init__(self, path: Optional[str] = None):
+        # path=None: <storage_dir>/jobs.sqlite3, leído en cada uso (tests/bench cambian storage_dir)
+        self._path = path
+        self._local = threading.local()
+
+    @property
+    def path(self) -> Path:
+        return Path(self._path or settings.job_index_path or Path(settings.storage_dir) / "jobs.sqlite3")
+
+    def _conn(self) -> sqlite3.Connection:
+        """
+        Una conexión por hilo (y por archivo); WAL: lectores y escritor no se bloquean.
+        """
+        path = str(self.path)
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        conn = conns.get(path)
+        if conn is None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            conns[path] = conn
+        return conn
+
+    def upsert(self, job: Dict) -> None:
+        self.upsert_many([job])
+
+    def upsert_many(self, jobs: Iterable[Dict]) -> None:
+        rows = []
+        for job in jobs:
+            row = {col: job.get(col) for col in COLUMNS}
+            row["created_at"] = row["created_at"] or time.time()
+            if row["solution"] is not None:
+                row["solution"] = json.dumps(row["solution"], ensure_ascii=False)
+            if row["validated"] is not None:
+                row["validated"] = int(bool(row["validated"]))
+            rows.append(row)
+
+        conn = self._conn()
+        with conn:  # una transacción
+            conn.executemany(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join(':' + c for c in COLUMNS)})",
+                rows,
+            )
+
+    def remove(self, job_ids: Iterable[str]) -> None:
+        conn = self._conn()
+        with conn:
+            conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(j,) for j in job_ids])
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        row = self._conn().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return _row_to_dict(row) if row is not None else None
+
+    def query(
+        self,
+        status: Optional[str] = None,
+        problem_type: Optional[str] = None,
+        validated: Optional[bool] = None,
+        equation: Optional[str] = None,
+        problem_text: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Devuelve (jobs, next_cursor). next_cursor es None en la última página.
+        """
+        where, params = [], []
+        filters = (
+            ("status", status), ("problem_type", problem_type),
+            ("equation", equation), ("problem_text", problem_text),
+        )
+        for col, value in filters:
+            if value is not None:
+                where.append(f"{col} = ?")
+                params.append(value)
+        if validated is not None:
+            where.append("validated = ?")
+            params.append(int(validated))
+        if since is not None:
+            where.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("created_at < ?")
+            params.append(until)
+        if cursor:
+            where.append("(created_at, job_id) < (?, ?)")
+            params.extend(_decode_cursor(cursor))
+
+        limit = max(1, min(limit, MAX_PAGE))
+        sql = "SELECT * FROM jobs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, job_id DESC LIMIT ?"
+        rows = self._conn().execute(sql, (*params, limit + 1)).fetchall()
+
+        items = [_row_to_dict(r) for r in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = _encode_cursor(last["created_at"], last["job_id"])
+        return items, next_cursor
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def rebuild_from_disk(self) -> int:
+        """
+        Re-indexa todos los jobs con metadata.json. Devuelve cuántos indexó.
+        Los "failed" (sin carpeta) no están en disco y no vuelven.
+        """
+        from .artifact_store import artifact_store
+        from .save_artifacts import index_row
+
+        batch, total = [], 0
+        for job_id, path in artifact_store.iter_job_dirs():
+            meta_path = path / "metadata.json"
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            batch.append(index_row(job_id, path, meta, created_at=meta.get("created_at") or meta_path.stat().st_mtime))
+            if len(batch) >= 1000:
+                self.upsert_many(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            self.upsert_many(batch)
+            total += len(batch)
+        return total
+
+
+job_index = JobIndex()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        raise SystemExit("uso: python -m app.storage.job_index rebuild")
+    print(f"{job_index.rebuild_from_disk()} jobs indexados en {job_index.path}")
@@ -1,23 +1,131 @@
 # app/storage/save_artifacts.py
-from pathlib import Path
 import json
-from typing import Dict, List
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .artifact_store import artifact_store, dir_size, job_dir
+from .artifact_writer import artifact_writer
+from .job_index import job_index
+
+# última escritura encolada de cada job que todavía no terminó
+_pending_writes: Dict[str, threading.Event] = {}
+_pending_lock = threading.Lock()
+
+
+def _track_write(job_id: str, done: threading.Event) -> None:
+    with _pending_lock:
+        for old_id in [j for j, e in _pending_writes.items() if e.is_set()]:
+            del _pending_writes[old_id]
+        _pending_writes[job_id] = done
+
+
+def index_row(job_id: str, base_dir: Path, meta: Dict, created_at: float) -> Dict:
+    """
+    Fila del catálogo (job_index) a partir de la metadata de un job.
+    """
+    video = base_dir / "video.mp4"
+    return {
+        "job_id": job_id,
+        "created_at": created_at,
+        "status": meta.get("status") or ("done" if video.exists() else "render_failed"),
+        "equation": meta.get("latex"),
+        "problem_text": meta.get("problem_text"),
+        "problem_type": meta.get("problem_type"),
+        "validated": meta.get("validated"),
+        "solution": meta.get("solution"),
+        "render_s": meta.get("render_s"),
+        "video_path": str(video) if video.exists() else None,
+        "metadata_path": str(base_dir / "metadata.json"),
+        "artifact_bytes": dir_size(base_dir),
+        "error": meta.get("error"),
+    }
+
 
-def save_artifacts(job_id: str, latex: str, solution: List[str], steps: List[Dict], manim_code: str) -> str:
+def save_artifacts(
+    job_id: str,
+    latex: str,
+    solution: List[str],
+    steps: List[Dict],
+    manim_code: str,
+    scene_spec: Optional[str] = None,
+    problem_type: Optional[str] = None,
+    validated: Optional[bool] = None,
+    render_s: Optional[float] = None,
+    video_quality: Optional[str] = None,
+    video_tier: Optional[str] = None,
+    problem_text: Optional[str] = None,
+) -> str:
     """
-    Guarda los artefactos de un job en disco.
-    Devuelve el directorio base.
+    Encola la metadata del job en el escritor de artefactos y vuelve sin
+    esperar al disco. Cuando está escrita, el job entra al catálogo y al
+    presupuesto del almacén. Devuelve el directorio base.
+
+    Ni el spec ni el código van dentro de la metadata: scene.json (lo que
+    se renderizó; render_video ya lo escribió salvo que el video saliera de
+    la caché) y manim_code.py (la exportación en Python, para depurar).
     """
-    base_dir = Path("app/storage/local_store") / job_id
-    base_dir.mkdir(parents=True, exist_ok=True)
+    base_dir = job_dir(job_id)
 
+    created_at = time.time()
     data = {
         "latex": latex,
+        "problem_text": problem_text,
         "solution": solution,
         "steps": steps,
-        "manim_code": manim_code
+        "problem_type": problem_type,
+        "validated": validated,
+        "render_s": render_s,
+        "video_quality": video_quality,
+        "video_tier": video_tier,
+        "created_at": created_at,
     }
 
-    (base_dir / "metadata.json").write_text(json.dumps(data, indent=2), encoding="utf-8")
+    files = {base_dir / "metadata.json": json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")}
+    files[base_dir / "manim_code.py"] = manim_code.encode("utf-8")
+    if scene_spec is not None and not (base_dir / "scene.json").exists():
+        files[base_dir / "scene.json"] = scene_spec.encode("utf-8")
+
+    def _committed() -> None:
+        job_index.upsert(index_row(job_id, base_dir, data, created_at))
+        artifact_store.record(job_id)
 
+    _track_write(job_id, artifact_writer.submit(files, on_done=_committed))
     return str(base_dir)
+
+
+def update_metadata(job_id: str, **fields) -> None:
+    """
+    Reescribe la metadata de un job con algunos campos cambiados (p.ej. la
+    calidad del video después de la mejora) y refresca catálogo y presupuesto.
+    """
+    base_dir = job_dir(job_id)
+    with _pending_lock:
+        pending = _pending_writes.get(job_id)
+    if pending is not None:
+        pending.wait()  # que la metadata original ya esté en disco (solo la de este job)
+    meta_path = base_dir / "metadata.json"
+    try:
+        data = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    data.update(fields)
+
+    def _committed() -> None:
+        job_index.upsert(index_row(job_id, base_dir, data, data.get("created_at") or time.time()))
+        artifact_store.record(job_id)
+
+    _track_write(job_id, artifact_writer.submit(
+        {meta_path: json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")},
+        on_done=_committed,
+    ))
+
+
+def save_failure(job_id: str, problem_text: str, error: str) -> None:
+    """
+    Jobs que fallaron antes del render (sin carpeta): solo van al catálogo.
+    Sin forma canónica (el solver no llegó a darla): equation queda vacía y
+    el texto original va en problem_text, como en los jobs exitosos.
+    """
+    job_index.upsert({"job_id": job_id, "status": "failed", "problem_text": problem_text, "error": error})
@@ -0,0 +1,69 @@
+import os
+import time
+
+import pytest
+
+from app.config import settings
+from app.storage.artifact_store import ArtifactStore
+
+
+@pytest.fixture(autouse=True)
+def _isolated_index(tmp_path, monkeypatch):
+    # la eviction también borra filas del catálogo (vive en storage_dir)
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+
+
+def _job(store, job_id, size=10, video=True):
+    base = store.job_dir(job_id)
+    (base / "media" / "videos" / "partial_movie_files").mkdir(parents=True)
+    (base / "media" / "videos" / "partial_movie_files" / "p0.mp4").write_bytes(b"p" * 100)
+    (base / "manim_code.py").write_text("code", encoding="utf-8")
+    (base / "metadata.json").write_text("{}", encoding="utf-8")
+    if video:
+        (base / "video.mp4").write_bytes(b"v" * size)
+    return base
+
+
+def test_sharded_layout_and_compaction(tmp_path):
+    store = ArtifactStore(root=str(tmp_path))
+    base = _job(store, "abcd1234")
+    assert base == tmp_path / "ab" / "abcd1234"
+
+    assert store.compact("abcd1234") == 100
+    assert sorted(p.name for p in base.iterdir()) == ["manim_code.py", "metadata.json", "video.mp4"]
+
+    # render fallido: se conservan los intermedios para depurar
+    failed = _job(store, "ffff0000", video=False)
+    assert store.compact("ffff0000") == 0
+    assert (failed / "media").exists()
+
+
+def test_sweep_evicts_lru_over_budget(tmp_path):
+    store = ArtifactStore(root=str(tmp_path), max_bytes=40)  # 3 jobs de 16 bytes
+    for job_id in ("aa000001", "bb000002", "cc000003"):
+        _job(store, job_id)
+        store.compact(job_id)
+        store.record(job_id)
+    store.touch("aa000001")  # el más viejo pasa a ser el más usado
+
+    assert store.sweep() == 1
+    assert not store.job_dir("bb000002").exists()
+    assert store.job_dir("aa000001").exists()
+    assert store.stats()["evictions"] == 1
+
+
+def test_scan_rebuilds_index_and_expires_old_jobs(tmp_path):
+    writer = ArtifactStore(root=str(tmp_path))
+    _job(writer, "aa000001")
+    old = tmp_path / "legacy01"  # layout viejo, sin shard
+    (old / "media").mkdir(parents=True)
+    (old / "metadata.json").write_text("{}", encoding="utf-8")
+    past = time.time() - 10 * 86400
+    os.utime(old, (past, past))
+
+    store = ArtifactStore(root=str(tmp_path), max_age_s=86400)
+    store.scan()
+    assert store.stats()["jobs"] == 2
+    assert store.sweep() == 1
+    assert not old.exists()
+    assert store.job_dir("aa000001").exists()
@@ -0,0 +1,81 @@
+import json
+
+from app.storage.artifact_writer import ArtifactWriter, atomic_write
+
+
+def test_writes_batch_atomically_then_calls_back(tmp_path):
+    writer = ArtifactWriter(fsync=True)
+    done = []
+    for i in range(5):
+        job = tmp_path / f"job{i}"
+        writer.submit({job / "metadata.json": json.dumps({"i": i}).encode()}, on_done=lambda i=i: done.append(i))
+    writer.flush()
+
+    assert sorted(done) == list(range(5))
+    assert json.loads((tmp_path / "job3" / "metadata.json").read_text()) == {"i": 3}
+    assert not list(tmp_path.rglob("*.tmp"))
+    assert writer.files_written == 5 and writer.batches <= 5
+    writer.shutdown()
+
+
+def test_failed_write_leaves_no_partial_file(tmp_path):
+    writer = ArtifactWriter(fsync=False)
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_text("x")
+    called = []
+    writer.submit({blocker / "metadata.json": b"{}"}, on_done=lambda: called.append(1))
+    writer.flush()
+    assert called == []
+    writer.shutdown()
+
+    atomic_write(tmp_path / "a" / "manim_code.py", b"code")
+    assert (tmp_path / "a" / "manim_code.py").read_bytes() == b"code"
+
+
+def test_one_failing_submit_does_not_drop_the_rest_of_the_batch(tmp_path):
+    writer = ArtifactWriter(fsync=False)
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_text("x")
+    done = []
+    batch = [
+        ({tmp_path / "m.json": b"A"}, lambda: done.append(1), None),
+        ({blocker / "metadata.json": b"{}"}, lambda: done.append(2), None),
+        ({tmp_path / "m.json": b"B"}, lambda: done.append(3), None),
+        ({tmp_path / "o.json": b"C"}, lambda: done.append(4), None),
+    ]
+    writer._write_batch(batch)
+
+    assert done == [1, 3, 4]
+    assert (tmp_path / "m.json").read_bytes() == b"B"  # gana el último submit
+    assert (tmp_path / "o.json").read_bytes() == b"C"
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_update_metadata_waits_only_for_its_own_job(tmp_path, monkeypatch):
+    import threading
+
+    from app.config import settings
+    from app.storage import save_artifacts as save_module
+
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+    writer = ArtifactWriter(fsync=False, batch_window_s=0)
+    monkeypatch.setattr(save_module, "artifact_writer", writer)
+    monkeypatch.setattr(save_module, "_pending_writes", {})
+
+    save_module.save_artifacts("own00001", "x = 1", ["x = 1"], [], "code")
+    release = threading.Event()
+    # otro job se queda colgado en el escritor: flush() no volvería nunca
+    writer.submit({tmp_path / "other.json": b"{}"}, on_done=release.wait)
+
+    finished = threading.Event()
+    threading.Thread(
+        target=lambda: (save_module.update_metadata("own00001", video_tier="full"), finished.set()), daemon=True
+    ).start()
+    try:
+        assert finished.wait(5)
+    finally:
+        release.set()
+    writer.flush()
+    meta = json.loads((save_module.job_dir("own00001") / "metadata.json").read_text())
+    assert meta["video_tier"] == "full"
+    writer.shutdown()
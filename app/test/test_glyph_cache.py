@@ -0,0 +1,83 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from app.services import metrics, video_renderer
+from app.services.glyph_cache import GlyphCache
+
+
+def _svg(tmp_path, name, size=100):
+    path = tmp_path / f"{name}.svg"
+    path.write_bytes(b"<svg>" + b"x" * (size - 5))
+    return path
+
+
+def test_fetch_store_roundtrip_and_counters(tmp_path):
+    cache = GlyphCache(str(tmp_path / "glyphs"), max_bytes=10**6)
+    key = ("text", "Regla: factorización", "sans", 26, "NORMAL")
+
+    assert not cache.fetch(key, tmp_path / "job1" / "a.svg")
+    cache.store(key, _svg(tmp_path, "a"))
+    assert cache.fetch(key, tmp_path / "job2" / "a.svg")
+    assert (tmp_path / "job2" / "a.svg").read_bytes().startswith(b"<svg>")
+    assert cache.path(key) != cache.path(("text", "Regla: factorización", "sans", 32, "NORMAL"))
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_concurrent_writers_leave_one_complete_file(tmp_path):
+    cache = GlyphCache(str(tmp_path / "glyphs"), max_bytes=10**6)
+    key = ("tex", "x^2", "align*", "")
+    src = _svg(tmp_path, "tex", size=5000)
+    threads = [threading.Thread(target=cache.store, args=(key, src)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert cache.path(key).read_bytes() == src.read_bytes()
+    assert not list((tmp_path / "glyphs").rglob("*.tmp"))
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = GlyphCache(str(tmp_path / "glyphs"), max_bytes=10**6)
+    for i in range(3):
+        cache.store(("text", i), _svg(tmp_path, str(i)))
+        os.utime(cache.path(("text", i)), (1000 + i, 1000 + i))
+    cache.fetch(("text", 0), tmp_path / "job" / "0.svg")  # el más viejo pasa a ser el más usado
+
+    cache.max_bytes = 250
+    assert cache.evict() == 1
+    assert not cache.path(("text", 1)).exists()
+    assert cache.path(("text", 0)).exists() and cache.path(("text", 2)).exists()
+
+
+def test_render_stats_reach_metrics(tmp_path):
+    metrics.reset(enable=True)
+    (tmp_path / "glyph_stats.json").write_text(json.dumps({"hits": 5, "misses": 2, "evictions": 0}))
+    video_renderer._record_glyph_stats(tmp_path)
+    text = metrics.render_prometheus()
+    assert 'glyph_cache_total{result="hit"} 5' in text
+    assert 'glyph_cache_total{result="miss"} 2' in text
+    assert not (tmp_path / "glyph_stats.json").exists()
+
+
+def test_first_store_does_not_scan_and_background_sweep_evicts(tmp_path, monkeypatch):
+    cache = GlyphCache(str(tmp_path / "glyphs"), max_bytes=10**6)
+    monkeypatch.setattr(cache, "evict", lambda: pytest.fail("escaneo en el primer store"))
+    for i in range(3):
+        cache.store(("text", i), _svg(tmp_path, str(i)))  # lejos del umbral: nadie recorre la caché
+    monkeypatch.undo()
+
+    cache.max_bytes = 250
+    evicted = []
+    cache.start(interval_s=0.01, on_evict=evicted.append)
+    try:
+        deadline = time.time() + 5
+        while not evicted and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        cache.stop()
+    assert evicted == [1]
+    assert len(list((tmp_path / "glyphs").rglob("*.svg"))) == 2
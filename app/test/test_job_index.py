@@ -0,0 +1,63 @@
+import json
+
+from app.storage.artifact_store import ArtifactStore
+from app.storage.job_index import JobIndex
+
+
+def test_filters_and_cursor_pagination(tmp_path):
+    index = JobIndex(path=str(tmp_path / "jobs.sqlite3"))
+    index.upsert_many(
+        {"job_id": f"job{i:03d}", "created_at": 1000.0 + i, "status": "done",
+         "problem_type": "quadratic" if i % 2 else "linear", "validated": i % 3 != 0,
+         "solution": [f"x = {i}"]}
+        for i in range(25)
+    )
+
+    seen, cursor = [], None
+    while True:
+        items, cursor = index.query(problem_type="quadratic", limit=5, cursor=cursor)
+        seen += [item["job_id"] for item in items]
+        if cursor is None:
+            break
+    assert seen == [f"job{i:03d}" for i in range(23, 0, -2)]
+
+    items, _ = index.query(validated=False, since=1010, limit=50)
+    assert [i["job_id"] for i in items] == ["job024", "job021", "job018", "job015", "job012"]
+    assert items[0]["solution"] == ["x = 24"] and items[0]["validated"] is False
+
+
+def test_rebuild_from_disk(tmp_path, monkeypatch):
+    from app.storage import artifact_store as store_module
+
+    store = ArtifactStore(root=str(tmp_path / "store"))
+    monkeypatch.setattr(store_module, "artifact_store", store)
+    base = store.job_dir("abcd0001")
+    base.mkdir(parents=True)
+    (base / "video.mp4").write_bytes(b"v" * 10)
+    (base / "metadata.json").write_text(json.dumps({
+        "latex": "2*x = 4", "solution": ["x = 2"], "problem_type": "linear", "validated": True, "created_at": 5.0,
+    }), encoding="utf-8")
+
+    index = JobIndex(path=str(tmp_path / "jobs.sqlite3"))
+    assert index.rebuild_from_disk() == 1
+    job = index.get("abcd0001")
+    assert job["status"] == "done" and job["equation"] == "2*x = 4" and job["created_at"] == 5.0
+    assert job["artifact_bytes"] > 10
+
+
+def test_problem_text_is_indexed_for_done_and_failed_jobs(tmp_path, monkeypatch):
+    from app.storage import save_artifacts as save_module
+
+    index = JobIndex(path=str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(save_module, "job_index", index)
+    base = tmp_path / "done0001"
+    base.mkdir()
+    index.upsert(save_module.index_row("done0001", base, {"latex": "2 x = 4", "problem_text": "2x=4"}, 1.0))
+    save_module.save_failure("fail0001", "2x=4", "boom")
+
+    items, _ = index.query(problem_text="2x=4")
+    assert {i["job_id"] for i in items} == {"done0001", "fail0001"}
+    items, _ = index.query(equation="2 x = 4")
+    assert [i["job_id"] for i in items] == ["done0001"]
+    assert index.get("fail0001")["equation"] is None
+
@@ -0,0 +1,136 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services import batch, job_queue
+from app.storage.artifact_writer import artifact_writer
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+    with TestClient(app) as c:
+        yield c
+    job_queue.shutdown()
+    batch.shutdown()
+
+
+def _wait_for(client, job_id, timeout=60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        body = client.get(f"/jobs/{job_id}").json()
+        if body["status"] in ("done", "failed"):
+            return body
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} no terminó a tiempo")
+
+
+def test_solve_returns_queued_job(client):
+    resp = client.post("/solve", json={"problem_text": "x^2 - 5x + 6 = 0", "input_format": "text"})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["status"] == "queued"
+    assert body["solution"] is None
+
+    done = _wait_for(client, body["job_id"])
+    assert done["status"] == "done"
+    assert done["solution"] == ["x = 2", "x = 3"]
+    assert done["validated"] is True
+    assert len(done["steps"]) == 3
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/jobs/nope").status_code == 404
+
+
+def test_batch_dedupes_and_reports_per_item(client):
+    payloads = [
+        {"problem_text": "2x + 3 = 11", "input_format": "text"},
+        {"problem_text": "x^2 - 5x + 6 = 0", "input_format": "text"},
+        {"problem_text": "2x + 3 = 11", "input_format": "text"},
+        {"problem_text": "2x + = 11", "input_format": "text"},
+    ]
+    resp = client.post("/solve/batch", json=payloads)
+    assert resp.status_code == 200
+    items = resp.json()["items"]
+    assert [i["status"] for i in items] == ["done", "done", "done", "failed"]
+    assert items[0]["solution"] == ["x = 4"]
+    assert items[1]["solution"] == ["x = 2", "x = 3"]
+    # el duplicado comparte job
+    assert items[0]["job_id"] == items[2]["job_id"]
+    assert items[3]["error"]
+    assert client.get(f"/jobs/{items[1]['job_id']}").json()["status"] == "done"
+
+
+def test_metrics_exposes_stages_and_caches(client):
+    client.post("/solve/batch", json=[{"problem_text": "3x = 9", "input_format": "text"}])
+    text = client.get("/metrics").text
+    assert 'videogen_stage_seconds_count{stage="build_steps"}' in text
+    assert 'videogen_stage_seconds_bucket{stage="render",le="+Inf"}' in text
+    assert "videogen_render_cache_hits_total" in text
+    assert "videogen_job_queue_depth 0" in text
+
+
+def test_too_complex_input_reports_error_code(client):
+    resp = client.post("/solve", json={"problem_text": "x + " * 1000 + "1 = 0", "input_format": "text"})
+    done = _wait_for(client, resp.json()["job_id"])
+    assert done["status"] == "failed"
+    assert done["error_code"] == "too_complex"
+
+
+def test_jobs_catalog_lists_finished_jobs(client):
+    client.post("/solve/batch", json=[
+        {"problem_text": "2x + 3 = 11", "input_format": "text"},
+        {"problem_text": "x^2 - 5x + 6 = 0", "input_format": "text"},
+        {"problem_text": "2x + = 11", "input_format": "text"},
+    ])
+    artifact_writer.flush()  # el catálogo se actualiza al terminar de escribir
+    body = client.get("/jobs", params={"problem_type": "quadratic"}).json()
+    assert [item["solution"] for item in body["items"]] == [["x = 2", "x = 3"]]
+    assert body["next_cursor"] is None
+
+    page = client.get("/jobs", params={"limit": 2}).json()
+    assert len(page["items"]) == 2 and page["next_cursor"]
+    rest = client.get("/jobs", params={"limit": 2, "cursor": page["next_cursor"]}).json()
+    assert [i["status"] for i in rest["items"]] == ["failed"]
+    assert client.get("/jobs", params={"cursor": "???"}).status_code == 400
+
+
+def test_evicted_jobs_are_served_from_the_catalog(client, monkeypatch):
+    monkeypatch.setattr(settings, "job_memory_max", 1)
+    ok = client.post("/solve", json={"problem_text": "2x + 3 = 11", "input_format": "text"}).json()["job_id"]
+    _wait_for(client, ok)
+    bad = client.post("/solve", json={"problem_text": "2x + = 11", "input_format": "text"}).json()["job_id"]
+    _wait_for(client, bad)
+    artifact_writer.flush()
+
+    with job_queue._jobs_lock:
+        assert ok not in job_queue._jobs  # solo queda el último
+
+    body = client.get(f"/jobs/{ok}").json()
+    assert body["status"] == "done" and body["solution"] == ["x = 4"]
+    assert body["steps"] and body["manim_code"]
+
+    job_queue.record_job("filler01", "done", result={})
+    body = client.get(f"/jobs/{bad}").json()
+    assert body["status"] == "failed" and body["error"]
+
+
+def test_batch_render_failure_is_recorded_and_indexed(client, monkeypatch):
+    from app.storage.job_index import job_index
+
+    seen = []
+
+    def _boom(job_id, *args, **kwargs):
+        seen.append(job_queue.get_job(job_id)["status"])  # ya consultable mientras corre
+        raise RuntimeError("manim explotó")
+
+    monkeypatch.setattr(batch, "render_job", _boom)
+    items = client.post("/solve/batch", json=[{"problem_text": "2x = 4", "input_format": "text"}]).json()["items"]
+    assert seen == ["running"]
+    assert items[0]["status"] == "failed" and "manim explotó" in items[0]["error"]
+    row = job_index.get(items[0]["job_id"])
+    assert row["status"] == "failed" and row["problem_text"] == "2x = 4"
@@ -0,0 +1,52 @@
+import pytest
+from sympy import Add, Integer, Mul, Symbol, srepr
+
+from app.services import latex_parser, metrics
+from app.services.latex_parser import Unsupported, parse_fast, parse_latex_expr
+
+SUBSET = [
+    "x^2-5x+6",
+    r"\frac{x}{2} + 3",
+    r"\frac{1}{x}",
+    "x^{2} - 9",
+    r"\sqrt{x}",
+    r"\sqrt[3]{x+1}",
+    r"3 \cdot x",
+    r"2\times 3x",
+    r"x \div 2",
+    r"\left(x+1\right)(x-1)",
+    r"-\frac{x}{2} - (x+1)",
+    r"\dfrac{2}{3}x - \frac{1}{4}",
+    "x^2^3 - 2^{x+1}",
+    "x_1 + x_{2}",
+    r"0.5x + 2\,x",
+    "2 x 3",
+]
+
+
+@pytest.mark.parametrize("text", SUBSET)
+def test_same_tree_as_antlr(text):
+    pytest.importorskip("antlr4")
+    from sympy.parsing.latex import parse_latex
+
+    assert srepr(parse_fast(text)) == srepr(parse_latex(text))
+
+
+@pytest.mark.parametrize("text", [r"\sin(x)", "|x|", "x!", r"\int x dx", r"\frac12", r"\alpha x", "2x +", ""])
+def test_outside_the_subset_is_unsupported(text):
+    with pytest.raises(Unsupported):
+        parse_fast(text)
+
+
+def test_letter_before_parenthesis_is_a_product():
+    x = Symbol("x")
+    assert parse_fast("x(x+1)") == Mul(x, Add(x, Integer(1), evaluate=False), evaluate=False)
+
+
+def test_fallback_is_counted(monkeypatch):
+    pytest.importorskip("antlr4")
+    seen = []
+    monkeypatch.setattr(metrics, "observe", lambda stage, seconds: seen.append(stage))
+    parse_latex_expr("x^2 - 9")
+    parse_latex_expr(r"\sin(x)")
+    assert seen == ["latex_parse_fast", "latex_parse_fallback"]
@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.narration_polisher import HttpBackend, PolishCache, PolisherBackend, StubBackend, polish_steps
+
+STEPS = [
+    {"index": i, "latex_after": f"x = {i}", "rule": "aislar la variable", "narration": f"Paso número {i}."}
+    for i in range(1, 6)
+]
+
+
+@pytest.fixture
+def polisher_server():
+    """
+    Servidor local que hace de LLM: pone la narración en mayúsculas.
+    `delay` lo vuelve lento, `requests` junta los cuerpos recibidos.
+    """
+    state = {"delay": 0.0, "requests": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["content-length"])))
+            state["requests"].append(body)
+            time.sleep(state["delay"])
+            out = json.dumps({"narrations": [item["narration"].upper() for item in body["items"]]}).encode()
+            self.send_response(200)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{server.server_address[1]}/polish"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_batches_all_steps_and_caches(polisher_server, tmp_path):
+    backend = HttpBackend(polisher_server["url"], model="m1", batch_size=2)
+    cache = PolishCache(max_entries=100, disk_dir=str(tmp_path))
+
+    out = polish_steps(STEPS, "es", backend=backend, cache=cache, budget_s=5)
+    assert [s["narration"] for s in out] == [s["narration"].upper() for s in STEPS]
+    assert STEPS[0]["narration"] == "Paso número 1."  # no muta la entrada
+    assert [len(r["items"]) for r in polisher_server["requests"]] == [2, 2, 1]
+    assert all(r["model"] == "m1" and r["temperature"] == 0 for r in polisher_server["requests"])
+
+    # segunda vez (y con una caché nueva sobre el mismo disco): nada de red
+    polisher_server["requests"].clear()
+    assert polish_steps(STEPS, "es", backend=backend, cache=cache, budget_s=5) == out
+    cold = PolishCache(max_entries=100, disk_dir=str(tmp_path))
+    assert polish_steps(STEPS, "es", backend=backend, cache=cold, budget_s=5) == out
+    assert polisher_server["requests"] == []
+
+    # otro modelo u otro locale es otra clave
+    polish_steps(STEPS[:1], "en", backend=backend, cache=cache, budget_s=5)
+    assert len(polisher_server["requests"]) == 1
+
+
+def test_budget_falls_back_to_original_text(polisher_server):
+    polisher_server["delay"] = 2.0
+    backend = HttpBackend(polisher_server["url"], model="m1", batch_size=2)
+    cache = PolishCache(max_entries=100)
+
+    t0 = time.perf_counter()
+    out = polish_steps(STEPS, "es", backend=backend, cache=cache, budget_s=0.2)
+    assert time.perf_counter() - t0 < 1.5
+    assert out == STEPS
+    assert cache.get(PolishCache.key(STEPS[0]["narration"], STEPS[0]["rule"], "es", "m1")) is None
+
+
+def test_unreachable_backend_keeps_steps():
+    backend = HttpBackend("http://127.0.0.1:9/polish", model="m1")
+    assert polish_steps(STEPS, "es", backend=backend, cache=PolishCache(max_entries=10), budget_s=2) == STEPS
+
+
+def test_stub_backend_is_identity():
+    assert polish_steps(STEPS, "es", backend=StubBackend(), cache=PolishCache(max_entries=10)) == STEPS
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        PolisherBackend()
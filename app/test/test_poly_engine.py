@@ -0,0 +1,60 @@
+import time
+
+import pytest
+from sympy import Eq, Symbol
+
+from app.services import sympy_solver
+from app.services.poly_engine import analyze_polynomial
+from app.services.sympy_solver import _to_equation
+
+
+def _fast(text):
+    eq, vars_candidates = _to_equation(text, "text")
+    return analyze_polynomial(eq, vars_candidates)
+
+
+def _generic(text, monkeypatch):
+    monkeypatch.setattr(sympy_solver, "analyze_polynomial", lambda eq, v: None)
+    eq, vars_candidates = _to_equation(text, "text")
+    return sympy_solver._solve_core(eq, vars_candidates)
+
+
+@pytest.mark.parametrize("text", [
+    "2x + 3 = 11",
+    "x^2 - 5x + 6 = 0",
+    "x^2 + x + 1 = 0",
+    "x^3 = 8",
+    "x^4 - 5x^2 + 4 = 0",
+    "x/4 + 1 = 3",
+])
+def test_matches_generic_path(text, monkeypatch):
+    fast = _fast(text)
+    generic = _generic(text, monkeypatch)
+    assert fast["solutions"] == generic["solutions"]
+    assert fast["problem_type"] == generic["problem_type"]
+    assert fast["validated"] is generic["validated"] is True
+    assert str(fast["factored"]) == str(generic["factored"])
+
+
+def test_multiplicities():
+    x = Symbol("x")
+    out = _fast("(x - 1)^2 = 0")
+    assert out["solutions"] == [Eq(x, 1)]
+    assert out["multiplicities"] == [2]
+
+
+@pytest.mark.parametrize("text", ["1/x = 4", "x^5 - x - 1 = 0", "0.5x + 1 = 2", "x^2 + y = 3"])
+def test_falls_back_outside_fast_path(text):
+    assert _fast(text) is None
+
+
+@pytest.mark.parametrize("text", ["x^3 + x + 1 = 0", "x^3 - 3x + 1 = 0"])
+def test_cubics_with_nested_radicals_validate_fast(text, monkeypatch):
+    # antes: simplify del residuo de cada raíz, segundos por ecuación
+    t0 = time.perf_counter()
+    fast = _fast(text)
+    elapsed = time.perf_counter() - t0
+    assert fast["validated"] is True and fast["validation_method"] == "numeric"
+    assert len(fast["solutions"]) == 3
+    assert fast["solutions"] == _generic(text, monkeypatch)["solutions"]
+    assert elapsed < 1.0
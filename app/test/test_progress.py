@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import job_queue
+from app.services.manim_generator import build_scene_spec, spec_animations
+from app.services.progress import ManimOutputParser, ProgressBus, progress_bus
+
+
+def test_parser_reads_tqdm_bars_split_across_chunks():
+    parser = ManimOutputParser()
+    out = list(parser.feed("Animation 0: Write(Text('x = 3/4')):  50%|#####     | 1"))
+    assert out == []
+    out += parser.feed("5/30 [00:01<00:01, 25.1it/s]\rAnimation 0: Write(Text('x = 3/4')): 100%|##########| 30/30 [00:01]\n")
+    out += parser.feed("Animation 1: Wait(0.5): 100%|##########| 15/15 [00:00]")
+    out += parser.close()
+    assert out == [
+        {"animation": 1, "frames": 15, "frames_total": 30},
+        {"animation": 1, "frames": 30, "frames_total": 30},
+        {"animation": 2, "frames": 15, "frames_total": 15},
+    ]
+
+
+def test_spec_animations_counts_plays_and_waits():
+    steps = [{"index": 1, "latex_after": "x^2 = 4", "rule": "r", "narration": "n"}]
+    spec = build_scene_spec("x**2 = 4", steps, ["x = 2"])
+    assert spec_animations(spec) == 3 + 5 + 2
+
+
+def test_bus_replays_last_event_and_drops_oldest_for_slow_subscribers():
+    bus = ProgressBus(max_jobs=2)
+    bus.publish("a", {"type": "status", "status": "running"})
+    q = bus.subscribe("a")
+    assert q.get_nowait()["status"] == "running"
+    for i in range(2000):
+        bus.publish("a", {"type": "progress", "animation": i})
+    assert q.qsize() == 1000
+    assert q.get_nowait()["animation"] == 1000
+    bus.unsubscribe("a", q)
+    assert bus.subscribers() == 0
+
+    bus.publish("b", {})
+    bus.publish("c", {})
+    assert bus.last("a") is None  # solo se recuerdan los últimos max_jobs
+
+
+def _events(response):
+    events = []
+    for line in response.iter_lines():
+        if line.startswith("data: "):
+            events.append(json.loads(line[len("data: "):]))
+    return events
+
+
+def test_events_stream_until_job_finishes():
+    client = TestClient(app)
+    job_queue.record_job("ev000001", "running")
+
+    def _finish():
+        time.sleep(0.3)
+        progress_bus.publish("ev000001", {"type": "progress", "animation": 2, "animations": 10})
+        job_queue.record_job("ev000001", "done", result={})
+
+    threading.Thread(target=_finish).start()
+    with client.stream("GET", "/jobs/ev000001/events") as r:
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/event-stream")
+        events = _events(r)
+
+    assert events[0] == {"type": "status", "status": "running"}
+    assert {"type": "progress", "animation": 2, "animations": 10} in events
+    assert events[-1] == {"type": "status", "status": "done"}
+
+    # ya terminado: un solo evento y se cierra
+    with client.stream("GET", "/jobs/ev000001/events") as r:
+        assert _events(r) == [{"type": "status", "status": "done"}]
+
+    assert client.get("/jobs/nope/events").status_code == 404
+
+
+def test_hung_manim_subprocess_is_killed_after_the_timeout(tmp_path):
+    from app.services import video_renderer
+
+    pid_file = tmp_path / "child.pid"
+    t0 = time.monotonic()
+    with open(tmp_path / "manim.log", "wb") as log:
+        code = video_renderer._stream_manim(
+            ["sh", "-c", f"echo arranca; sleep 30 & echo $! > {pid_file}; wait"],
+            tmp_path, {}, log, None, timeout_s=0.5,
+        )
+    assert code is None
+    assert time.monotonic() - t0 < 10
+    assert (tmp_path / "manim.log").read_bytes().startswith(b"arranca")
+
+    # también cayó lo que había lanzado (mismo grupo de procesos)
+    child = int(pid_file.read_text())
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        try:
+            os.kill(child, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.05)
+    else:
+        raise AssertionError("el proceso hijo sigue vivo")
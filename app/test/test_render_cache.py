@@ -0,0 +1,136 @@
+from app.config import settings
+from app.services import video_renderer
+from app.services.manim_generator import SPEC_SCENE
+from app.services.render_cache import RenderCache, render_key
+from app.storage.artifact_store import job_dir
+
+
+def test_key_depends_on_code_scene_and_quality():
+    base = render_key("code", "SolutionScene", "l")
+    assert base == render_key("code", "SolutionScene", "l")
+    assert base != render_key("code!", "SolutionScene", "l")
+    assert base != render_key("code", "Other", "l")
+    assert base != render_key("code", "SolutionScene", "h")
+
+
+def test_lru_eviction_and_counters(tmp_path):
+    cache = RenderCache(root=str(tmp_path / "cache"), max_bytes=25)
+    for name in ("a", "b", "c"):
+        video = tmp_path / f"{name}.mp4"
+        video.write_bytes(b"x" * 10)
+        cache.put(name * 64, video)
+
+    # solo caben dos: se fue el más viejo
+    assert cache.get("a" * 64) is None
+    assert cache.get("c" * 64) is not None
+    stats = cache.stats()
+    assert stats == {"hits": 1, "misses": 1, "evictions": 1, "entries": 2, "bytes": 20}
+
+
+def test_hit_skips_manim(tmp_path, monkeypatch):
+    cache = RenderCache(root=str(tmp_path / "cache"), max_bytes=10**6)
+    monkeypatch.setattr(video_renderer, "render_cache", cache)
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path / "store"))
+
+    video = tmp_path / "rendered.mp4"
+    video.write_bytes(b"fake mp4")
+    cache.put(render_key("code", SPEC_SCENE, "l"), video)
+
+    def _no_manim(*args, **kwargs):
+        raise AssertionError("no debería lanzar Manim en un hit")
+
+    monkeypatch.setattr(video_renderer, "_executor", _no_manim)
+    path, job_id = video_renderer.render_video("code", job_id="abc123")
+    assert path.endswith("abc123/video.mp4")
+    assert (tmp_path / "store" / "ab" / "abc123" / "video.mp4").read_bytes() == b"fake mp4"
+    assert not (tmp_path / "store" / "ab" / "abc123" / "scene.json").exists()
+
+
+def test_segments_reused_across_jobs(tmp_path, monkeypatch):
+    from app.services.manim_generator import generate_segments
+
+    monkeypatch.setattr(video_renderer, "render_cache", RenderCache(root=str(tmp_path / "cache"), max_bytes=10**6))
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path / "store"))
+
+    rendered = []
+
+    def _fake_render(base_dir, quality, on_progress=None):
+        code = (base_dir / "scene.json").read_text(encoding="utf-8")
+        rendered.append(code)
+        (base_dir / "video.mp4").write_bytes(code.encode("utf-8"))
+        return True
+
+    def _fake_concat(paths, output):
+        output.write_bytes(b"".join(p.read_bytes() for p in paths))
+        return True
+
+    monkeypatch.setattr(video_renderer, "_render_dir", _fake_render)
+    monkeypatch.setattr(video_renderer, "concat_videos", _fake_concat)
+
+    step = {"index": 1, "latex_after": "x = 4", "rule": "despejar", "narration": "Restamos 3."}
+    first = generate_segments("2*x + 3 = 11", [step], ["x = 4"])
+    second = generate_segments("2*y + 3 = 11", [step], ["x = 4"])
+
+    path, _ = video_renderer.render_video("full-1", job_id="job1", segments=first)
+    assert len(rendered) == 3
+    assert open(path, "rb").read() == b"".join(s["spec"].encode("utf-8") for s in first)
+
+    video_renderer.render_video("full-2", job_id="job2", segments=second)
+    # solo el título cambió: paso y final salen de la caché
+    assert len(rendered) == 4
+    assert "2*y + 3 = 11" in rendered[-1]
+    assert not (tmp_path / "store" / "jo" / "job2" / "segments").exists()
+
+
+def test_missing_segments_render_in_parallel(tmp_path, monkeypatch):
+    import threading
+    import time
+    from app.services.manim_generator import generate_segments
+
+    monkeypatch.setattr(video_renderer, "render_cache", RenderCache(root=str(tmp_path / "cache"), max_bytes=10**6))
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path / "store"))
+    monkeypatch.setattr(settings, "warm_render_workers", 4)
+
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def _fake_render(base_dir, quality, on_progress=None):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.2)
+        (base_dir / "video.mp4").write_bytes(b"clip")
+        with lock:
+            active[0] -= 1
+        return True
+
+    monkeypatch.setattr(video_renderer, "_render_dir", _fake_render)
+    monkeypatch.setattr(video_renderer, "concat_videos", lambda paths, output: output.write_bytes(b"v") or True)
+
+    steps = [{"index": i, "latex_after": f"x = {i}", "rule": "r", "narration": "n"} for i in (1, 2, 3)]
+    path, _ = video_renderer.render_video("full", job_id="par", segments=generate_segments("x = 1", steps, ["x = 1"]))
+    assert path.endswith("par/video.mp4")
+    assert peak[0] >= 2
+
+
+def test_hit_that_cannot_be_linked_renders_into_the_job_dir(tmp_path, monkeypatch):
+    cache = RenderCache(root=str(tmp_path / "cache"), max_bytes=10**6)
+    monkeypatch.setattr(video_renderer, "render_cache", cache)
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path / "store"))
+
+    video = tmp_path / "rendered.mp4"
+    video.write_bytes(b"fake mp4")
+    cache.put(render_key('{"v": 1}', SPEC_SCENE, "l"), video)
+
+    def _no_link(src, dst):
+        raise OSError("sin espacio")
+
+    def _fake_render(base_dir, quality, on_progress=None):
+        (base_dir / "video.mp4").write_bytes(b"fresh mp4")
+        return True
+
+    monkeypatch.setattr(video_renderer, "link_or_copy", _no_link)
+    monkeypatch.setattr(video_renderer, "_render_dir", _fake_render)
+    path, job_id = video_renderer.render_video('{"v": 1}', job_id="nolink01")
+    assert path == str(job_dir(job_id) / "video.mp4")
+    assert (job_dir(job_id) / "video.mp4").read_bytes() == b"fresh mp4"
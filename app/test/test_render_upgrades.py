@@ -0,0 +1,61 @@
+import time
+
+from app.config import settings
+from app.services import job_queue, video_renderer
+from app.services.render_cache import RenderCache
+from app.services.render_upgrades import UpgradeScheduler
+from app.storage.artifact_store import job_dir
+
+
+def _wait(cond, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if cond():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_upgrade_waits_for_idle_then_swaps_video(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path / "store"))
+    monkeypatch.setattr(video_renderer, "render_cache", RenderCache(root=str(tmp_path / "cache"), max_bytes=10**6))
+
+    def _fake_render(base_dir, quality, on_progress=None):
+        (base_dir / "video.mp4").write_bytes(f"video {quality}".encode())
+        return True
+
+    monkeypatch.setattr(video_renderer, "_render_dir", _fake_render)
+
+    final = job_dir("up000001") / "video.mp4"
+    final.parent.mkdir(parents=True)
+    final.write_bytes(b"video l")
+    job_queue.record_job("up000001", "done", result={"video_tier": "preview", "video_quality": "l"})
+
+    scheduler = UpgradeScheduler(idle_poll_s=0.02)
+    monkeypatch.setattr(video_renderer, "_active_renders", 1)  # un job renderizando
+    scheduler.schedule("up000001", "code", None, "m")
+    time.sleep(0.2)
+    assert final.read_bytes() == b"video l"
+
+    monkeypatch.setattr(video_renderer, "_active_renders", 0)
+    assert _wait(lambda: final.read_bytes() == b"video m")
+    assert _wait(lambda: job_queue.get_job("up000001")["result"]["video_tier"] == "full")
+    assert job_queue.get_job("up000001")["result"]["video_quality"] == "m"
+    assert not (job_dir("up000001") / "upgrade_m").exists()
+    scheduler.shutdown()
+
+
+def test_failed_upgrade_keeps_preview(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path / "store"))
+    monkeypatch.setattr(video_renderer, "render_cache", RenderCache(root=str(tmp_path / "cache"), max_bytes=10**6))
+    monkeypatch.setattr(video_renderer, "_render_dir", lambda *args, **kwargs: False)
+
+    final = job_dir("up000002") / "video.mp4"
+    final.parent.mkdir(parents=True)
+    final.write_bytes(b"video l")
+
+    scheduler = UpgradeScheduler(idle_poll_s=0.02)
+    scheduler.schedule("up000002", "code", None, "m")
+    assert _wait(lambda: scheduler.failed == 1)
+    assert final.read_bytes() == b"video l"
+    scheduler.shutdown()
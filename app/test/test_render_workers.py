@@ -0,0 +1,83 @@
+import threading
+import time
+
+from app.services.render_workers import WarmRenderPool
+
+
+class _FakeConn:
+    def __init__(self, recycle: bool):
+        self.recycle = recycle
+
+    def send(self, msg):
+        pass
+
+    def poll(self, timeout):
+        return True
+
+    def recv(self):
+        return {"ok": True, "recycle": self.recycle}
+
+
+class _FakeWorker:
+    def __init__(self, recycle: bool):
+        self.conn = _FakeConn(recycle)
+        self.stopped = False
+
+    def stop(self, kill: bool = False):
+        self.stopped = True
+
+
+def _slow_pool(monkeypatch, spawn_delay_s: float, recycle: bool):
+    pool = WarmRenderPool(size=2, max_jobs=1, max_rss_mb=0, timeout_s=5)
+    release = threading.Event()
+    spawned = []
+
+    def _spawn():
+        if spawned:  # el primero arranca ya; los demás tardan
+            release.wait(spawn_delay_s)
+        worker = _FakeWorker(recycle)
+        spawned.append(worker)
+        return worker
+
+    monkeypatch.setattr(pool, "_spawn", _spawn)
+    return pool, release, spawned
+
+
+def test_start_and_respawn_do_not_block_the_caller(monkeypatch):
+    pool, release, spawned = _slow_pool(monkeypatch, spawn_delay_s=5, recycle=True)
+    try:
+        t0 = time.perf_counter()
+        pool.start()
+        assert time.perf_counter() - t0 < 0.5
+
+        # el worker reciclado se reemplaza en otro hilo: render no lo espera
+        t0 = time.perf_counter()
+        assert pool.render("/tmp/x", "l") is True
+        assert time.perf_counter() - t0 < 2
+        assert pool.recycled == 1
+
+        release.set()
+        deadline = time.monotonic() + 5
+        while pool.stats()["idle"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert pool.stats()["idle"] == 2
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_workers_that_finish_starting_after_shutdown_are_stopped(monkeypatch):
+    pool, release, spawned = _slow_pool(monkeypatch, spawn_delay_s=5, recycle=False)
+    pool.start()
+    deadline = time.monotonic() + 5
+    while not spawned and time.monotonic() < deadline:
+        time.sleep(0.02)
+    pool.shutdown()
+    release.set()
+
+    deadline = time.monotonic() + 5
+    while len(spawned) < 2 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    time.sleep(0.05)
+    assert pool.stats()["idle"] == 0
+    assert len(spawned) == 2 and all(w.stopped for w in spawned)
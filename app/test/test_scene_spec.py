@@ -0,0 +1,40 @@
+import json
+
+from app.services.manim_generator import build_scene_spec, generate_manim_code, generate_segments
+
+STEPS = [
+    {"index": 1, "latex_after": "x = 4", "rule": "despejar", "narration": 'Restamos 3 y "dividimos" por 2\\.'},
+    {"index": 2, "latex_after": "x = 4", "rule": "verificar", "narration": "Reemplazamos.\nListo."},
+]
+
+
+def test_spec_is_compact_canonical_json():
+    spec = build_scene_spec("2*x + 3 = 11", STEPS, ["x = 4"], style="clean", locale="es")
+    data = json.loads(spec)
+    assert data["title"] == "Problema: 2*x + 3 = 11"
+    assert data["steps"][0] == {
+        "index": 1, "text": "Paso 1: x = 4", "rule": "Regla: despejar", "narration": STEPS[0]["narration"],
+    }
+    assert data["final"] == "Solución: x = 4"
+    assert (data["style"], data["locale"]) == ("clean", "es")
+    assert spec == json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    assert spec == build_scene_spec("2*x + 3 = 11", STEPS, ["x = 4"])
+
+
+def test_segments_cover_the_spec_and_share_identical_steps():
+    segments = generate_segments("2*x + 3 = 11", STEPS, ["x = 4"])
+    assert [s["name"] for s in segments] == ["title", "step_1", "step_2", "final"]
+    other = generate_segments("2*y + 3 = 11", STEPS, ["x = 4"])
+    assert [s["spec"] for s in segments[1:]] == [s["spec"] for s in other[1:]]
+    assert segments[0]["spec"] != other[0]["spec"]
+
+    full = json.loads(build_scene_spec("2*x + 3 = 11", STEPS, ["x = 4"]))
+    parts = [json.loads(s["spec"]) for s in segments]
+    assert parts[0]["title"] == full["title"] and parts[-1]["final"] == full["final"]
+    assert [p["steps"][0] for p in parts[1:-1]] == full["steps"]
+
+
+def test_python_export_survives_quotes():
+    code = generate_manim_code('x = "1"', STEPS, ["x = 4"])
+    compile(code, "manim_code.py", "exec")
+    assert 'Text("Problema: x = \\"1\\"", font_size=36)' in code
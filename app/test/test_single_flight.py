@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+
+from app.config import settings
+from app.services import video_renderer
+from app.services.render_cache import RenderCache
+from app.services.single_flight import SingleFlight
+from app.services.solver_cache import SolverCache
+from app.services.sympy_solver import _to_equation
+from app.storage.artifact_store import job_dir
+
+
+def _run_together(n, target):
+    results, errors = [None] * n, [None] * n
+
+    def _one(i):
+        try:
+            results[i] = target(i)
+        except BaseException as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=_one, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    return results, errors
+
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight("test")
+    calls = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.2)
+        return "resultado"
+
+    results, errors = _run_together(8, lambda i: flight.do("k", work))
+    assert calls == [1]
+    assert errors == [None] * 8
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+    assert {value for value, _ in results} == {"resultado"}
+    assert flight.in_flight() == 0
+
+    # ya terminó: el próximo vuelve a calcular
+    flight.do("k", work)
+    assert calls == [1, 1]
+
+
+def test_failure_is_shared_and_releases_the_key():
+    flight = SingleFlight("test")
+
+    def boom():
+        time.sleep(0.2)
+        raise ValueError("entrada inválida")
+
+    _, errors = _run_together(4, lambda i: flight.do("k", boom))
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert flight.do("k", lambda: 42) == (42, False)
+
+
+def test_cancelled_leader_hands_over_to_a_waiter():
+    flight = SingleFlight("test")
+    started = threading.Event()
+
+    def cancelled():
+        started.set()
+        time.sleep(0.2)
+        raise KeyboardInterrupt
+
+    def recompute():
+        time.sleep(0.2)
+        return "recalculado"
+
+    def waiter(i):
+        started.wait()
+        return flight.do("k", recompute)
+
+    leader = threading.Thread(target=lambda: pytest.raises(KeyboardInterrupt, flight.do, "k", cancelled))
+    leader.start()
+    results, errors = _run_together(3, waiter)
+    leader.join()
+    assert errors == [None] * 3
+    assert {value for value, _ in results} == {"recalculado"}
+    assert sum(not shared for _, shared in results) == 1  # uno solo pasó a ser líder
+
+
+def test_identical_problems_solve_once():
+    cache = SolverCache(max_entries=8)
+    calls = []
+
+    def compute(eq, vars_candidates):
+        calls.append(1)
+        time.sleep(0.2)
+        return {"solutions": [], "simplified": eq.lhs, "factored": eq.lhs}
+
+    problems = ["2x + 3 = 11", "3 + 2x = 11", "2y + 3 = 11", "2x+3=11"]
+
+    def solve(i):
+        eq, vars_candidates = _to_equation(problems[i], "text")
+        return cache.get_or_compute(eq, vars_candidates, compute)
+
+    results, errors = _run_together(len(problems), solve)
+    assert errors == [None] * len(problems)
+    assert calls == [1]
+    assert cache.flight.stats()["shared"] == len(problems) - 1
+
+
+def test_identical_renders_run_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path / "store"))
+    monkeypatch.setattr(video_renderer, "render_cache", RenderCache(root=str(tmp_path / "cache"), max_bytes=10**6))
+    rendered = []
+
+    def _fake_render(base_dir, quality, on_progress=None):
+        rendered.append(base_dir)
+        time.sleep(0.3)
+        (base_dir / "video.mp4").write_bytes(b"video")
+        return True
+
+    monkeypatch.setattr(video_renderer, "_render_dir", _fake_render)
+    results, errors = _run_together(
+        5, lambda i: video_renderer.render_video('{"v": 1}', job_id=f"sf00000{i}")
+    )
+    assert errors == [None] * 5
+    assert len(rendered) == 1
+    for i in range(5):
+        assert (job_dir(f"sf00000{i}") / "video.mp4").read_bytes() == b"video"
+
+
+def test_failed_render_is_shared(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path / "store"))
+    monkeypatch.setattr(video_renderer, "render_cache", RenderCache(root=str(tmp_path / "cache"), max_bytes=10**6))
+    rendered = []
+
+    def _failing(base_dir, quality, on_progress=None):
+        rendered.append(base_dir)
+        time.sleep(0.3)
+        return False
+
+    monkeypatch.setattr(video_renderer, "_render_dir", _failing)
+    results, _ = _run_together(3, lambda i: video_renderer.render_video('{"v": 2}', job_id=f"sf10000{i}"))
+    assert len(rendered) == 1
+    assert all(path.endswith("RENDER_FAILED.txt") for path, _ in results)
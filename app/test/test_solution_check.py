@@ -0,0 +1,39 @@
+from sympy import CRootOf, Eq, Rational, roots, sqrt, symbols
+
+from app.services.solution_check import check_solutions
+
+x, a = symbols("x a")
+
+
+def test_wrong_solution_rejected_numerically():
+    assert check_solutions(Eq(x**2, 4), [Eq(x, 3)]) == (False, "numeric")
+
+
+def test_radical_and_parametric_solutions():
+    assert check_solutions(Eq(x**2, 2), [Eq(x, -sqrt(2)), Eq(x, sqrt(2))]) == (True, "numeric")
+    assert check_solutions(Eq(a * x, 3), [Eq(x, 3 / a)]) == (True, "numeric")
+    assert check_solutions(Eq(1 / x, Rational(1, 4)), [Eq(x, 4)]) == (True, "numeric")
+
+
+def test_implicit_roots_checked_exactly():
+    p = x**5 - x - 1
+    assert check_solutions(Eq(p, 0), [Eq(x, CRootOf(p, i)) for i in range(5)]) == (True, "symbolic")
+    assert check_solutions(Eq(p + 1, 0), [Eq(x, CRootOf(p, 1))]) == (False, "symbolic")
+
+
+def test_clear_zeros_skip_high_precision_and_doubtful_ones_escalate(monkeypatch):
+    from app.services import solution_check
+
+    calls = []
+    real = solution_check._high_precision
+    monkeypatch.setattr(solution_check, "_high_precision", lambda *args: calls.append(args) or real(*args))
+
+    cubic = x**3 + x + 1
+    cubic_roots = [Eq(x, r) for r in roots(cubic, cubics=True)]
+    assert check_solutions(Eq(cubic, 0), cubic_roots) == (True, "numeric")
+    assert check_solutions(Eq(a * x, 3), [Eq(x, 3 / a)]) == (True, "numeric")
+    assert calls == []
+
+    # residuo 1e-11: ni claramente cero ni claramente no -> 50 dígitos (y después exacto)
+    assert check_solutions(Eq(x, 1), [Eq(x, 1 + Rational(1, 10**11))]) == (False, "symbolic")
+    assert len(calls) == 1
@@ -0,0 +1,50 @@
+from app.services import sympy_solver
+from app.services.solver_cache import SolverCache, canonicalize
+from app.services.sympy_solver import _to_equation, solve_problem
+
+
+def _key(text, fmt="text"):
+    eq, vars_candidates = _to_equation(text, fmt)
+    return canonicalize(eq, vars_candidates)[0]
+
+
+def test_equivalent_inputs_share_key():
+    assert _key("2x+3=11") == _key("3 + 2x = 11") == _key("2x+3=11", "latex")
+    # renombrar la variable no cambia la clave
+    assert _key("2y+3=11") == _key("2x+3=11")
+    assert _key("2x+3=12") != _key("2x+3=11")
+
+
+def test_hit_skips_sympy_and_keeps_user_names(tmp_path, monkeypatch):
+    cache = SolverCache(max_entries=8, disk_dir=str(tmp_path))
+    monkeypatch.setattr(sympy_solver, "solver_cache", cache)
+
+    first = solve_problem("x^2 - 5x + 6 = 0", "text")
+
+    def _boom(*args, **kwargs):
+        raise AssertionError("no debería volver a resolver")
+
+    monkeypatch.setattr(sympy_solver, "_solve_core", _boom)
+    again = solve_problem("t^2 - 5t + 6 = 0", "text")
+    assert again["solution"] == ["t = 2", "t = 3"]
+    assert again["factored_form"] == first["factored_form"].replace("x", "t")
+    assert cache.stats()["hits"] == 1
+
+    # un caché nuevo sobre el mismo directorio lee del disco
+    cold = SolverCache(max_entries=8, disk_dir=str(tmp_path))
+    monkeypatch.setattr(sympy_solver, "solver_cache", cold)
+    assert solve_problem("x^2 - 5x + 6 = 0", "text") == first
+    assert cold.stats()["disk_hits"] == 1
+
+
+def test_renaming_back_keeps_factored_structure():
+    # 2*(x - 4) no debe volver a distribuirse al traducir v0 -> x
+    assert solve_problem("2x+3=11", "text")["factored_form"] == "2*(x - 4) = 0"
+
+
+def test_main_unknown_prefers_x_and_reads_e_and_pi_as_constants():
+    assert solve_problem("e^x = 1", "text")["solution"] == ["x = 0"]
+    assert solve_problem(r"\pi x = 1", "latex")["solution"] == ["x = 1/pi"]
+    assert _to_equation("a x + b = 0", "text")[1] == ["x", "a", "b"]
+    # sin otra incógnita, la letra es la variable
+    assert solve_problem("e + 2 = 5", "text")["solution"] == ["e = 3"]
@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from app.services import sympy_solver
+from app.services.solver_sandbox import SolverSandbox, SolverTimeout, SolverTooComplex
+
+
+@pytest.fixture(scope="module")
+def sandbox():
+    sb = SolverSandbox(size=1, timeout_s=2, max_memory_mb=256)
+    yield sb
+    sb.shutdown()
+
+
+def test_result_and_errors_cross_the_process(sandbox):
+    eq, vars_candidates = sandbox.call(sympy_solver._to_equation, "x^2 = 4", "text")
+    assert vars_candidates == ["x"]
+    assert sandbox.call(sympy_solver._solve_core, eq, vars_candidates)["validated"] is True
+    with pytest.raises(ValueError):
+        sandbox.call(int, "no-es-un-numero")
+
+
+def test_timeout_kills_worker_and_recovers(sandbox):
+    t0 = time.time()
+    with pytest.raises(SolverTimeout):
+        sandbox.call(time.sleep, 30)
+    assert time.time() - t0 < 10
+    assert sandbox.call(abs, -3) == 3
+
+
+def test_memory_limit_reports_too_complex(sandbox):
+    with pytest.raises(SolverTooComplex):
+        sandbox.call(bytearray, 2 * 1024**3)
+    assert sandbox.call(len, "ok") == 2
+
+
+def test_long_input_rejected_before_parsing():
+    with pytest.raises(SolverTooComplex) as info:
+        sympy_solver.solve_problem("x + " * 1000 + "1 = 0", "text")
+    assert info.value.code == "too_complex"
@@ -0,0 +1,17 @@
+import subprocess
+import sys
+
+from app.services import prewarm
+
+
+def test_app_import_does_not_load_sympy():
+    code = "import sys, app.main; print(sorted(m for m in ('sympy', 'antlr4', 'numpy') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+
+def test_prewarm_runs_in_background():
+    thread = prewarm.start()
+    thread.join(timeout=120)
+    assert not thread.is_alive()
+    assert "sympy" in sys.modules
@@ -0,0 +1,42 @@
+import pytest
+from sympy import Float, Integer, Rational, Symbol, log, sin, sqrt
+
+from app.services.text_parser import ParseError, parse_equation
+
+x, y = Symbol("x"), Symbol("y")
+
+
+@pytest.mark.parametrize(
+    "text, lhs, rhs",
+    [
+        ("2x + 3 = 11", 2 * x + 3, Integer(11)),
+        ("-x^2 + 3x - 2", -x**2 + 3 * x - 2, Integer(0)),
+        ("1/2x = 3", x / 2, Integer(3)),  # implícita con la precedencia de '*'
+        ("x^2y = 1", x**2 * y, Integer(1)),
+        ("2(x+1)(x-3) = 0", 2 * (x + 1) * (x - 3), Integer(0)),
+        ("x(x+1) = 6", x * (x + 1), Integer(6)),
+        ("x^2^3 = 1", x**8, Integer(1)),  # asocia a derecha
+        ("2^-1 x = 4", x / 2, Integer(4)),
+        ("x**3 = 0.5", x**3, Float("0.5")),
+        ("3 - -x = 1/4", 3 + x, Rational(1, 4)),
+        ("3sin(x) + sqrt(x) = log(x, 2)", 3 * sin(x) + sqrt(x), log(x, 2)),
+    ],
+)
+def test_parses_the_algebra_grammar(text, lhs, rhs):
+    assert parse_equation(text) == (lhs, rhs)
+
+
+@pytest.mark.parametrize(
+    "text, pos",
+    [("2x +", 4), ("(x+1", 4), ("x = = 2", 4), ("2 $ 3", 2), ("sin x", 4), ("", 0), ("x 2", 2), ("² = 4", 0)],
+)
+def test_errors_point_at_the_problem(text, pos):
+    with pytest.raises(ParseError) as info:
+        parse_equation(text)
+    assert info.value.pos == pos
+    assert f"Posición {pos + 1}" in str(info.value)
+
+
+def test_never_evaluates_python():
+    with pytest.raises(ParseError):
+        parse_equation("__import__('os').system('true')")
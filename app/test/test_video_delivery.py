@@ -0,0 +1,63 @@
+import struct
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services.video_concat import faststart, is_faststart
+from app.storage.artifact_store import job_dir
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def _mp4(moov_first: bool) -> bytes:
+    ftyp, moov, mdat = _box(b"ftyp", b"isom" * 2), _box(b"moov", b"m" * 16), _box(b"mdat", b"d" * 1000)
+    return ftyp + (moov + mdat if moov_first else mdat + moov)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+    path = job_dir("abc12345") / "video.mp4"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(_mp4(moov_first=True))
+    with TestClient(app) as c:
+        yield c
+
+
+def test_full_and_range_requests(client):
+    full = client.get("/videos/abc12345")
+    assert full.status_code == 200
+    assert full.headers["content-type"] == "video/mp4"
+    assert full.headers["accept-ranges"] == "bytes"
+    assert full.content[4:8] == b"ftyp"
+
+    part = client.get("/videos/abc12345", headers={"Range": "bytes=0-7"})
+    assert part.status_code == 206
+    assert part.headers["content-range"] == f"bytes 0-7/{len(full.content)}"
+    assert part.content == full.content[:8]
+
+
+def test_conditional_get(client):
+    first = client.get("/videos/abc12345")
+    etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+
+    assert client.get("/videos/abc12345", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/videos/abc12345", headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get("/videos/abc12345", headers={"If-None-Match": '"otro"'}).status_code == 200
+
+
+def test_unknown_or_unsafe_ids_are_404(client):
+    assert client.get("/videos/nope").status_code == 404
+    assert client.get("/videos/..").status_code == 404
+
+
+def test_faststart_detection(tmp_path):
+    ok, late = tmp_path / "ok.mp4", tmp_path / "late.mp4"
+    ok.write_bytes(_mp4(moov_first=True))
+    late.write_bytes(_mp4(moov_first=False))
+    assert is_faststart(ok) and faststart(ok)
+    assert not is_faststart(late)
@@ -0,0 +1,36 @@
+# bench/corpus.py
+"""
+Corpus fijo de problemas para los benchmarks.
+No cambiar entradas existentes: los reportes se comparan entre commits.
+"""
+
+CORPUS = [
+    # lineales
+    {"name": "linear_basic", "kind": "linear", "problem_text": "2x + 3 = 11", "input_format": "text"},
+    {"name": "linear_both_sides", "kind": "linear", "problem_text": "5x - 7 = 3x + 9", "input_format": "text"},
+    {"name": "linear_parens", "kind": "linear", "problem_text": "3(x - 2) = 12", "input_format": "text"},
+    {"name": "linear_fraction", "kind": "linear", "problem_text": "x/4 + 1 = 3", "input_format": "text"},
+    # cuadráticas
+    {"name": "quadratic_factorable", "kind": "quadratic", "problem_text": "x^2 - 5x + 6 = 0", "input_format": "text"},
+    {"name": "quadratic_square", "kind": "quadratic", "problem_text": "x^2 = 16", "input_format": "text"},
+    {"name": "quadratic_rational_roots", "kind": "quadratic", "problem_text": "2x^2 + 3x - 2 = 0", "input_format": "text"},
+    {"name": "quadratic_irrational", "kind": "quadratic", "problem_text": "x^2 - 2 = 0", "input_format": "text"},
+    {"name": "quadratic_complex", "kind": "quadratic", "problem_text": "x^2 + x + 1 = 0", "input_format": "text"},
+    # cúbicas
+    {"name": "cubic_three_roots", "kind": "cubic", "problem_text": "x^3 - 6x^2 + 11x - 6 = 0", "input_format": "text"},
+    {"name": "cubic_cube_root", "kind": "cubic", "problem_text": "x^3 = 8", "input_format": "text"},
+    # racionales
+    {"name": "rational_sum", "kind": "rational", "problem_text": "1/x + 1/(x+1) = 1/2", "input_format": "text"},
+    {"name": "rational_quotient", "kind": "rational", "problem_text": "(x+1)/(x-1) = 3", "input_format": "text"},
+    {"name": "rational_simple", "kind": "rational", "problem_text": "2/x = 4", "input_format": "text"},
+    # LaTeX
+    {"name": "latex_quadratic", "kind": "latex", "problem_text": "x^2-5x+6=0", "input_format": "latex"},
+    {"name": "latex_frac", "kind": "latex", "problem_text": r"\frac{x}{2} + 3 = 7", "input_format": "latex"},
+    {"name": "latex_reciprocal", "kind": "latex", "problem_text": r"\frac{1}{x} = 4", "input_format": "latex"},
+    {"name": "latex_braced_power", "kind": "latex", "problem_text": "x^{2} - 9 = 0", "input_format": "latex"},
+    {"name": "latex_sqrt", "kind": "latex", "problem_text": r"\sqrt{x} = 3", "input_format": "latex"},
+    {"name": "latex_cdot", "kind": "latex", "problem_text": r"3 \cdot x = 12", "input_format": "latex"},
+]
+
+# subconjunto chico para medir render (cada render cuesta segundos)
+RENDER_CORPUS = ["linear_basic", "quadratic_factorable"]
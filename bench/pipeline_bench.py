@@ -0,0 +1,429 @@
+# bench/pipeline_bench.py
+"""
+Benchmarks reproducibles del pipeline solve -> pasos -> código -> render.
+
+Uso (desde la raíz del repo):
+  python -m bench.pipeline_bench stages --iterations 20 --out bench_stages.json
+  python -m bench.pipeline_bench render --qualities l m h --out bench_render.json
+  python -m bench.pipeline_bench replay --log requests.jsonl --concurrency 8
+  python -m bench.pipeline_bench imports --iterations 5
+  python -m bench.pipeline_bench parse --iterations 200
+  python -m bench.pipeline_bench latex --iterations 200
+
+El reporte es JSON con claves ordenadas, pensado para hacer diff entre commits.
+Las cachés (solver/render) se desactivan en "stages" y "render" para medir
+el costo real de cada etapa; en "replay" se pueden dejar activas.
+"""
+import argparse
+import json
+import math
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from app.config import settings
+from app.models import SolveRequest
+from app.services import sympy_solver, video_renderer
+from app.services.render_cache import RenderCache
+from app.services.solver_cache import SolverCache
+from app.services.step_builder import build_steps
+from app.services.narration_polisher import polish_steps
+from app.services.manim_generator import build_scene_spec, generate_manim_code
+from app.services.pipeline import prepare_scene
+from app.services.latex_parser import parse_fast
+from app.services.text_parser import parse_equation
+
+from .corpus import CORPUS, RENDER_CORPUS
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# cada objetivo corre en un intérprete nuevo (arranque en frío real)
+IMPORT_TARGETS = {
+    "app.main": {"args": ["-c", "import app.main"], "cwd": ROOT},
+    # lo que paga el primer /solve ahora que SymPy se importa diferido
+    "app.services.sympy_solver": {"args": ["-c", "import app.services.sympy_solver"], "cwd": ROOT},
+    "antigua_cli_help": {"args": ["-m", "src.main", "--help"], "cwd": ROOT / "antigua"},
+    "antigua_cli_solve": {"args": ["-m", "src.main", "--raw", "2*x + 3 = 11"], "cwd": ROOT / "antigua"},
+}
+
+
+class _NullRenderCache:
+    """
+    Caché de render que nunca acierta: cada iteración paga Manim completo.
+    """
+    def get(self, key):
+        return None
+
+    def put(self, key, video_path):
+        return video_path
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Percentil por rango más cercano (estable y fácil de comparar).
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: List[float]) -> Dict:
+    total = sum(samples)
+    return {
+        "n": len(samples),
+        "mean_ms": round(1000 * total / len(samples), 3) if samples else 0.0,
+        "p50_ms": round(1000 * percentile(samples, 50), 3),
+        "p95_ms": round(1000 * percentile(samples, 95), 3),
+        "p99_ms": round(1000 * percentile(samples, 99), 3),
+        "throughput_per_s": round(len(samples) / total, 2) if total > 0 else 0.0,
+    }
+
+
+def _meta() -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=False
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    import sympy
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "sympy": sympy.__version__,
+        "platform": platform.platform(),
+    }
+
+
+@contextmanager
+def isolated_storage(cold: bool = True):
+    """
+    Jobs en una carpeta temporal y, si cold=True, sin cachés.
+    """
+    old_storage = settings.storage_dir
+    old_solver_cache = sympy_solver.solver_cache
+    old_render_cache = video_renderer.render_cache
+    with tempfile.TemporaryDirectory(prefix="videogen-bench-") as tmp:
+        settings.storage_dir = str(Path(tmp) / "store")
+        if cold:
+            sympy_solver.solver_cache = SolverCache(max_entries=0)
+            video_renderer.render_cache = _NullRenderCache()
+        else:
+            video_renderer.render_cache = RenderCache(root=str(Path(tmp) / "render_cache"), max_bytes=2**31)
+        try:
+            yield Path(tmp)
+        finally:
+            settings.storage_dir = old_storage
+            sympy_solver.solver_cache = old_solver_cache
+            video_renderer.render_cache = old_render_cache
+
+
+def _timed(samples: List[float], fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    samples.append(time.perf_counter() - t0)
+    return out
+
+
+def bench_stages(iterations: int) -> Dict:
+    stages = {"solve_problem": [], "build_steps": [], "build_scene_spec": [], "generate_manim_code": []}
+    by_kind: Dict[str, List[float]] = {}
+    errors = []
+
+    with isolated_storage(cold=True):
+        for _ in range(iterations):
+            for item in CORPUS:
+                t0 = time.perf_counter()
+                try:
+                    solver_output = sympy_solver.solve_problem(item["problem_text"], item["input_format"])
+                except Exception as e:
+                    errors.append(f"{item['name']}: {type(e).__name__}: {e}")
+                    continue
+                elapsed = time.perf_counter() - t0
+                stages["solve_problem"].append(elapsed)
+                by_kind.setdefault(item["kind"], []).append(elapsed)
+
+                steps = _timed(stages["build_steps"], build_steps, solver_output)
+                steps = polish_steps(steps)
+                _timed(
+                    stages["build_scene_spec"], build_scene_spec,
+                    latex_problem=solver_output["latex_clean"],
+                    steps=steps,
+                    solution=solver_output["solution"],
+                )
+                _timed(
+                    stages["generate_manim_code"], generate_manim_code,
+                    latex_problem=solver_output["latex_clean"],
+                    steps=steps,
+                    solution=solver_output["solution"],
+                )
+
+    return {
+        "iterations": iterations,
+        "stages": {name: summarize(s) for name, s in stages.items()},
+        "solve_problem_by_kind": {kind: summarize(s) for kind, s in sorted(by_kind.items())},
+        "errors": sorted(set(errors)),
+    }
+
+
+def _legacy_plaintext_parse(text: str):
+    """
+    El camino anterior a text_parser (regex + sympify), solo como referencia.
+    """
+    from sympy import sympify
+
+    s = text.strip().replace("^", "**")
+    s = re.sub(r"\)\s*\(", ")*(", s)
+    s = re.sub(r"(\d)([a-zA-Z])", r"\1*\2", s)
+    s = re.sub(r"([a-zA-Z])\s*\(", r"\1*(", s)
+    s = re.sub(r"(\d)\s*\(", r"\1*(", s)
+    left, right = s.split("=", 1) if "=" in s else (s, "0")
+    return sympify(left), sympify(right)
+
+
+def bench_parse(iterations: int) -> Dict:
+    """
+    Solo el parseo de las entradas de texto: parser propio vs regex + sympify.
+    """
+    items = [item for item in CORPUS if item["input_format"] == "text"]
+    parsers = {"text_parser": parse_equation, "legacy_sympify": _legacy_plaintext_parse}
+    samples: Dict[str, List[float]] = {name: [] for name in parsers}
+    for _ in range(iterations):
+        for name, parse in parsers.items():
+            for item in items:
+                _timed(samples[name], parse, item["problem_text"])
+
+    mismatches = [
+        item["name"] for item in items
+        if parse_equation(item["problem_text"]) != _legacy_plaintext_parse(item["problem_text"])
+    ]
+    report = {name: summarize(s) for name, s in samples.items()}
+    return {
+        "iterations": iterations,
+        "parsers": report,
+        "speedup_mean": round(report["legacy_sympify"]["mean_ms"] / max(report["text_parser"]["mean_ms"], 1e-9), 1),
+        "mismatches": mismatches,
+    }
+
+
+def bench_latex(iterations: int) -> Dict:
+    """
+    Parseo de las entradas LaTeX: parser rápido vs parse_latex (ANTLR).
+    El import de ANTLR queda afuera (se paga una vez por proceso).
+    """
+    from sympy import srepr
+    from sympy.parsing.latex import parse_latex
+
+    sides = [
+        side
+        for item in CORPUS if item["input_format"] == "latex"
+        for side in item["problem_text"].split("=", 1)
+    ]
+    parsers = {"fast": parse_fast, "antlr": parse_latex}
+    samples: Dict[str, List[float]] = {name: [] for name in parsers}
+    for _ in range(iterations):
+        for name, parse in parsers.items():
+            for side in sides:
+                _timed(samples[name], parse, side)
+
+    report = {name: summarize(s) for name, s in samples.items()}
+    return {
+        "iterations": iterations,
+        "parsers": report,
+        "speedup_mean": round(report["antlr"]["mean_ms"] / max(report["fast"]["mean_ms"], 1e-9), 1),
+        "mismatches": [side for side in sides if srepr(parse_fast(side)) != srepr(parse_latex(side))],
+    }
+
+
+def bench_render(qualities: List[str], iterations: int) -> Dict:
+    items = [item for item in CORPUS if item["name"] in RENDER_CORPUS]
+    report = {}
+
+    with isolated_storage(cold=True):
+        for quality in qualities:
+            samples, failures = [], 0
+            for i in range(iterations):
+                for item in items:
+                    payload = SolveRequest(problem_text=item["problem_text"], input_format=item["input_format"])
+                    solver_output = sympy_solver.solve_problem(payload.problem_text, payload.input_format)
+                    _, scene_spec, _, segments = prepare_scene(payload, solver_output)
+                    video_path, _ = _timed(
+                        samples, video_renderer.render_video, scene_spec,
+                        quality=quality, job_id=f"bench-{quality}-{i}-{item['name']}", segments=segments,
+                    )
+                    if video_path.endswith("RENDER_FAILED.txt"):
+                        failures += 1
+            report[quality] = {**summarize(samples), "failures": failures}
+
+    video_renderer.shutdown()
+    return {"iterations": iterations, "corpus": RENDER_CORPUS, "qualities": report}
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Líneas de -X importtime -> [(módulo, self_us, cumulative_us)].
+    El nombre conserva la sangría: sin sangría = import de primer nivel.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name[1:], int(self_us), int(cumulative_us)))
+    return rows
+
+
+def bench_imports(iterations: int) -> Dict:
+    report = {}
+    for name, target in IMPORT_TARGETS.items():
+        wall, imports, rows, failures = [], [], [], 0
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", *target["args"]],
+                cwd=target["cwd"], capture_output=True, text=True, check=False,
+            )
+            wall.append(time.perf_counter() - t0)
+            if proc.returncode != 0:
+                failures += 1
+            rows = _parse_importtime(proc.stderr)
+            imports.append(sum(cum for mod, _, cum in rows if not mod.startswith(" ")) / 1e6)
+
+        slowest = sorted(rows, key=lambda r: r[1], reverse=True)[:10]
+        report[name] = {
+            "wall": summarize(wall),
+            "imports": summarize(imports),
+            "modules": len(rows),
+            "slowest_self_ms": [[mod.strip(), round(us / 1000, 2)] for mod, us, _ in slowest],
+            "failures": failures,
+        }
+    return {"iterations": iterations, "targets": report}
+
+
+def _load_log(path: str) -> List[Dict]:
+    """
+    Una petición SolveRequest por línea; se ignoran líneas que no lo sean.
+    """
+    requests = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(data, dict) and "problem_text" in data:
+            requests.append({k: v for k, v in data.items() if k in SolveRequest.model_fields})
+    return requests
+
+
+def bench_replay(log: str, concurrency: int, repeat: int, cold: bool, timeout_s: float) -> Dict:
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    requests = _load_log(log) * repeat
+    if not requests:
+        raise SystemExit(f"{log}: no hay líneas con problem_text")
+
+    submit_samples, total_samples, statuses = [], [], {}
+
+    with isolated_storage(cold=cold), TestClient(app) as client:
+        def _one(payload: Dict):
+            t0 = time.perf_counter()
+            job_id = client.post("/solve", json=payload).json()["job_id"]
+            submitted = time.perf_counter() - t0
+
+            status = "timeout"
+            while time.perf_counter() - t0 < timeout_s:
+                status = client.get(f"/jobs/{job_id}").json()["status"]
+                if status in ("done", "failed"):
+                    break
+                time.sleep(0.01)
+            return submitted, time.perf_counter() - t0, status
+
+        wall0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for submitted, total, status in pool.map(_one, requests):
+                submit_samples.append(submitted)
+                total_samples.append(total)
+                statuses[status] = statuses.get(status, 0) + 1
+        wall = time.perf_counter() - wall0
+
+    return {
+        "log": log,
+        "requests": len(requests),
+        "concurrency": concurrency,
+        "cold_caches": cold,
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(len(requests) / wall, 2) if wall > 0 else 0.0,
+        "submit": summarize(submit_samples),
+        "end_to_end": summarize(total_samples),
+        "statuses": statuses,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline de VideoGenerator")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    p_stages = sub.add_parser("stages", help="solve_problem / build_steps / build_scene_spec / generate_manim_code")
+    p_stages.add_argument("--iterations", type=int, default=10)
+
+    p_render = sub.add_parser("render", help="render_video por nivel de calidad")
+    p_render.add_argument("--qualities", nargs="+", default=["l", "m", "h"])
+    p_render.add_argument("--iterations", type=int, default=2)
+
+    p_replay = sub.add_parser("replay", help="reproduce un log de peticiones contra la app en-proceso")
+    p_replay.add_argument("--log", required=True, help="JSONL con un SolveRequest por línea")
+    p_replay.add_argument("--concurrency", type=int, default=4)
+    p_replay.add_argument("--repeat", type=int, default=1)
+    p_replay.add_argument("--cold", action="store_true", help="desactiva las cachés de solver y render")
+    p_replay.add_argument("--timeout", type=float, default=600.0)
+
+    p_imports = sub.add_parser("imports", help="tiempo de arranque/import de la API y del CLI de antigua")
+    p_imports.add_argument("--iterations", type=int, default=5)
+
+    p_parse = sub.add_parser("parse", help="parseo de texto plano: parser propio vs regex + sympify")
+    p_parse.add_argument("--iterations", type=int, default=200)
+
+    p_latex = sub.add_parser("latex", help="parseo de LaTeX: parser rápido vs parse_latex (ANTLR)")
+    p_latex.add_argument("--iterations", type=int, default=200)
+
+    for p in (p_stages, p_render, p_replay, p_imports, p_parse, p_latex):
+        p.add_argument("--out", default=None, help="archivo JSON del reporte (por defecto stdout)")
+
+    args = parser.parse_args(argv)
+
+    if args.mode == "stages":
+        results = bench_stages(args.iterations)
+    elif args.mode == "render":
+        results = bench_render(args.qualities, args.iterations)
+    elif args.mode == "imports":
+        results = bench_imports(args.iterations)
+    elif args.mode == "parse":
+        results = bench_parse(args.iterations)
+    elif args.mode == "latex":
+        results = bench_latex(args.iterations)
+    else:
+        results = bench_replay(args.log, args.concurrency, args.repeat, args.cold, args.timeout)
+
+    report = {"meta": _meta(), "mode": args.mode, "results": results}
+    text = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()